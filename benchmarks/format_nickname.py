@@ -0,0 +1,79 @@
+'''
+Script used to measure the throughput of `format_nickname` on all the nicknames in `evt_name.yaml`
+
+It compares:
+
+legacy   : Implementation with the two dictionaries of rules applied one after the other
+regex    : Single pass with all rules in one regex, the output for each key is the one of the full chain of rules
+compiled : Current implementation, without the cache
+memoized : Current implementation, starting from an empty cache
+
+All of them run over the inputs of `update_sample_naming`, where every nickname is formatted twice
+'''
+import re
+import timeit
+import argparse
+
+import ap_utilities.decays.utilities as aput
+from ap_utilities.decays import naming_index as nix
+
+# ----------------------
+def _legacy(name : str) -> str:
+    name = aput._apply_format(aput.Data.d_form_long , name) # pylint: disable=protected-access
+    name = aput._apply_format(aput.Data.d_form_short, name) # pylint: disable=protected-access
+
+    return name
+# ----------------------
+def _get_regex_formatter():
+    d_out = { org : _legacy(org) for org, _ in aput.Data.t_form_rule }
+    l_org = sorted(d_out, key=len, reverse=True)
+    regex = re.compile('|'.join(re.escape(org) for org in l_org))
+
+    def _format(name : str) -> str:
+        return regex.sub(lambda mtch : d_out[mtch[0]], name)
+
+    return _format
+# ----------------------
+def _memoized(l_name : list[str]) -> None:
+    aput._format_nickname.cache_clear() # pylint: disable=protected-access
+    for name in l_name:
+        aput.format_nickname(name)
+# ----------------------
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark for format_nickname')
+    parser.add_argument('-r', '--repeat', type=int, help='Number of repetitions, the best one is used', default=5)
+    args = parser.parse_args()
+
+    return args
+# ----------------------
+def main():
+    '''
+    Entry point
+    '''
+    args   = _parse_args()
+    l_name = list(nix.read_table('evt_name').values())
+    aput.format_nickname('')
+
+    regex  = _get_regex_formatter()
+    l_bad  = [ name for name in l_name if regex(name) != _legacy(name) or aput.format_nickname(name) != _legacy(name) ]
+    if l_bad:
+        raise ValueError(f'Formatters disagree for: {l_bad}')
+
+    l_twice= l_name + l_name
+    uncache= aput._format_nickname.__wrapped__ # pylint: disable=protected-access
+    d_func = {
+            'legacy'   : lambda : [ _legacy(name) for name in l_twice ],
+            'regex'    : lambda : [ regex(name)   for name in l_twice ],
+            'compiled' : lambda : [ uncache(name) for name in l_twice ],
+            'memoized' : lambda : _memoized(l_twice),
+            }
+
+    nname = len(l_twice)
+    print(f'Formatting {nname} nicknames')
+    print(f'{"Method":<20}{"us/name":>10}{"names/s":>15}')
+    for name, func in d_func.items():
+        time = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f'{name:<20}{1e6 * time / nname:>10.3f}{nname / time:>15.0f}')
+# ----------------------
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+'''
+Script used to check the time needed to import the modules behind the console scripts in `pyproject.toml`
+
+For each entry point, it runs `python -X importtime -c "import module"` several times,
+takes the best cumulative time of the module and compares it with its budget.
+Exits with non zero code if any module is above budget.
+'''
+import os
+import sys
+import tomllib
+import argparse
+import subprocess
+
+# ----------------------
+class Data:
+    '''
+    Class storing shared attributes
+    '''
+    pyproject = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyproject.toml')
+    # Budgets in milliseconds, interpreter startup, e.g. site, is not included
+    # find_in_ap needs the logger of dmu, whose import brings most of dmu
+    d_budget  = {
+            'check_production'     :  60,
+            'check_samples'        :  60,
+            'make_fields'          :  60,
+            'make_name_evt'        :  60,
+            'update_decinfo'       :  60,
+            'update_sample_naming' :  60,
+            'validate_ap_tuples'   :  60,
+            'analyze_samples'      :  60,
+            'make_samples_table'   :  60,
+            'find_in_ap'           : 200,
+            'make_naming_index'    :  60,
+            'query_decays'         :  60,
+            }
+# ----------------------
+def _get_entry_points() -> dict[str,str]:
+    with open(Data.pyproject, 'rb') as ifile:
+        d_data = tomllib.load(ifile)
+
+    d_script = d_data['project']['scripts']
+
+    return { name : entry.split(':')[0] for name, entry in d_script.items() }
+# ----------------------
+def _get_import_time(module : str) -> float:
+    '''
+    Returns cumulative import time of module in milliseconds
+    '''
+    cmd = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+    for line in out.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        l_field = line.split('|')
+        if len(l_field) != 3 or l_field[2].strip() != module:
+            continue
+
+        return int(l_field[1]) / 1000.
+
+    raise ValueError(f'Cannot find import time of {module} in:\n{out.stderr}')
+# ----------------------
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark for the import time of console scripts')
+    parser.add_argument('-r', '--repeat', type=int, help='Number of repetitions, the best one is used', default=5)
+    parser.add_argument('-s', '--script', type=str, help='Only check these scripts, by default all', nargs='+')
+    args = parser.parse_args()
+
+    return args
+# ----------------------
+def main():
+    '''
+    Entry point
+    '''
+    args     = _parse_args()
+    d_module = _get_entry_points()
+    l_script = list(d_module) if args.script is None else args.script
+
+    l_over   = []
+    print(f'{"Script":<25}{"Module":<50}{"ms":>10}{"Budget":>10}')
+    for script in l_script:
+        module = d_module[script]
+        budget = Data.d_budget.get(script)
+        try:
+            time = min(_get_import_time(module) for _ in range(args.repeat))
+        except subprocess.CalledProcessError as exc:
+            print(f'{script:<25}{module:<50}{"failed":>10}{str(budget):>10}')
+            l_over.append(f'{script}: {exc.stderr.splitlines()[-1]}')
+            continue
+
+        print(f'{script:<25}{module:<50}{time:>10.1f}{str(budget):>10}')
+        if budget is None:
+            l_over.append(f'{script}: no budget')
+        elif time > budget:
+            l_over.append(f'{script}: {time:.1f} ms > {budget} ms')
+
+    if l_over:
+        text = '\n'.join(l_over)
+        print(f'\nFailed:\n{text}')
+        sys.exit(1)
+# ----------------------
+if __name__ == '__main__':
+    main()
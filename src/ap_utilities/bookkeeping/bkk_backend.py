@@ -0,0 +1,428 @@
+'''
+Module with backends used by BkkChecker to query the bookkeeping
+
+All of them take a bookkeeping path and return the output that
+`dirac-bookkeeping-get-stats -B PATH` would print for it, such that
+the way this output is read does not depend on how it was obtained.
+'''
+from __future__ import annotations
+
+import os
+import abc
+import sys
+import json
+import time
+import queue
+import random
+import select
+import subprocess
+from typing import Union
+
+from ap_utilities.bookkeeping       import bkk_metrics as bkm
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
+
+# Only needed by the asyncio engine
+asyncio = lazy_import('asyncio')
+log=LogStore.add_logger('ap_utilities:bkk_backend')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    command  = ['dirac-bookkeeping-get-stats', '-B']
+    l_kind   = ['subprocess', 'worker', 'dirac', 'fake']
+# ---------------------------------
+class BkkBackend(abc.ABC):
+    '''
+    Base class of backends, the derived classes implement `query`
+    '''
+    # ---------------------------------
+    @abc.abstractmethod
+    def query(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        bkk    : Bookkeeping path
+        timeout: If passed, maximum number of seconds to wait for the answer
+
+        Returns
+        ------------------
+        Output of the query, None if it timed out.
+        Raises RuntimeError if the query failed
+        '''
+    # ---------------------------------
+    async def query_async(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        Same as `query`, without blocking the event loop, by default the query runs in a thread
+        '''
+        return await asyncio.to_thread(self.query, bkk, timeout)
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Releases whatever the backend holds, e.g. processes
+        '''
+    # ---------------------------------
+    def __enter__(self) -> 'BkkBackend':
+        return self
+    # ---------------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+# ---------------------------------
+class SubprocessBackend(BkkBackend):
+    '''
+    Backend starting one Dirac process for each query
+    '''
+    # ---------------------------------
+    def query(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        See `BkkBackend.query`
+        '''
+        with bkm.timer('spawn'):
+            proc = subprocess.Popen(Data.command + [bkk], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+        with proc:
+            try:
+                with bkm.timer('wait'):
+                    stdout, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                return None
+            except BaseException:
+                proc.kill()
+                raise
+
+        _check_return_code(proc.returncode, stderr)
+
+        return stdout
+    # ---------------------------------
+    async def query_async(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        See `BkkBackend.query`, the query runs as an asyncio subprocess
+        '''
+        with bkm.timer('spawn'):
+            proc = await _spawn(bkk)
+
+        try:
+            with bkm.timer('wait'):
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            # Reached also when the task is cancelled, the process should not outlive it
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+        _check_return_code(proc.returncode, stderr.decode('utf-8'))
+
+        return stdout.decode('utf-8')
+# ---------------------------------
+def _check_return_code(code : int, stderr : str) -> None:
+    if code == 0:
+        return
+
+    message = stderr.strip().splitlines()[-1] if stderr.strip() else 'no error message'
+
+    raise RuntimeError(f'Query exited with code {code}: {message}')
+# ---------------------------------
+async def _spawn(bkk : str) -> asyncio.subprocess.Process:
+    spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(
+            *Data.command, bkk,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE))
+    try:
+        return await asyncio.shield(spawn)
+    except asyncio.CancelledError:
+        # Cancelling while the process starts can hang the event loop in python<3.12,
+        # let it start and then kill it
+        proc = await spawn
+        proc.kill()
+        await proc.wait()
+        raise
+# ---------------------------------
+class WorkerBackend(BkkBackend):
+    '''
+    Backend keeping long lived processes, each of them initializes Dirac once and then
+    answers queries sent through its standard input, see `bkk_worker.py`.
+    '''
+    # ---------------------------------
+    def __init__(self, nworker : int = 1, kind : str = 'dirac'):
+        '''
+        Parameters
+        ------------------
+        nworker: Maximum number of processes, i.e. of queries running at the same time
+        kind   : Backend used inside the processes, dirac or fake
+        '''
+        self._kind    = kind
+        self._nstart  = 0
+        # Processes are started when needed, None stands for one not started yet
+        self._idle    : queue.Queue = queue.Queue()
+        for _ in range(nworker):
+            self._idle.put(None)
+
+        self._l_proc  : list[subprocess.Popen] = []
+    # ---------------------------------
+    def _start(self) -> subprocess.Popen:
+        cmd  = [sys.executable, '-m', 'ap_utilities.bookkeeping.bkk_worker', '-b', self._kind]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self._nstart += 1
+        self._l_proc.append(proc)
+        log.debug(f'Started worker {proc.pid}')
+
+        return proc
+    # ---------------------------------
+    def _stop(self, proc : subprocess.Popen) -> None:
+        if proc.poll() is None:
+            proc.kill()
+
+        proc.wait()
+        self._l_proc.remove(proc)
+    # ---------------------------------
+    def query(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        See `BkkBackend.query`
+        '''
+        proc = self._idle.get()
+        try:
+            if proc is None or proc.poll() is not None:
+                with bkm.timer('spawn'):
+                    proc = self._start()
+
+            with bkm.timer('wait'):
+                proc.stdin.write(f'{bkk}\n')
+                proc.stdin.flush()
+                line = _read_line(proc.stdout.fileno(), timeout)
+        except BaseException as exc:
+            if proc is not None:
+                self._stop(proc)
+
+            self._idle.put(None)
+            # E.g. broken pipe, worker died after its last query, retried as any other failed query
+            if isinstance(exc, OSError):
+                raise RuntimeError(f'Cannot query worker for {bkk}: {exc}') from exc
+
+            raise
+
+        if line is None:
+            # Worker could answer later, to this query instead of the next one
+            self._stop(proc)
+            self._idle.put(None)
+            return None
+
+        if line == '':
+            self._stop(proc)
+            self._idle.put(None)
+            raise RuntimeError(f'Worker {proc.pid} exited while querying: {bkk}')
+
+        self._idle.put(proc)
+        d_answer = json.loads(line)
+        if 'error' in d_answer:
+            raise RuntimeError(d_answer['error'])
+
+        return d_answer['stdout']
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Stops the workers
+        '''
+        for proc in list(self._l_proc):
+            proc.stdin.close()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+            self._l_proc.remove(proc)
+# ---------------------------------
+def _read_line(fdesc : int, timeout : Union[float,None]) -> Union[str,None]:
+    '''
+    Returns line read from file descriptor of worker, empty if it exited, None if the
+    whole line did not arrive in `timeout` seconds. The worker writes nothing else until
+    it gets the next query, thus nothing after the line is read
+    '''
+    deadline = None if timeout is None else time.monotonic() + timeout
+    data     = b''
+    while not data.endswith(b'\n'):
+        wait = None if deadline is None else max(0., deadline - time.monotonic())
+        ready, _, _ = select.select([fdesc], [], [], wait)
+        if not ready:
+            return None
+
+        chunk = os.read(fdesc, 2 ** 16)
+        if not chunk:
+            return ''
+
+        data += chunk
+
+    return data.decode('utf-8')
+# ---------------------------------
+class DiracBackend(BkkBackend):
+    '''
+    Backend calling the bookkeeping client of LHCbDirac in this process,
+    it needs an environment where LHCbDirac is installed and a valid proxy
+    '''
+    # ---------------------------------
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel, import-error
+        import DIRAC
+        DIRAC.initialize()
+
+        from LHCbDIRAC.BookkeepingSystem.Client.BKQuery            import BKQuery
+        from LHCbDIRAC.BookkeepingSystem.Client.BookkeepingClient  import BookkeepingClient
+
+        self._query_class = BKQuery
+        self._client      = BookkeepingClient()
+    # ---------------------------------
+    def query(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        See `BkkBackend.query`, the timeout is not used
+        '''
+        d_query = self._query_class(bkk).getQueryDict()
+        with bkm.timer('wait'):
+            result = self._client.getFilesSummary(d_query)
+
+        if not result['OK']:
+            raise RuntimeError(result['Message'])
+
+        d_value = result['Value']
+        l_rec   = d_value['Records']
+        d_stat  = dict(zip(d_value['ParameterNames'], l_rec[0])) if l_rec else {}
+
+        return get_stats_output(
+                bkk,
+                nfile = d_stat.get('NbofFiles'),
+                nevent= d_stat.get('NumberOfEvents'),
+                size  = d_stat.get('FileSize'),
+                lumi  = d_stat.get('Luminosity'))
+# ---------------------------------
+class FakeBackend(BkkBackend):
+    '''
+    Backend answering in this process without Dirac, meant for tests. The number of
+    files of existing paths is made from their length.
+    '''
+    # ---------------------------------
+    def __init__(
+            self,
+            missing : Union[list[str],None] = None,
+            latency : float                 = 0,
+            fail    : float                 = 0,
+            log_path: Union[str,None]       = None):
+        '''
+        Parameters
+        ------------------
+        missing : Paths containing any of these strings have no files
+        latency : Seconds to wait before answering
+        fail    : Probability for the query to fail, as when Dirac is overloaded
+        log_path: If passed, each queried path is appended to this file
+        '''
+        self._l_missing = [] if missing is None else missing
+        self._latency   = latency
+        self._fail      = fail
+        self._log_path  = log_path
+        self.calls      : list[str] = []
+    # ---------------------------------
+    @classmethod
+    def from_env(cls) -> 'FakeBackend':
+        '''
+        Returns backend configured from FAKE_DIRAC_MISSING (comma separated), FAKE_DIRAC_LATENCY,
+        FAKE_DIRAC_FAIL and FAKE_DIRAC_LOG, see `__init__`
+        '''
+        l_missing = [ value for value in os.environ.get('FAKE_DIRAC_MISSING', '').split(',') if value ]
+
+        return cls(
+                missing = l_missing,
+                latency = float(os.environ.get('FAKE_DIRAC_LATENCY', '0')),
+                fail    = float(os.environ.get('FAKE_DIRAC_FAIL'   , '0')),
+                log_path= os.environ.get('FAKE_DIRAC_LOG'))
+    # ---------------------------------
+    def query(self, bkk : str, timeout : Union[float,None] = None) -> Union[str,None]:
+        '''
+        See `BkkBackend.query`
+        '''
+        self.calls.append(bkk)
+        if self._log_path is not None:
+            with open(self._log_path, 'a', encoding='utf-8') as ofile:
+                ofile.write(f'{bkk}\n')
+
+        if timeout is not None and self._latency > timeout:
+            time.sleep(timeout)
+            return None
+
+        with bkm.timer('wait'):
+            time.sleep(self._latency)
+
+        if random.random() < self._fail:
+            raise RuntimeError('Error: Server is overloaded')
+
+        if any(value in bkk for value in self._l_missing):
+            return get_stats_output(bkk, nfile=None, nevent=None, size=None, lumi=None)
+
+        nfile = len(bkk) % 7 + 1
+
+        return get_stats_output(bkk, nfile=nfile, nevent=1000 * nfile, size=1.234e9, lumi=0.567)
+# ---------------------------------
+def get_stats_output(
+        bkk    : str,
+        nfile  : Union[int,None],
+        nevent : Union[int,None],
+        size   : Union[float,None],
+        lumi   : Union[float,None]) -> str:
+    '''
+    Parameters
+    ------------------
+    bkk   : Bookkeeping path
+    nfile : Number of files, None if the path has none
+    nevent: Number of events
+    size  : Size in bytes
+    lumi  : Luminosity in pb^-1
+
+    Returns
+    ------------------
+    Text printed by `dirac-bookkeeping-get-stats` for these statistics
+    '''
+    if nfile is None or nevent is None or size is None or lumi is None:
+        return f'For BK path {bkk}:\nNb of Files      :  None\nNb of Events     :  None\n'
+
+    evt_size = size / nevent / 1e3 if nevent else 0
+
+    l_line = [
+            f'For BK path {bkk}:',
+            f'Nb of Files      :  {nfile}',
+            f'Nb of Events     :  {nevent:,}',
+            f'Total size       :  {size / 1e9:.3f} GB ({evt_size:.1f} kB per evt)',
+            f'Luminosity       :  {lumi:.3f} /pb']
+
+    return '\n'.join(l_line) + '\n'
+# ---------------------------------
+def get_backend(kind : str, nworker : int = 1) -> BkkBackend:
+    '''
+    Parameters
+    ------------------
+    kind   : Type of backend:
+             subprocess: One Dirac process per query
+             worker    : Long lived processes calling Dirac, see `WorkerBackend`
+             dirac     : Dirac called in this process
+             fake      : Fake configured through the environment, see `FakeBackend.from_env`
+    nworker: Number of processes, used by the worker backend
+
+    Returns
+    ------------------
+    Backend
+    '''
+    if kind == 'subprocess':
+        return SubprocessBackend()
+
+    if kind == 'worker':
+        return WorkerBackend(nworker=nworker)
+
+    if kind == 'dirac':
+        return DiracBackend()
+
+    if kind == 'fake':
+        return FakeBackend.from_env()
+
+    raise ValueError(f'Invalid backend {kind}, expected one of: {Data.l_kind}')
+# ---------------------------------
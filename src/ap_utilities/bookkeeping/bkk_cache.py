@@ -0,0 +1,108 @@
+'''
+Module with BkkCache class
+'''
+import os
+import time
+import sqlite3
+import threading
+from typing import Union
+
+import ap_utilities.io.utilities as iout
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:bkk_cache')
+# ---------------------------------
+class BkkCache:
+    '''
+    Class storing on disk the outputs of bookkeeping queries, such that later runs
+    only query paths that are new or whose result expired.
+
+    Paths with files and paths without them expire after different times,
+    the latter are more likely to change, e.g. when a production finishes.
+    '''
+    # ---------------------------------
+    def __init__(
+            self,
+            path        : Union[str,None] = None,
+            ttl_found   : float           = 7 * 24 * 3600,
+            ttl_missing : float           = 24 * 3600,
+            refresh     : bool            = False):
+        '''
+        Parameters
+        ------------------
+        path       : Path to SQLite file, by default `bkk_checker/bkk_cache.sqlite` in $ANADIR
+        ttl_found  : Time in seconds after which a path with files is queried again
+        ttl_missing: Time in seconds after which a path without files is queried again
+        refresh    : If True, nothing will be read from the cache, but new results will be written
+        '''
+        if path is None:
+            path = f'{iout.get_ana_dir()}/bkk_checker/bkk_cache.sqlite'
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._path        = path
+        self._ttl_found   = ttl_found
+        self._ttl_missing = ttl_missing
+        self._refresh     = refresh
+        # Same connection is used from checker threads
+        self._lock        = threading.Lock()
+        self._conn        = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS stats (path TEXT PRIMARY KEY, nfile INTEGER, stdout TEXT, time REAL) WITHOUT ROWID')
+        self._conn.commit()
+
+        log.debug(f'Using cache: {path}')
+    # ---------------------------------
+    @property
+    def path(self) -> str:
+        '''
+        Path to SQLite file
+        '''
+        return self._path
+    # ---------------------------------
+    def get(self, bkk : str) -> Union[tuple[int,str],None]:
+        '''
+        Parameters
+        ------------------
+        bkk: Bookkeeping path
+
+        Returns
+        ------------------
+        Tuple with number of files and output of query, None if not cached, expired or refreshing
+        '''
+        if self._refresh:
+            return None
+
+        with self._lock:
+            row = self._conn.execute('SELECT nfile, stdout, time FROM stats WHERE path = ?', (bkk,)).fetchone()
+
+        if row is None:
+            return None
+
+        nfile, stdout, created = row
+        ttl = self._ttl_found if nfile > 0 else self._ttl_missing
+        if time.time() - created > ttl:
+            log.debug(f'Expired: {bkk}')
+            return None
+
+        return nfile, stdout
+    # ---------------------------------
+    def put(self, bkk : str, nfile : int, stdout : str) -> None:
+        '''
+        Parameters
+        ------------------
+        bkk   : Bookkeeping path
+        nfile : Number of files found
+        stdout: Output of query
+        '''
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?)', (bkk, nfile, stdout, time.time()))
+            self._conn.commit()
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Closes the connection to the file
+        '''
+        with self._lock:
+            self._conn.close()
+# ---------------------------------
@@ -1,19 +1,31 @@
 '''
 Module with BkkChecker class
 '''
+from __future__ import annotations
 
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor
 
-import subprocess
-import yaml
+from typing             import Union, AsyncIterator
 
+import ap_utilities.io.utilities     as iout
 import ap_utilities.decays.utilities as aput
+from ap_utilities.bookkeeping.bkk_cache   import BkkCache
+from ap_utilities.bookkeeping.bkk_journal import BkkJournal
+from ap_utilities.bookkeeping.bkk_stats   import BkkStats, StatsStore
+from ap_utilities.bookkeeping.bkk_path    import BkkPath
+from ap_utilities.bookkeeping.bkk_metrics import QueryMetrics
+from ap_utilities.bookkeeping.bkk_backend import BkkBackend, SubprocessBackend
+from ap_utilities.bookkeeping.throttle    import Throttle
+from ap_utilities.bookkeeping             import priority_pool as ppl
+from ap_utilities.generic.lazy       import lazy_import
 from ap_utilities.logging.log_store  import LogStore
-from omegaconf                       import DictConfig
 
-log=LogStore.add_logger('ap_utilities:bkk_checker')
+yaml     = lazy_import('yaml')
+omegaconf= lazy_import('omegaconf')
+# Only needed by the asyncio engine
+asyncio  = lazy_import('asyncio')
+log      = LogStore.add_logger('ap_utilities:bkk_checker')
 # ---------------------------------
 class BkkChecker:
     '''
@@ -24,45 +36,82 @@ class BkkChecker:
     def __init__(
         self, 
         name : str, 
-        cfg  : DictConfig):
+        cfg    : omegaconf.DictConfig,
+        cache   : Union[BkkCache,None]   = None,
+        backend : Union[BkkBackend,None] = None,
+        throttle: Union[Throttle,None]   = None,
+        journal : Union[BkkJournal,None] = None,
+        store   : Union[StatsStore,None] = None,
+        metrics : Union[QueryMetrics,None] = None):
         '''
         Parameters:
 
         name     : Name of section, needed to dump output
         d_section: A dictionary representing sections of samples
+        cache    : If passed, results of queries will be read from and saved to it
+        backend  : Used to query the bookkeeping, by default one Dirac process per query, see `bkk_backend.py`
+        throttle : Used to retry failed queries and limit their rate, by default `Throttle()`, see `throttle.py`
+        journal  : If passed, results of queries are recorded in it as they finish, and the ones in it are not queried again
+        store    : Where the statistics of the paths checked are saved, by default `StatsStore()`, closed by `close`, see `bkk_stats.py`
+        metrics  : Where the time spent by the queries is recorded, by default `QueryMetrics()`, see `bkk_metrics.py`
         '''
 
         self._suffix = '' if 'suffix' not in cfg else cfg.suffix
         self._name   = name
         self._dry    = False
+        self._timeout: Union[float,None] = None
         self._cfg    = cfg
+        self._cache  = cache
+        self._journal= journal
+        self._store  = StatsStore()        if store    is None else store
+        self._own_store = store is None
+        self._metrics= QueryMetrics()      if metrics  is None else metrics
+        self._backend= SubprocessBackend() if backend is None else backend
+        self._throttle=Throttle()          if throttle is None else throttle
         self._out_dir= self._get_out_dir()
+        self._bkk_path=BkkPath(cfg.settings)
 
         self._l_event_type : list[str] = self._get_event_types()
+        self._d_priority   : dict[str,int] = self._get_priorities()
+        self._d_path       : dict[str,str] = dict(zip(self._l_event_type, self._bkk_path.get_paths(self._l_event_type)))
     # -------------------------
     def _get_out_dir(self) -> str:
-        if 'ANADIR' not in os.environ:
-            ana_dir = '/tmp/ap_utilities/output'
-        else:
-            ana_dir = os.environ['ANADIR']
-
+        ana_dir = iout.get_ana_dir()
         out_dir = f'{ana_dir}/bkk_checker/{self._name}'
         os.makedirs(out_dir, exist_ok=True)
 
         return out_dir
     # -------------------------
     def _get_event_types(self) -> list[str]:
-        l_evt  = self._list_from_dict('evt_type')
-        nevt = len(l_evt)
-        log.debug(f'Found {nevt} event types')
+        return get_event_types(self._cfg)
+    # -------------------------
+    def _get_priorities(self) -> dict[str,int]:
+        '''
+        Returns dictionary between event type and its priority, lowest for the most urgent
+        event types in `priority`, a list aligned with `evt_type`, e.g. made by `SampleConfig`
+        '''
+        l_evt      = self._list_from_dict('evt_type')
+        l_priority = self._list_from_dict('priority')
+        if l_priority and len(l_priority) != len(l_evt):
+            raise ValueError(f'Found {len(l_priority)} priorities for {len(l_evt)} event types')
 
-        l_nick = self._list_from_dict('nickname')
-        nnick = len(l_nick)
-        log.debug(f'Found {nnick} nicknames')
+        d_priority = {}
+        for event_type, priority in zip(l_evt, l_priority):
+            d_priority[event_type] = min(priority, d_priority.get(event_type, priority))
 
-        l_evt += [ aput.read_event_type(nick) for nick in l_nick ]
+        return d_priority
+    # -------------------------
+    def get_priority(self, event_type : str) -> int:
+        '''
+        Parameters
+        -------------------
+        event_type: EventType, e.g. 12153001
 
-        return l_evt
+        Returns
+        -------------------
+        Priority of event type, event types with lower values are checked first, zero by default
+        '''
+        return self._d_priority.get(event_type, 0)
     # -------------------------
     def _list_from_dict(self, key : str) -> list[str]:
         if key not in self._cfg:
@@ -70,18 +119,24 @@ class BkkChecker:
 
         return self._cfg[key]
     # -------------------------
-    def _nfiles_line_from_stdout(self, stdout : str) -> str:
+    def _nfiles_line_from_stdout(self, stdout : str) -> Union[str,None]:
         l_line = stdout.split('\n')
         try:
             [line] = [ line for line in l_line if line.startswith('Nb of Files') ]
         except ValueError:
             log.debug(f'Cannot find number of files in: \n{stdout}')
-            return 'None'
+            return None
 
         return line
     # -------------------------
-    def _nfiles_from_stdout(self, stdout : str, bkk : str) -> int:
+    def _nfiles_from_stdout(self, stdout : str, bkk : str) -> Union[int,None]:
+        '''
+        Returns number of files, None if the output does not have it, e.g. Dirac failed
+        '''
         line  = self._nfiles_line_from_stdout(stdout)
+        if line is None:
+            return None
+
         log.debug(f'Searching in line {line}')
 
         regex = r'Nb of Files      :  (\d+|None)'
@@ -90,7 +145,7 @@ class BkkChecker:
         if not mtch:
             log.debug(f'For BKK: {bkk}')
             log.debug(f'No match found in: \n{stdout}')
-            return 0
+            return None
 
         nsample = mtch.group(1)
         if nsample == 'None':
@@ -101,7 +156,35 @@ class BkkChecker:
 
         return int(nsample)
     # -------------------------
-    def _was_found(self, event_type : str) -> bool:
+    @property
+    def event_types(self) -> list[str]:
+        '''
+        Event types to check, in the order in which they will be saved
+        '''
+        return list(self._l_event_type)
+    # -------------------------
+    @property
+    def metrics(self) -> QueryMetrics:
+        '''
+        Time spent by the queries made by this checker, see `bkk_metrics.py`
+        '''
+        return self._metrics
+    # -------------------------
+    @property
+    def name(self) -> str:
+        '''
+        Name of section
+        '''
+        return self._name
+    # -------------------------
+    @property
+    def paths(self) -> list[str]:
+        '''
+        Bookkeeping paths to check, in the order of `event_types`
+        '''
+        return list(dict.fromkeys(self._d_path.values()))
+    # -------------------------
+    def get_bkk_path(self, event_type : str) -> str:
         '''
         Parameters
         -------------------
@@ -109,21 +192,111 @@ class BkkChecker:
 
         Returns
         -------------------
-        True if a sample exist for the event type
+        Bookkeeping path of the sample for this event type and the settings of this section, see `BkkPath`
         '''
-        cfg   = self._cfg.settings
-        if cfg.block_id == '2024.W31.34':
-            bkk   = f'/MC/{cfg.year}/Beam6800GeV-{cfg.block_id}-{cfg.polarity}-{cfg.nu_path}-25ns-{cfg.generator}/{cfg.sim_vers}/HLT1_2024.W31.34_noUT/HLT2-{cfg.hlt_conf}/{event_type}/HLT2.DST'
-        else:
-            bkk   = f'/MC/{cfg.year}/Beam6800GeV-{cfg.block_id}-{cfg.polarity}-{cfg.nu_path}-25ns-{cfg.generator}/{cfg.sim_vers}/HLT2-{cfg.hlt_conf}/{event_type}/HLT2.DST'
+        if event_type in self._d_path:
+            return self._d_path[event_type]
+
+        return self._bkk_path.get_path(event_type)
+    # -------------------------
+    def _was_found(self, event_type : str) -> Union[bool,None]:
+        '''
+        Parameters
+        -------------------
+        event_type: EventType, e.g. 12153001
 
+        Returns
+        -------------------
+        True if a sample exist for the event type, None if it could not be checked
+        '''
+        bkk   = self.get_bkk_path(event_type)
         log.info(f'{"":<4}{bkk:<100}')
 
         found = self._find_bkk(bkk)
 
         return found
     # -------------------------
-    def _find_bkk(self, bkk : str) -> bool:
+    def _get_cached(self, bkk : str) -> Union[tuple[int,str],None]:
+        recorded = None if self._journal is None else self._journal.get(bkk)
+        if recorded is not None:
+            log.debug(f'Found in journal: {bkk}')
+            return recorded
+
+        cached = None if self._cache is None else self._cache.get(bkk)
+        if cached is not None:
+            log.debug(f'Found in cache: {bkk}')
+
+        return cached
+    # -------------------------
+    def _parse_query(self, bkk : str, stdout : Union[str,None]) -> tuple[int,str]:
+        '''
+        Returns number of files and output of query, raises RuntimeError if the query did not work
+        '''
+        if stdout is None:
+            raise RuntimeError(f'Query timed out after {self._timeout} seconds')
+
+        with self._metrics.timer('parse'):
+            nfile = self._nfiles_from_stdout(stdout, bkk)
+
+        if nfile is None:
+            raise RuntimeError(f'Cannot find number of files in output of query: {stdout[-200:]!r}')
+
+        with self._metrics.timer('write'):
+            if self._cache is not None:
+                self._cache.put(bkk, nfile, stdout)
+
+            if self._journal is not None:
+                self._journal.put(bkk, nfile, stdout)
+
+        return nfile, stdout
+    # -------------------------
+    def _query_bkk(self, bkk : str) -> Union[tuple[int,str],None]:
+        '''
+        Returns number of files and output of query, from the cache if possible.
+        None if the query failed after all the tries
+        '''
+        cached = self._get_cached(bkk)
+        if cached is not None:
+            return cached
+
+        def _query() -> tuple[int,str]:
+            with self._metrics.query():
+                stdout = self._backend.query(bkk, timeout=self._timeout)
+
+                return self._parse_query(bkk, stdout)
+
+        try:
+            return self._throttle.call(_query, name=bkk)
+        except RuntimeError:
+            return None
+    # -------------------------
+    async def _query_bkk_async(self, bkk : str) -> Union[tuple[int,str],None]:
+        '''
+        Same as `_query_bkk`, without blocking the event loop
+        '''
+        cached = self._get_cached(bkk)
+        if cached is not None:
+            return cached
+
+        async def _query() -> tuple[int,str]:
+            with self._metrics.query():
+                stdout = await self._backend.query_async(bkk, timeout=self._timeout)
+
+                return self._parse_query(bkk, stdout)
+
+        try:
+            return await self._throttle.call_async(_query, name=bkk)
+        except RuntimeError:
+            return None
+    # -------------------------
+    def configure(self, dry : bool = False, timeout : Union[float,None] = None) -> None:
+        '''
+        Sets how queries are made, see `save`, needed only when not calling it
+        '''
+        self._dry     = dry
+        self._timeout = timeout
+    # -------------------------
+    def find(self, bkk : str) -> tuple[Union[bool,None],str]:
         '''
         Parameters
         ------------------
@@ -131,97 +304,268 @@ class BkkChecker:
 
         Returns 
         ------------------
-        True if the path was found with at least one file
-        It also saves path to text
+        Tuple with True if the path was found with at least one file and output of the query.
+        Instead of True or False, None if the query kept failing, e.g. Dirac overloaded or too slow
+        '''
+        if self._dry:
+            return True, 'from dry-run'
+
+        return _get_found(self._query_bkk(bkk))
+    # -------------------------
+    async def find_async(self, bkk : str) -> tuple[Union[bool,None],str]:
         '''
+        Same as `find`, without blocking the event loop
+        '''
+        if self._dry:
+            return True, 'from dry-run'
+
+        return _get_found(await self._query_bkk_async(bkk))
+    # -------------------------
+    def _find_bkk(self, bkk : str) -> Union[bool,None]:
+        found, stdout = self.find(bkk)
+
+        return self.register(bkk, found=found, stdout=stdout)
+    # -------------------------
+    def register(self, bkk : str, found : Union[bool,None], stdout : str) -> Union[bool,None]:
+        '''
+        Parameters
+        ------------------
+        bkk   : Bookkeeping path to MC sample
+        found : True if the path was found with at least one file, None if it could not be checked
+        stdout: Output of the query, its statistics are saved to the store
+
+        Returns
+        ------------------
+        Value of `found`
+        '''
+        if found is None:
+            log.error(f'Could not check: {bkk}')
+            return None
+
         if not self._dry:
-            cmd_bkk = ['dirac-bookkeeping-get-stats', '-B' , bkk]
-            result  = subprocess.run(cmd_bkk, capture_output=True, text=True, check=False)
-            nfile   = self._nfiles_from_stdout(result.stdout, bkk)
-            found   = nfile != 0
-            stdout  = result.stdout
-        else:
-            found   = True
-            stdout  = 'from dry-run'
+            self._store.put(BkkStats.from_stdout(self._name, bkk, stdout))
 
         if not found:
             log.error(f'Missing: {bkk}')
             return False
 
-        name =  bkk.replace(r'/', '_')
-        name = name.replace(r'.', '_')
-        name = name.replace(r'-', '_')
-        path =f'{self._out_dir}/{name}.txt'
+        return found
+    # -------------------------
+    async def _was_found_async(self, event_type : str) -> Union[bool,None]:
+        '''
+        Same as `_was_found`, without blocking the event loop
+        '''
+        bkk   = self.get_bkk_path(event_type)
+        log.info(f'{"":<4}{bkk:<100}')
 
-        log.debug(f'Saving to: {path}')
-        with open(path, 'w', encoding='utf-8') as ofile:
-            ofile.write(stdout)
+        found, stdout = await self.find_async(bkk)
 
-        return found
+        return self.register(bkk, found=found, stdout=stdout)
     # -------------------------
-    def _get_samples_with_threads(self, nthreads : int) -> list[str]:
-        l_found : list[bool] = []
-        with ThreadPoolExecutor(max_workers=nthreads) as executor:
-            l_result = [ executor.submit(self._was_found, event_type) for event_type in self._l_event_type ]
-            l_found  = [result.result() for result in l_result ]
+    def _get_items(self) -> list[tuple[int,str]]:
+        '''
+        Returns pairs of priority and event type, most urgent first
+        '''
+        l_event_type = list(dict.fromkeys(self._l_event_type))
 
-        l_event_type = [ event_type for event_type, found in zip(self._l_event_type, l_found) if found ]
+        l_item       = [ (self.get_priority(event_type), event_type) for event_type in l_event_type ]
 
-        return l_event_type
+        return sorted(l_item, key=lambda item : item[0])
+    # -------------------------
+    async def iter_found(self, nconcurrent : int = 10) -> AsyncIterator[tuple[str,bool]]:
+        '''
+        Checks the event types running the queries concurrently in an event loop, by priority
+
+        Parameters
+        ----------------
+        nconcurrent: Maximum number of queries running at the same time
+
+        Returns
+        ----------------
+        Asynchronous iterator over tuples with the event type and True if it was found,
+        in the order in which the queries finish. When leaving the loop early, close the iterator, e.g. with
+        `contextlib.aclosing`, such that the queries still running are cancelled.
+        '''
+        semaphore = asyncio.Semaphore(nconcurrent)
+
+        async def _check(event_type : str) -> tuple[str,bool]:
+            async with semaphore:
+                found = await self._was_found_async(event_type)
+
+            return event_type, found
+
+        # Tasks get the semaphore in the order in which they were made
+        l_task = [ asyncio.ensure_future(_check(event_type)) for _, event_type in self._get_items() ]
+        try:
+            for task in asyncio.as_completed(l_task):
+                yield await task
+        finally:
+            for task in l_task:
+                task.cancel()
+
+            await asyncio.gather(*l_task, return_exceptions=True)
     # -------------------------
     def _save_info_yaml(self, l_event_type : list[str]) -> None:
-        text = ''
-        cfg  = self._cfg.settings
-        for evt_type in l_event_type:
+        text   = ''
+        cfg    = self._cfg.settings
+        l_nick = aput.read_decay_names(l_event_type).tolist()
+        for evt_type, nick_name_org in zip(l_event_type, l_nick):
             nu_name         = cfg.nu_path.replace('.', 'p')
-            nick_name_org   = aput.read_decay_name(evt_type)
             nick_name       = f'"{nick_name_org}{self._suffix}"'
             sim_vers        = f'"{cfg.sim_vers}"'
             text           += f'({nick_name:<60}, "{evt_type}" , "{cfg.block_id}", "{cfg.polarity}"  , "{cfg.ctags}", "{cfg.dtags}", "{cfg.nu_path}", "{nu_name}", {sim_vers:<20}, "{cfg.generator}" ),\n'
 
         output_path = f'{self._out_dir}/info.yaml'
         log.info(f'Saving to: {output_path}')
-        with open(output_path, 'w', encoding='utf-8') as ofile:
+        with iout.open_atomic(output_path) as ofile:
             ofile.write(text)
     # -------------------------
     def _save_validation_config(self, l_event_type : list[str]) -> None:
         d_data = {'samples' : {}}
-        for event_type in l_event_type:
-            nick_name = aput.read_decay_name(event_type)
+        for nick_name in aput.read_decay_names(l_event_type).tolist():
             d_data['samples'][nick_name] = ['any']
 
         output_path = f'{self._out_dir}/validation.yaml'
         log.info(f'Saving to: {output_path}')
-        with open(output_path, 'w', encoding='utf-8') as ofile:
+        with iout.open_atomic(output_path) as ofile:
             yaml.safe_dump(d_data, ofile, width=200)
     # -------------------------
     def save(
         self, 
-        nthreads : int  = 1,
-        dry      : bool = False) -> None:
+        nthreads : int                = 1,
+        dry      : bool               = False,
+        engine   : str                = 'threads',
+        timeout  : Union[float,None]  = None,
+        budget   : Union[float,None]  = None) -> None:
         '''
         Will check if samples exist in grid
         Will save list of found samples to text file with same name as input YAML, but with txt extension
 
         Parameters
         ----------------
-        nthreads: Number of threads to use for check
+        nthreads: Number of threads to use for check, with the asyncio engine, number of concurrent queries
         dry     : If True will stop before calling Dirac, default False 
+        engine  : threads, to run each query in a thread, or asyncio, to run them in an event loop, as asyncio subprocesses with the default backend
+        timeout : If passed, queries taking longer than this number of seconds are killed and their samples treated as missing
+        budget  : If passed, number of seconds after which no new query starts. Event types are checked by priority,
+                  the ones left are saved to `unchecked.yaml`
+
+        At the end, the quantiles of the time spent by the queries are printed, see `metrics`
         '''
-        self._dry = dry
+        self.configure(dry=dry, timeout=timeout)
 
         log.info('Filtering input')
-        if nthreads == 1:
-            log.info('Using single thread')
-            l_event_type = [ event_type for event_type in self._l_event_type if self._was_found(event_type) ]
-        else:
+        if engine == 'asyncio':
+            log.info(f'Using asyncio with {nthreads} concurrent queries')
+            d_found = asyncio.run(ppl.run_asyncio(self._get_items(), self._was_found_async, nconcurrent=nthreads, budget=budget, metrics=self._metrics))
+        elif engine == 'threads':
             log.info(f'Using {nthreads} threads')
-            l_event_type = self._get_samples_with_threads(nthreads)
+            d_found = ppl.run_threads(self._get_items(), self._was_found, nthreads=nthreads, budget=budget, metrics=self._metrics)
+        else:
+            raise ValueError(f'Invalid engine {engine}, expected threads or asyncio')
+
+        l_event_type = [ event_type for event_type in self._l_event_type if d_found.get(event_type) ]
+        d_unchecked  = get_unchecked(self._l_event_type, d_found)
 
+        self.save_outputs(l_event_type, d_unchecked=d_unchecked)
+        self._metrics.log_summary()
+    # -------------------------
+    def save_outputs(self, l_event_type : list[str], d_unchecked : Union[dict[str,str],None] = None) -> None:
+        '''
+        Saves `info.yaml` and `validation.yaml` for this section
+
+        Parameters
+        ----------------
+        l_event_type: Event types that were found, in the order of `event_types`
+        d_unchecked : Dictionary between event types that were not checked and the reason, see `get_unchecked`.
+                      If any, these are saved to `unchecked.yaml` and the other outputs are partial
+        '''
         nfound = len(l_event_type)
         npased = len(self._l_event_type)
 
         log.info(f'Found: {nfound}/{npased}')
+        self._store.flush()
         self._save_info_yaml(l_event_type)
         self._save_validation_config(l_event_type)
+        self._save_unchecked({} if d_unchecked is None else d_unchecked)
+    # -------------------------
+    def _save_unchecked(self, d_unchecked : dict[str,str]) -> None:
+        output_path = f'{self._out_dir}/unchecked.yaml'
+        if not d_unchecked:
+            # Left by an earlier run
+            if os.path.isfile(output_path):
+                os.remove(output_path)
+
+            return
+
+        d_data = {}
+        for event_type, reason in d_unchecked.items():
+            d_data[str(event_type)] = {'priority' : self.get_priority(event_type), 'path' : self.get_bkk_path(event_type), 'reason' : reason}
+
+        log.warning(f'Outputs are partial, {len(d_unchecked)} event types were not checked, saving them to: {output_path}')
+        with iout.open_atomic(output_path) as ofile:
+            yaml.safe_dump(d_data, ofile, width=200)
+    # -------------------------
+    def close(self) -> None:
+        '''
+        Closes the statistics store, if it was made by this object, a store that was passed is left open
+        '''
+        if self._own_store:
+            self._store.close()
+    # -------------------------
+    def __enter__(self) -> 'BkkChecker':
+        return self
+    # -------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+# ---------------------------------
+def _get_found(result : Union[tuple[int,str],None]) -> tuple[Union[bool,None],str]:
+    if result is None:
+        return None, ''
+
+    nfile, stdout = result
+
+    return nfile != 0, stdout
+# ---------------------------------
+def get_unchecked(l_key : list, d_found : dict) -> dict:
+    '''
+    Parameters
+    ----------------
+    l_key  : Event types or paths that had to be checked
+    d_found: Dictionary between those that were checked and the result, None when the query failed
+
+    Returns
+    ----------------
+    Dictionary between keys that were not checked and the reason, failed or not started
+    '''
+    d_unchecked = {}
+    for key in l_key:
+        if key not in d_found:
+            d_unchecked[key] = 'not started'
+        elif d_found[key] is None:
+            d_unchecked[key] = 'failed'
+
+    return d_unchecked
+# ---------------------------------
+def get_event_types(cfg : omegaconf.DictConfig) -> list[str]:
+    '''
+    Parameters
+    ------------------
+    cfg: Section of samples, as taken by `BkkChecker`
+
+    Returns
+    ------------------
+    Event types in `evt_type`, followed by the ones of the nicknames in `nickname`
+    '''
+    l_evt  = list(cfg['evt_type']) if 'evt_type' in cfg else []
+    nevt = len(l_evt)
+    log.debug(f'Found {nevt} event types')
+
+    l_nick = list(cfg['nickname']) if 'nickname' in cfg else []
+    nnick = len(l_nick)
+    log.debug(f'Found {nnick} nicknames')
+
+    l_evt += aput.read_event_types(l_nick).tolist()
+
+    return l_evt
 # ---------------------------------
@@ -0,0 +1,133 @@
+'''
+Module with BkkJournal class
+'''
+import os
+import json
+import time
+import threading
+from typing import Union
+
+import ap_utilities.io.utilities as iout
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:bkk_journal')
+# ---------------------------------
+class BkkJournal:
+    '''
+    Class recording the result of each bookkeeping query as soon as it is known, such that
+    an interrupted run can be resumed, querying only the paths that were not recorded.
+
+    The journal is a JSON lines file, each query appends one line and nothing is rewritten.
+    A line cut by a crash is ignored when reading it back, and removed before appending to the journal.
+    '''
+    # ---------------------------------
+    def __init__(self, path : Union[str,None] = None, resume : bool = False):
+        '''
+        Parameters
+        ------------------
+        path  : Path to JSON lines file, by default `bkk_checker/journal.jsonl` in $ANADIR
+        resume: If True, results in the journal are used and new ones are appended to them.
+                Otherwise the journal of an earlier run is discarded
+        '''
+        if path is None:
+            path = f'{iout.get_ana_dir()}/bkk_checker/journal.jsonl'
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._path      = path
+        self._d_result  = self._load() if resume else {}
+        # Queries finish in different threads
+        self._lock      = threading.Lock()
+        self._ofile     = open(path, 'a' if resume else 'w', encoding='utf-8') # pylint: disable=consider-using-with
+
+        log.info(f'Recording results in: {path}')
+        if resume:
+            log.info(f'Resuming with {len(self._d_result)} paths already checked')
+    # ---------------------------------
+    def _load(self) -> dict[str,tuple[int,str]]:
+        if not os.path.isfile(self._path):
+            log.warning(f'No journal to resume from: {self._path}')
+            return {}
+
+        d_result = {}
+        # Bytes up to the end of the last line that was written completely
+        end      = 0
+        with open(self._path, 'rb') as ifile:
+            for line in ifile:
+                try:
+                    d_line = json.loads(line)
+                except json.JSONDecodeError:
+                    log.warning(f'Skipping incomplete line in journal: {line[:100]!r}')
+                    d_line = None
+
+                if not line.endswith(b'\n'):
+                    break
+
+                end += len(line)
+                if d_line is not None:
+                    d_result[d_line['path']] = d_line['nfile'], d_line['stdout']
+
+        # Otherwise the next result would be appended to the cut line
+        if end < os.path.getsize(self._path):
+            os.truncate(self._path, end)
+
+        return d_result
+    # ---------------------------------
+    @property
+    def path(self) -> str:
+        '''
+        Path to JSON lines file
+        '''
+        return self._path
+    # ---------------------------------
+    @property
+    def paths(self) -> list[str]:
+        '''
+        Bookkeeping paths recorded, including the ones of the run being resumed
+        '''
+        with self._lock:
+            return list(self._d_result)
+    # ---------------------------------
+    def get(self, bkk : str) -> Union[tuple[int,str],None]:
+        '''
+        Parameters
+        ------------------
+        bkk: Bookkeeping path
+
+        Returns
+        ------------------
+        Tuple with number of files and output of query, None if not recorded
+        '''
+        with self._lock:
+            return self._d_result.get(bkk)
+    # ---------------------------------
+    def put(self, bkk : str, nfile : int, stdout : str) -> None:
+        '''
+        Appends result of query to the journal
+
+        Parameters
+        ------------------
+        bkk   : Bookkeeping path
+        nfile : Number of files found
+        stdout: Output of query
+        '''
+        line = json.dumps({'path' : bkk, 'nfile' : nfile, 'stdout' : stdout, 'time' : time.time()})
+        with self._lock:
+            self._d_result[bkk] = nfile, stdout
+            # Flushed, such that it survives the process being killed
+            self._ofile.write(line + '\n')
+            self._ofile.flush()
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Closes the file
+        '''
+        with self._lock:
+            self._ofile.close()
+    # ---------------------------------
+    def __enter__(self) -> 'BkkJournal':
+        return self
+    # ---------------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+# ---------------------------------
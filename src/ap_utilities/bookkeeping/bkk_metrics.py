@@ -0,0 +1,234 @@
+'''
+Module with QueryMetrics class, used to find where the time of the bookkeeping queries goes
+
+The time of each query is split in stages:
+
+spawn: Starting the process that queries Dirac
+wait : Waiting for the answer of Dirac
+parse: Reading the number of files and statistics from the answer
+write: Saving the answer to the cache and journal
+query: Whole attempt, as seen by the checker, from calling the backend to the end of `write`,
+       including what the backend does not split
+
+The statistics of each path are then put in the `StatsStore`, which writes them in its own
+thread, that time is not measured.
+'''
+from __future__ import annotations
+
+import os
+import json
+import time
+import contextlib
+import contextvars
+import threading
+from typing import ContextManager, Iterator, Union
+
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
+
+np  = lazy_import('numpy')
+log = LogStore.add_logger('ap_utilities:bkk_metrics')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    l_stage    = ['spawn', 'wait', 'parse', 'write', 'query']
+    l_quantile = [50, 95, 99]
+    # Metrics of the query running in the current thread or task, used by the backends
+    current    : contextvars.ContextVar = contextvars.ContextVar('bkk_metrics', default=None)
+# ---------------------------------
+class QueryMetrics:
+    '''
+    Class collecting the time spent by each query in each stage, the number of queries
+    running at the same time and the number of them waiting in the queue
+    '''
+    # ---------------------------------
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._d_time   : dict[str,list[float]] = { stage : [] for stage in Data.l_stage }
+        self._l_depth  : list[int] = []
+        self._l_flight : list[int] = []
+        self._nflight  = 0
+        self._first    : Union[float,None] = None
+        self._last     : Union[float,None] = None
+    # ---------------------------------
+    def record(self, stage : str, seconds : float) -> None:
+        '''
+        Parameters
+        ------------------
+        stage  : Name of stage, see module docstring
+        seconds: Time spent in it by one query
+        '''
+        if stage not in self._d_time:
+            raise ValueError(f'Invalid stage {stage}, expected one of: {Data.l_stage}')
+
+        with self._lock:
+            self._d_time[stage].append(seconds)
+    # ---------------------------------
+    @contextlib.contextmanager
+    def timer(self, stage : str) -> Iterator[None]:
+        '''
+        Context manager recording the time spent inside it in `stage`
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+    # ---------------------------------
+    def record_depth(self, depth : int) -> None:
+        '''
+        Parameters
+        ------------------
+        depth: Number of queries waiting to start, when one of them starts
+        '''
+        with self._lock:
+            self._l_depth.append(depth)
+    # ---------------------------------
+    @contextlib.contextmanager
+    def query(self) -> Iterator[None]:
+        '''
+        Context manager wrapping a query, it records the number of queries in flight, the
+        total time in the `query` stage and makes the backends record in this object, see `timer`
+        '''
+        token = Data.current.set(self)
+        with self._lock:
+            self._nflight += 1
+            self._l_flight.append(self._nflight)
+            self._first = time.monotonic() if self._first is None else self._first
+
+        try:
+            with self.timer('query'):
+                yield
+        finally:
+            with self._lock:
+                self._nflight -= 1
+                self._last     = time.monotonic()
+
+            Data.current.reset(token)
+    # ---------------------------------
+    def get_summary(self) -> dict:
+        '''
+        Returns dictionary with:
+
+        stages    : For each stage with measurements, number of them, sum and quantiles, in seconds
+        in_flight : Mean and maximum number of queries running when one starts
+        queue     : Mean and maximum number of queries waiting when one starts
+        throughput: Queries finished per second, between the start of the first and the end of the last
+        '''
+        with self._lock:
+            d_time   = { stage : list(l_time) for stage, l_time in self._d_time.items() if l_time }
+            l_flight = list(self._l_flight)
+            l_depth  = list(self._l_depth)
+            elapsed  = 0 if self._first is None or self._last is None else self._last - self._first
+
+        d_stage = {}
+        for stage, l_time in d_time.items():
+            arr_time = np.array(l_time)
+            d_stage[stage] = {
+                    'count' : len(l_time),
+                    'sum'   : float(arr_time.sum()),
+                    'max'   : float(arr_time.max()),
+                    **{ f'p{quantile}' : float(np.percentile(arr_time, quantile)) for quantile in Data.l_quantile }}
+
+        nquery = len(d_time.get('query', []))
+
+        return {
+                'stages'    : d_stage,
+                'in_flight' : _get_gauge(l_flight),
+                'queue'     : _get_gauge(l_depth),
+                'throughput': nquery / elapsed if elapsed > 0 else 0.}
+    # ---------------------------------
+    def log_summary(self) -> None:
+        '''
+        Prints time spent by queries in each stage
+        '''
+        d_summary = self.get_summary()
+        if not d_summary['stages']:
+            log.info('No query was made')
+            return
+
+        log.info(f'{"Stage":<10}{"Count":>8}{"p50 [ms]":>12}{"p95 [ms]":>12}{"p99 [ms]":>12}{"Max [ms]":>12}')
+        for stage, d_stat in d_summary['stages'].items():
+            l_value = [ 1e3 * d_stat[key] for key in ['p50', 'p95', 'p99', 'max'] ]
+            line    = ''.join(f'{value:>12.1f}' for value in l_value)
+            log.info(f'{stage:<10}{d_stat["count"]:>8}{line}')
+
+        d_flight = d_summary['in_flight']
+        d_queue  = d_summary['queue']
+        log.info(f'Queries in flight: {d_flight["mean"]:.1f} on average, {d_flight["max"]} at most')
+        log.info(f'Queries in queue : {d_queue["mean"]:.1f} on average, {d_queue["max"]} at most')
+        log.info(f'Throughput       : {d_summary["throughput"]:.2f} queries per second')
+    # ---------------------------------
+    def to_json(self) -> str:
+        '''
+        Returns summary, see `get_summary`, as JSON
+        '''
+        return json.dumps(self.get_summary(), indent=4)
+    # ---------------------------------
+    def to_prometheus(self, prefix : str = 'bkk') -> str:
+        '''
+        Returns summary, see `get_summary`, in the text format read by Prometheus
+
+        Parameters
+        ------------------
+        prefix: Prefix of the names of the metrics
+        '''
+        d_summary = self.get_summary()
+        name      = f'{prefix}_query_stage_seconds'
+        l_line    = [
+                f'# HELP {name} Time spent by bookkeeping queries in each stage',
+                f'# TYPE {name} summary']
+
+        for stage, d_stat in d_summary['stages'].items():
+            for quantile in Data.l_quantile:
+                l_line.append(f'{name}{{stage="{stage}",quantile="{quantile / 100}"}} {d_stat[f"p{quantile}"]}')
+
+            l_line.append(f'{name}_sum{{stage="{stage}"}} {d_stat["sum"]}')
+            l_line.append(f'{name}_count{{stage="{stage}"}} {d_stat["count"]}')
+
+        for kind, help_text in [('in_flight', 'Queries running'), ('queue', 'Queries waiting to start')]:
+            for stat in ['mean', 'max']:
+                gauge = f'{prefix}_{kind}_{stat}'
+                l_line.append(f'# HELP {gauge} {help_text}, {stat} when a query starts')
+                l_line.append(f'# TYPE {gauge} gauge')
+                l_line.append(f'{gauge} {d_summary[kind][stat]}')
+
+        gauge = f'{prefix}_queries_per_second'
+        l_line.append(f'# HELP {gauge} Queries finished per second')
+        l_line.append(f'# TYPE {gauge} gauge')
+        l_line.append(f'{gauge} {d_summary["throughput"]}')
+
+        return '\n'.join(l_line) + '\n'
+    # ---------------------------------
+    def save(self, path : str) -> None:
+        '''
+        Parameters
+        ------------------
+        path: Path to file, if the extension is `.prom` the summary is saved in the Prometheus format, otherwise as JSON
+        '''
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+
+        log.info(f'Saving metrics to: {path}')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as ofile:
+            ofile.write(text)
+# ---------------------------------
+def _get_gauge(l_value : list[int]) -> dict[str,Union[int,float]]:
+    if not l_value:
+        return {'mean' : 0., 'max' : 0}
+
+    return {'mean' : sum(l_value) / len(l_value), 'max' : max(l_value)}
+# ---------------------------------
+def timer(stage : str) -> ContextManager:
+    '''
+    Used by backends, records the time spent inside it in `stage` of the query
+    running in this thread or task, if any, see `QueryMetrics.query`
+    '''
+    metrics = Data.current.get()
+    if metrics is None:
+        return contextlib.nullcontext()
+
+    return metrics.timer(stage)
+# ---------------------------------
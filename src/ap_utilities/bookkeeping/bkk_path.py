@@ -0,0 +1,116 @@
+'''
+Module with BkkPath class
+'''
+from __future__ import annotations
+
+import string
+from typing import Iterable
+
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
+
+omegaconf= lazy_import('omegaconf')
+log      = LogStore.add_logger('ap_utilities:bkk_path')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    # Used by sections whose settings do not have `bkk_path`
+    template = '/MC/{year}/Beam6800GeV-{block_id}-{polarity}-{nu_path}-25ns-{generator}/{sim_vers}/HLT2-{hlt_conf}/{event_type}/HLT2.DST'
+    # Same, for blocks whose samples are in other paths
+    d_template = {
+            '2024.W31.34' : '/MC/{year}/Beam6800GeV-{block_id}-{polarity}-{nu_path}-25ns-{generator}/{sim_vers}/HLT1_2024.W31.34_noUT/HLT2-{hlt_conf}/{event_type}/HLT2.DST'}
+    variable = 'event_type'
+# ---------------------------------
+class BkkPath:
+    '''
+    Class making the bookkeeping paths of the samples of a section, from the template in
+    `bkk_path` of its settings, e.g.:
+
+    /MC/{year}/Beam6800GeV-{block_id}-{polarity}-{nu_path}-25ns-{generator}/{sim_vers}/HLT2-{hlt_conf}/{event_type}/HLT2.DST
+
+    where the fields are taken from the settings, except for `event_type`. The template is checked
+    and filled with the settings once, making a path is then joining the event type to the parts around it.
+    '''
+    # ---------------------------------
+    def __init__(self, settings : omegaconf.DictConfig):
+        '''
+        Parameters
+        ------------------
+        settings: Settings of section, as in `samples/*.yaml`. If `bkk_path` is missing, the template of
+                  the block in `Data.d_template` is used, or `Data.template` if the block is not there
+        '''
+        if 'bkk_path' in settings:
+            template = settings.bkk_path
+        else:
+            template = Data.d_template.get(str(settings.get('block_id')), Data.template)
+
+        self._template = template
+        self._prefix, self._suffix = self._compile(template, settings)
+    # ---------------------------------
+    def _compile(self, template : str, settings : omegaconf.DictConfig) -> tuple[str,str]:
+        '''
+        Returns parts of the path before and after the event type, raises ValueError if the template is not valid
+        '''
+        l_part : list[str] = ['']
+        for text, field, spec, conversion in string.Formatter().parse(template):
+            l_part[-1] += text
+            if field is None:
+                continue
+
+            if spec or conversion:
+                raise ValueError(f'Format specifications are not supported, found {{{field}!{conversion}:{spec}}} in: {template}')
+
+            if field == Data.variable:
+                l_part.append('')
+                continue
+
+            if field not in settings or field == 'bkk_path':
+                l_key = sorted(key for key in settings if key != 'bkk_path')
+                raise ValueError(f'Field {field} of {template} not found in settings: {l_key}')
+
+            l_part[-1] += str(settings[field])
+
+        if len(l_part) != 2:
+            raise ValueError(f'Template has to contain {{{Data.variable}}} once: {template}')
+
+        prefix, suffix = l_part
+        log.debug(f'Using paths: {prefix}<{Data.variable}>{suffix}')
+
+        return prefix, suffix
+    # ---------------------------------
+    @property
+    def template(self) -> str:
+        '''
+        Template used to make paths
+        '''
+        return self._template
+    # ---------------------------------
+    def get_path(self, event_type : str) -> str:
+        '''
+        Parameters
+        ------------------
+        event_type: EventType, e.g. 12153001
+
+        Returns
+        ------------------
+        Bookkeeping path of the sample
+        '''
+        return f'{self._prefix}{event_type}{self._suffix}'
+    # ---------------------------------
+    def get_paths(self, l_event_type : Iterable[str]) -> list[str]:
+        '''
+        Parameters
+        ------------------
+        l_event_type: EventTypes
+
+        Returns
+        ------------------
+        Bookkeeping paths of the samples, in the same order
+        '''
+        prefix = self._prefix
+        suffix = self._suffix
+
+        return [ f'{prefix}{event_type}{suffix}' for event_type in l_event_type ]
+# ---------------------------------
@@ -0,0 +1,179 @@
+'''
+Module with BkkScheduler class
+'''
+from __future__ import annotations
+
+from typing             import Union
+
+from ap_utilities.bookkeeping.bkk_checker import BkkChecker, get_unchecked
+from ap_utilities.bookkeeping.bkk_cache   import BkkCache
+from ap_utilities.bookkeeping.bkk_journal import BkkJournal
+from ap_utilities.bookkeeping.bkk_stats   import StatsStore
+from ap_utilities.bookkeeping.bkk_metrics import QueryMetrics
+from ap_utilities.bookkeeping.bkk_backend import BkkBackend
+from ap_utilities.bookkeeping.throttle    import Throttle
+from ap_utilities.bookkeeping             import priority_pool as ppl
+from ap_utilities.generic.lazy            import lazy_import
+from ap_utilities.logging.log_store       import LogStore
+
+omegaconf= lazy_import('omegaconf')
+# Only needed by the asyncio engine
+asyncio  = lazy_import('asyncio')
+log      = LogStore.add_logger('ap_utilities:bkk_scheduler')
+# ---------------------------------
+class BkkScheduler:
+    '''
+    Class checking the samples of every section of a config, as made by `SampleConfig`,
+    with a single pool of threads or a single event loop.
+
+    Instead of checking one section after the other, the (section, event type) pairs
+    of all the sections go into one queue, ordered by priority. Each bookkeeping path is
+    queried once, even if it appears in several sections, and the outputs are saved per
+    section, as done by `BkkChecker.save`.
+    '''
+    # ---------------------------------
+    def __init__(
+            self,
+            cfg    : omegaconf.DictConfig,
+            cache   : Union[BkkCache,None]   = None,
+            backend : Union[BkkBackend,None] = None,
+            throttle: Union[Throttle,None]   = None,
+            journal : Union[BkkJournal,None] = None,
+            store   : Union[StatsStore,None] = None,
+            metrics : Union[QueryMetrics,None] = None):
+        '''
+        Parameters
+        ------------------
+        cfg     : Config with `sections`, each of them as taken by `BkkChecker`
+        cache   : If passed, results of queries will be read from and saved to it
+        backend : Used to query the bookkeeping, by default one Dirac process per query
+        throttle: Used to retry failed queries and limit their rate, shared by all sections, by default `Throttle()`
+        journal : If passed, results of queries are recorded in it as they finish, and the ones in it are not queried again
+        store   : Where the statistics of the paths of all the sections are saved, by default `StatsStore()`, closed by `close`
+        metrics : Where the time spent by the queries of all the sections is recorded, by default `QueryMetrics()`
+        '''
+        throttle        = Throttle()   if throttle is None else throttle
+        self._store     = StatsStore() if store    is None else store
+        self._own_store = store is None
+        self._metrics   = QueryMetrics() if metrics is None else metrics
+        self._l_checker = [
+                BkkChecker(name, section, cache=cache, backend=backend, throttle=throttle, journal=journal, store=self._store, metrics=self._metrics)
+                for name, section in cfg.sections.items() ]
+        self._d_owner   = self._get_owners()
+    # ---------------------------------
+    def _get_owners(self) -> dict[str,list[BkkChecker]]:
+        '''
+        Returns dictionary between bookkeeping path and sections needing it
+        '''
+        d_owner : dict[str,list[BkkChecker]] = {}
+        npair = 0
+        for checker in self._l_checker:
+            for event_type in checker.event_types:
+                l_owner = d_owner.setdefault(checker.get_bkk_path(event_type), [])
+                npair  += 1
+                if checker not in l_owner:
+                    l_owner.append(checker)
+
+        log.info(f'Found {len(d_owner)} paths for {npair} samples in {len(self._l_checker)} sections')
+
+        return d_owner
+    # ---------------------------------
+    @property
+    def metrics(self) -> QueryMetrics:
+        '''
+        Time spent by the queries of all the sections, see `bkk_metrics.py`
+        '''
+        return self._metrics
+    # ---------------------------------
+    @property
+    def paths(self) -> list[str]:
+        '''
+        Bookkeeping paths that will be queried, each once
+        '''
+        return list(self._d_owner)
+    # ---------------------------------
+    def get_path_matrix(self) -> dict[str,list[str]]:
+        '''
+        Returns dictionary between section and the bookkeeping paths of its samples, nothing is queried
+        '''
+        return { checker.name : checker.paths for checker in self._l_checker }
+    # ---------------------------------
+    def _get_items(self) -> list[tuple[int,str]]:
+        '''
+        Returns pairs of priority and path, most urgent first, a path takes the highest priority among its samples
+        '''
+        d_priority : dict[str,int] = {}
+        for checker in self._l_checker:
+            for event_type in checker.event_types:
+                bkk      = checker.get_bkk_path(event_type)
+                priority = checker.get_priority(event_type)
+                d_priority[bkk] = min(priority, d_priority.get(bkk, priority))
+
+        return sorted(((priority, bkk) for bkk, priority in d_priority.items()), key=lambda item : item[0])
+    # ---------------------------------
+    def _register(self, bkk : str, found : Union[bool,None], stdout : str) -> Union[bool,None]:
+        for checker in self._d_owner[bkk]:
+            checker.register(bkk, found=found, stdout=stdout)
+
+        return found
+    # ---------------------------------
+    def _check(self, bkk : str) -> Union[bool,None]:
+        log.info(f'{"":<4}{bkk:<100}')
+        # Sections sharing a path are equivalent for the query, e.g. same cache and backend
+        found, stdout = self._d_owner[bkk][0].find(bkk)
+
+        return self._register(bkk, found, stdout)
+    # ---------------------------------
+    async def _check_async(self, bkk : str) -> Union[bool,None]:
+        log.info(f'{"":<4}{bkk:<100}')
+        found, stdout = await self._d_owner[bkk][0].find_async(bkk)
+
+        return self._register(bkk, found, stdout)
+    # ---------------------------------
+    def save(
+            self,
+            nthreads : int               = 1,
+            dry      : bool              = False,
+            engine   : str               = 'threads',
+            timeout  : Union[float,None] = None,
+            budget   : Union[float,None] = None) -> None:
+        '''
+        Will check which samples exist in the grid and save the outputs of each section
+
+        Parameters
+        ----------------
+        See `BkkChecker.save`, the threads or concurrent queries are shared by all the sections
+        '''
+        for checker in self._l_checker:
+            checker.configure(dry=dry, timeout=timeout)
+
+        log.info(f'Checking {len(self._d_owner)} paths with {nthreads} {engine}')
+        if engine == 'threads':
+            d_found = ppl.run_threads(self._get_items(), self._check, nthreads=nthreads, budget=budget, metrics=self._metrics)
+        elif engine == 'asyncio':
+            d_found = asyncio.run(ppl.run_asyncio(self._get_items(), self._check_async, nconcurrent=nthreads, budget=budget, metrics=self._metrics))
+        else:
+            raise ValueError(f'Invalid engine {engine}, expected threads or asyncio')
+
+        for checker in self._l_checker:
+            d_path       = { event_type : checker.get_bkk_path(event_type) for event_type in checker.event_types }
+            l_event_type = [ event_type for event_type in checker.event_types if d_found.get(d_path[event_type]) ]
+            d_unchecked  = get_unchecked(list(d_path.values()), d_found)
+            d_unchecked  = { event_type : d_unchecked[bkk] for event_type, bkk in d_path.items() if bkk in d_unchecked }
+            checker.save_outputs(l_event_type, d_unchecked=d_unchecked)
+
+        self._metrics.log_summary()
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Closes the statistics store, if it was made by this object, a store that was passed is left open
+        '''
+        if self._own_store:
+            self._store.close()
+    # ---------------------------------
+    def __enter__(self) -> 'BkkScheduler':
+        return self
+    # ---------------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+# ---------------------------------
@@ -0,0 +1,266 @@
+'''
+Module with classes used to keep the statistics of the bookkeeping paths
+
+BkkStats  : Numbers printed by `dirac-bookkeeping-get-stats` for one path
+StatsStore: Single SQLite file with the statistics of every path checked, written by a thread
+'''
+import os
+import re
+import time
+import queue
+import sqlite3
+import threading
+from dataclasses import dataclass, astuple
+from typing      import Union
+
+import ap_utilities.io.utilities as iout
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:bkk_stats')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    line_regex = re.compile(r'^(?P<key>[A-Za-z ]+?)\s*:\s*(?P<value>.*)$')
+    size_regex = re.compile(r'^(?P<value>[\d.]+) (?P<unit>[kMGTP]?B)\b')
+    lumi_regex = re.compile(r'^(?P<value>[\d.]+) (?P<unit>/[pnf]b)\b')
+    # Factors to bytes and to pb^-1
+    d_size     = {'B' : 1, 'kB' : 1e3, 'MB' : 1e6, 'GB' : 1e9, 'TB' : 1e12, 'PB' : 1e15}
+    d_lumi     = {'/nb' : 1e-3, '/pb' : 1, '/fb' : 1e3}
+    columns    = 'section, path, nfile, nevent, size, lumi, stdout'
+# ---------------------------------
+@dataclass(frozen=True)
+class BkkStats:
+    '''
+    Class with the statistics of a bookkeeping path, as found by `dirac-bookkeeping-get-stats`.
+    Paths without files have `nfile` zero and the rest None
+    '''
+    section: str
+    path   : str
+    nfile  : int
+    nevent : Union[int,None]
+    size   : Union[float,None]
+    lumi   : Union[float,None]
+    stdout : str = ''
+    # ---------------------------------
+    @property
+    def found(self) -> bool:
+        '''
+        True if the path has at least one file
+        '''
+        return self.nfile > 0
+    # ---------------------------------
+    @classmethod
+    def from_stdout(cls, section : str, bkk : str, stdout : str) -> 'BkkStats':
+        '''
+        Parameters
+        ------------------
+        section: Name of section that needs this path
+        bkk    : Bookkeeping path
+        stdout : Output of `dirac-bookkeeping-get-stats` for this path
+
+        Returns
+        ------------------
+        Statistics, the ones missing from the output are None
+        '''
+        d_value = {}
+        for line in stdout.splitlines():
+            mtch = Data.line_regex.match(line)
+            if mtch:
+                d_value[mtch.group('key')] = mtch.group('value').strip()
+
+        nfile = _to_number(d_value.get('Nb of Files'), int)
+
+        return cls(
+                section= section,
+                path   = bkk,
+                nfile  = 0 if nfile is None else nfile,
+                nevent = _to_number(d_value.get('Nb of Events'), int),
+                size   = _to_quantity(d_value.get('Total size'), Data.size_regex, Data.d_size),
+                lumi   = _to_quantity(d_value.get('Luminosity'), Data.lumi_regex, Data.d_lumi),
+                stdout = stdout)
+# ---------------------------------
+def _to_number(value : Union[str,None], kind : type) -> Union[int,float,None]:
+    if value is None or value == 'None':
+        return None
+
+    try:
+        return kind(value.replace(',', ''))
+    except ValueError:
+        log.debug(f'Cannot read number from: {value}')
+        return None
+# ---------------------------------
+def _to_quantity(value : Union[str,None], regex : re.Pattern, d_factor : dict[str,float]) -> Union[float,None]:
+    '''
+    Returns quantity with units, e.g. `1.2 GB (3.4 kB per evt)`, in units where the factor is one
+    '''
+    if value is None:
+        return None
+
+    mtch = regex.match(value)
+    if not mtch:
+        log.debug(f'Cannot read quantity from: {value}')
+        return None
+
+    return float(mtch.group('value')) * d_factor[mtch.group('unit')]
+# ---------------------------------
+class StatsStore:
+    '''
+    Class writing the statistics of all the paths checked, for every section, into a single
+    SQLite file, instead of one text file per path.
+
+    Statistics are put in a queue and written by a thread, in batches, such that the
+    threads querying the bookkeeping do not wait for the disk. The thread starts with
+    the first statistics and stops when calling `flush`, or `close`. Statistics put
+    afterwards go to a new thread, with its own queue, which writes once the former is done.
+    '''
+    # ---------------------------------
+    def __init__(self, path : Union[str,None] = None, nbatch : int = 100):
+        '''
+        Parameters
+        ------------------
+        path  : Path to SQLite file, by default `bkk_checker/stats.sqlite` in $ANADIR
+        nbatch: Maximum number of statistics written with each commit
+        '''
+        if path is None:
+            path = f'{iout.get_ana_dir()}/bkk_checker/stats.sqlite'
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._path   = path
+        self._nbatch = nbatch
+        # Queue read only by the writer running, if any
+        self._queue  : Union[queue.Queue[Union[BkkStats,None]],None] = None
+        self._writer : Union[threading.Thread,None]                  = None
+        self._last   : Union[threading.Thread,None]                  = None
+        # Writer is started and stopped from the threads putting statistics
+        self._lock   = threading.Lock()
+        # Connection is used by writer thread and by queries, apart, such that `put` never waits for the disk
+        self._db_lock= threading.Lock()
+        self._conn   = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS stats ('
+                'section TEXT, path TEXT, nfile INTEGER, nevent INTEGER, size REAL, lumi REAL, stdout TEXT, time REAL, '
+                'PRIMARY KEY (section, path)) WITHOUT ROWID')
+        self._conn.commit()
+
+        log.debug(f'Saving statistics to: {path}')
+    # ---------------------------------
+    @property
+    def path(self) -> str:
+        '''
+        Path to SQLite file
+        '''
+        return self._path
+    # ---------------------------------
+    def put(self, stats : BkkStats) -> None:
+        '''
+        Queues statistics to be written, replacing the ones of the same section and path
+        '''
+        with self._lock:
+            if self._writer is None or self._queue is None:
+                self._queue  = queue.Queue()
+                self._writer = threading.Thread(target=self._write, args=(self._queue, self._last), name='stats_store', daemon=True)
+                self._writer.start()
+
+            self._queue.put(stats)
+    # ---------------------------------
+    def _write(self, que : queue.Queue[Union[BkkStats,None]], previous : Union[threading.Thread,None]) -> None:
+        # Statistics put later are written later
+        if previous is not None:
+            previous.join()
+
+        running = True
+        while running:
+            l_stats = [que.get()]
+            while len(l_stats) < self._nbatch:
+                try:
+                    l_stats.append(que.get_nowait())
+                except queue.Empty:
+                    break
+
+            # None is put by flush, written after everything before it
+            running = None not in l_stats
+            l_row   = [ astuple(stats) + (time.time(),) for stats in l_stats if stats is not None ]
+            with self._db_lock:
+                self._conn.executemany('INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)', l_row)
+                self._conn.commit()
+
+            log.debug(f'Wrote {len(l_row)} statistics')
+    # ---------------------------------
+    def flush(self) -> None:
+        '''
+        Blocks until every statistics put is written
+        '''
+        with self._lock:
+            writer, que = self._writer, self._queue
+            if writer is None or que is None:
+                return
+
+            self._writer, self._queue, self._last = None, None, writer
+            que.put(None)
+
+        writer.join()
+    # ---------------------------------
+    def _select(self, where : str, args : tuple) -> list[BkkStats]:
+        self.flush()
+        with self._db_lock:
+            l_row = self._conn.execute(f'SELECT {Data.columns} FROM stats {where} ORDER BY section, path', args).fetchall()
+
+        return [ BkkStats(*row) for row in l_row ]
+    # ---------------------------------
+    def get(self, section : str, bkk : str) -> Union[BkkStats,None]:
+        '''
+        Parameters
+        ------------------
+        section: Name of section
+        bkk    : Bookkeeping path
+
+        Returns
+        ------------------
+        Statistics of the path, None if it was not checked for this section
+        '''
+        l_stats = self._select('WHERE section = ? AND path = ?', (section, bkk))
+
+        return l_stats[0] if l_stats else None
+    # ---------------------------------
+    def select(self, section : Union[str,None] = None, found : Union[bool,None] = None) -> list[BkkStats]:
+        '''
+        Parameters
+        ------------------
+        section: If passed, only statistics of this section are returned
+        found  : If True (False), only paths with (without) files are returned
+
+        Returns
+        ------------------
+        List of statistics, sorted by section and path
+        '''
+        l_cond : list[str] = []
+        l_arg  : list[str] = []
+        if section is not None:
+            l_cond.append('section = ?')
+            l_arg.append(section)
+
+        if found is not None:
+            l_cond.append('nfile > 0' if found else 'nfile = 0')
+
+        where = '' if not l_cond else 'WHERE ' + ' AND '.join(l_cond)
+
+        return self._select(where, tuple(l_arg))
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Writes what is left and closes the file
+        '''
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+    # ---------------------------------
+    def __enter__(self) -> 'StatsStore':
+        return self
+    # ---------------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+# ---------------------------------
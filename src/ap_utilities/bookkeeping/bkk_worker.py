@@ -0,0 +1,44 @@
+'''
+Module with process used by WorkerBackend
+
+It reads bookkeeping paths from the standard input, one per line, and writes
+for each a line with a JSON dictionary with the `path` and either the `stdout`
+of the query or the `error` raised by it.
+'''
+import sys
+import json
+import argparse
+
+from ap_utilities.bookkeeping       import bkk_backend as bkb
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:bkk_worker')
+# ---------------------------------
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Answers bookkeeping queries read from the standard input')
+    parser.add_argument('-b', '--backend', type=str, help='Backend used to query', default='dirac', choices=['dirac', 'fake'])
+    args = parser.parse_args()
+
+    return args
+# ---------------------------------
+def main():
+    '''
+    Process starts here
+    '''
+    args    = _parse_args()
+    backend = bkb.get_backend(args.backend)
+    log.debug(f'Answering queries with backend: {args.backend}')
+
+    for line in sys.stdin:
+        bkk      = line.strip()
+        d_answer = {'path' : bkk}
+        try:
+            d_answer['stdout'] = backend.query(bkk)
+        except Exception as exc: # pylint: disable=broad-exception-caught
+            d_answer['error']  = f'{type(exc).__name__}: {exc}'
+
+        sys.stdout.write(json.dumps(d_answer) + '\n')
+        sys.stdout.flush()
+# ---------------------------------
+if __name__ == '__main__':
+    main()
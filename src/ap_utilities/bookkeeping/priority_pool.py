@@ -0,0 +1,138 @@
+'''
+Module with functions running checks in order of priority, within a time budget
+
+Checks are taken from a priority queue by a fixed number of workers, threads or
+coroutines. Once the budget is spent, no new check starts, the ones running finish
+and the ones left are reported as unchecked.
+'''
+from __future__ import annotations
+
+import time
+import queue
+import threading
+from typing import Awaitable, Callable, Hashable, Iterable, Union
+
+from ap_utilities.bookkeeping.bkk_metrics import QueryMetrics
+from ap_utilities.generic.lazy            import lazy_import
+from ap_utilities.logging.log_store       import LogStore
+
+# Only needed by the asyncio engine
+asyncio = lazy_import('asyncio')
+log=LogStore.add_logger('ap_utilities:priority_pool')
+# ---------------------------------
+def _get_queue(items : Iterable[tuple[int,Hashable]], queue_class : type) -> Union[queue.Queue,asyncio.Queue]:
+    '''
+    Returns priority queue with the items, the index keeps the input order among equal priorities
+    '''
+    que = queue_class()
+    for index, (priority, key) in enumerate(items):
+        que.put_nowait((priority, index, key))
+
+    return que
+# ---------------------------------
+def _get_deadline(budget : Union[float,None]) -> float:
+    return float('inf') if budget is None else time.monotonic() + budget
+# ---------------------------------
+def run_threads(
+        items   : Iterable[tuple[int,Hashable]],
+        check   : Callable[[Hashable],Union[bool,None]],
+        nthreads: int                = 1,
+        budget  : Union[float,None]  = None,
+        metrics : Union[QueryMetrics,None] = None) -> dict[Hashable,Union[bool,None]]:
+    '''
+    Parameters
+    ------------------
+    items   : Pairs of priority and key, lower priorities are checked first
+    check   : Function taking key and returning True if it was found, None if it could not be checked
+    nthreads: Number of threads
+    budget  : If passed, number of seconds after which no new check starts
+    metrics : If passed, the number of checks left in the queue is recorded in it when each check starts
+
+    Returns
+    ------------------
+    Dictionary between key and result of check, keys left unchecked are missing
+    '''
+    que      = _get_queue(items, queue.PriorityQueue)
+    deadline = _get_deadline(budget)
+    lock     = threading.Lock()
+    d_found  : dict[Hashable,Union[bool,None]] = {}
+    l_error  : list[BaseException] = []
+
+    def _work() -> None:
+        while time.monotonic() < deadline and not l_error:
+            try:
+                _, _, key = que.get_nowait()
+            except queue.Empty:
+                return
+
+            if metrics is not None:
+                metrics.record_depth(que.qsize())
+
+            try:
+                found = check(key)
+            except BaseException as exc: # pylint: disable=broad-exception-caught
+                l_error.append(exc)
+                return
+
+            with lock:
+                d_found[key] = found
+
+    l_thread = [ threading.Thread(target=_work, name=f'priority_pool_{index}') for index in range(nthreads) ]
+    for thread in l_thread:
+        thread.start()
+
+    for thread in l_thread:
+        thread.join()
+
+    if l_error:
+        raise l_error[0]
+
+    _log_unchecked(que.qsize(), budget)
+
+    return d_found
+# ---------------------------------
+async def run_asyncio(
+        items      : Iterable[tuple[int,Hashable]],
+        check      : Callable[[Hashable],Awaitable[Union[bool,None]]],
+        nconcurrent: int                = 1,
+        budget     : Union[float,None]  = None,
+        metrics    : Union[QueryMetrics,None] = None) -> dict[Hashable,Union[bool,None]]:
+    '''
+    Same as `run_threads`, with `nconcurrent` coroutines awaiting `check`
+    '''
+    que      = _get_queue(items, asyncio.PriorityQueue)
+    deadline = _get_deadline(budget)
+    d_found  : dict[Hashable,Union[bool,None]] = {}
+
+    async def _work() -> None:
+        while time.monotonic() < deadline:
+            try:
+                _, _, key = que.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            if metrics is not None:
+                metrics.record_depth(que.qsize())
+
+            d_found[key] = await check(key)
+
+    l_task = [ asyncio.ensure_future(_work()) for _ in range(nconcurrent) ]
+    try:
+        await asyncio.gather(*l_task)
+    finally:
+        # If one check raises, the rest are cancelled
+        for task in l_task:
+            task.cancel()
+
+        await asyncio.gather(*l_task, return_exceptions=True)
+
+    _log_unchecked(que.qsize(), budget)
+
+    return d_found
+# ---------------------------------
+def _log_unchecked(nleft : int, budget : Union[float,None]) -> None:
+    if nleft == 0:
+        return
+
+    log.warning(f'Budget of {budget:.0f} seconds spent, {nleft} checks not started')
+# ---------------------------------
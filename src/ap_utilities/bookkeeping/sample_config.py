@@ -1,12 +1,15 @@
 '''
 Module containing SampleConfig class
 '''
+from __future__ import annotations
 
-from omegaconf             import DictConfig
-from dmu.generic           import utilities as gut
-from dmu.logging.log_store import LogStore
+from ap_utilities.bookkeeping.bkk_path import BkkPath
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
 
-log=LogStore.add_logger('ap_utilities:sample_config')
+gut      = lazy_import('dmu.generic.utilities')
+omegaconf= lazy_import('omegaconf')
+log      = LogStore.add_logger('ap_utilities:sample_config')
 # ----------------------
 class SampleConfig:
     '''
@@ -24,29 +27,37 @@ class SampleConfig:
         self._cfg_set = gut.load_conf(package='ap_utilities_data', fpath=f'samples/{settings}.yaml')
         self._cfg_sam = gut.load_conf(package='ap_utilities_data', fpath=f'analyses/{samples}.yaml')
     # ----------------------
-    def get_config(self, categories : list[str]) -> DictConfig:
+    def get_config(self, categories : list[str]) -> omegaconf.DictConfig:
         '''
         Parameters
         -------------
-        categories: Names of categories from which event types should be taken
+        categories: Names of categories from which event types should be taken, most urgent first
 
         Returns
         -------------
-        Configuration with both samples and settings
+        Configuration with both samples and settings. Each section has the event types in `evt_type`
+        and their priorities, the index of their category in `categories`, in `priority`
         '''
         all_event_types = []
+        all_priorities  = []
         for name, event_types in self._cfg_sam.items():
             if name not in categories:
                 log.debug(f'Skipping {name}')
                 continue
 
             all_event_types += list(event_types)
+            all_priorities  += [categories.index(name)] * len(event_types)
 
         ntypes = len(all_event_types)
         log.info(f'Found {ntypes} event types')
 
-        for section in self._cfg_set.sections.values():
+        for name, section in self._cfg_set.sections.items():
+            # Raises if the template of the paths is not valid
+            bkk_path = BkkPath(section.settings)
+            log.debug(f'Section {name} uses paths: {bkk_path.template}')
+
             section['evt_type'] = all_event_types
+            section['priority'] = all_priorities
 
         return self._cfg_set
 # ----------------------
@@ -0,0 +1,242 @@
+'''
+Module with classes used to protect Dirac from, and recover from, too many queries
+
+Throttle      : Retries failed queries with jittered exponential backoff, through the two classes below
+CircuitBreaker: Stops new queries for a while when too many of the recent ones failed
+TokenBucket   : Limits the number of queries per second
+'''
+from __future__ import annotations
+
+import time
+import random
+import threading
+from collections import deque
+from typing      import Awaitable, Callable, TypeVar, Union
+
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
+
+# Only needed by the asyncio engine
+asyncio = lazy_import('asyncio')
+log=LogStore.add_logger('ap_utilities:throttle')
+
+Result = TypeVar('Result')
+# ---------------------------------
+class TokenBucket:
+    '''
+    Class allowing at most `rate` calls per second, after bursts of up to `burst` calls
+    '''
+    # ---------------------------------
+    def __init__(self, rate : float, burst : int = 1):
+        '''
+        Parameters
+        ------------------
+        rate : Number of calls per second, in the long run
+        burst: Number of calls that can be made at once, after a pause
+        '''
+        if rate <= 0:
+            raise ValueError(f'Rate has to be positive, found: {rate}')
+
+        self._rate   = rate
+        self._burst  = burst
+        self._tokens = float(burst)
+        self._last   = time.monotonic()
+        self._lock   = threading.Lock()
+    # ---------------------------------
+    def _reserve(self) -> float:
+        '''
+        Takes a token, possibly one not yet available
+        Returns number of seconds to wait before using it
+        '''
+        with self._lock:
+            now          = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+            self._last   = now
+            self._tokens-= 1
+
+            return max(0., -self._tokens / self._rate)
+    # ---------------------------------
+    def acquire(self) -> None:
+        '''
+        Blocks until a call is allowed
+        '''
+        time.sleep(self._reserve())
+    # ---------------------------------
+    async def acquire_async(self) -> None:
+        '''
+        Same as `acquire`, without blocking the event loop
+        '''
+        await asyncio.sleep(self._reserve())
+# ---------------------------------
+class CircuitBreaker:
+    '''
+    Class keeping the outcome of the last calls. When the fraction of failures among them
+    reaches `error_rate`, the circuit opens and calls wait for `cooldown` seconds.
+    '''
+    # ---------------------------------
+    def __init__(self, error_rate : float = 0.5, window : int = 20, min_calls : int = 10, cooldown : float = 30):
+        '''
+        Parameters
+        ------------------
+        error_rate: Fraction of failed calls that opens the circuit
+        window    : Number of recent calls used to measure the fraction
+        min_calls : Minimum number of calls needed before the circuit can open
+        cooldown  : Seconds during which the circuit stays open
+        '''
+        self._error_rate = error_rate
+        self._min_calls  = min_calls
+        self._cooldown   = cooldown
+        self._l_failed   : deque[bool] = deque(maxlen=window)
+        self._until      = 0.
+        self._lock       = threading.Lock()
+    # ---------------------------------
+    @property
+    def is_open(self) -> bool:
+        '''
+        True while calls have to wait
+        '''
+        return time.monotonic() < self._until
+    # ---------------------------------
+    def record(self, failed : bool) -> None:
+        '''
+        Parameters
+        ------------------
+        failed: True if the call failed
+        '''
+        with self._lock:
+            self._l_failed.append(failed)
+            ncall = len(self._l_failed)
+            if ncall < self._min_calls or sum(self._l_failed) < self._error_rate * ncall:
+                return
+
+            # After the cooldown, the circuit needs new failures to open again
+            self._l_failed.clear()
+            self._until = time.monotonic() + self._cooldown
+
+        log.warning(f'Too many failed queries, pausing them for {self._cooldown:.0f} seconds')
+    # ---------------------------------
+    def _get_wait(self) -> float:
+        return max(0., self._until - time.monotonic())
+    # ---------------------------------
+    def wait(self) -> None:
+        '''
+        Blocks while the circuit is open
+        '''
+        time.sleep(self._get_wait())
+    # ---------------------------------
+    async def wait_async(self) -> None:
+        '''
+        Same as `wait`, without blocking the event loop
+        '''
+        await asyncio.sleep(self._get_wait())
+# ---------------------------------
+class Throttle:
+    '''
+    Class making calls that raise RuntimeError when they fail, e.g. Dirac overloaded or timed out,
+    retrying them with jittered exponential backoff. Calls go through a circuit breaker and,
+    optionally, a rate limiter, shared by everything using the same instance.
+    '''
+    # ---------------------------------
+    def __init__(
+            self,
+            ntry       : int                          = 3,
+            backoff    : float                        = 1,
+            max_backoff: float                        = 60,
+            rate       : Union[float,None]            = None,
+            breaker    : Union[CircuitBreaker,None]   = None):
+        '''
+        Parameters
+        ------------------
+        ntry       : Maximum number of times a call is made
+        backoff    : Maximum seconds to wait after the first failure, doubled after each failure
+        max_backoff: Maximum number of seconds to wait between tries
+        rate       : If passed, maximum number of calls per second
+        breaker    : Circuit breaker, by default one with default settings
+        '''
+        if ntry < 1:
+            raise ValueError(f'Number of tries has to be at least one, found: {ntry}')
+
+        self._ntry        = ntry
+        self._backoff     = backoff
+        self._max_backoff = max_backoff
+        self._bucket      = None if rate is None else TokenBucket(rate)
+        self._breaker     = CircuitBreaker() if breaker is None else breaker
+    # ---------------------------------
+    def _get_delay(self, itry : int) -> float:
+        # Full jitter, spreads the retries of calls that failed together
+        delay = min(self._max_backoff, self._backoff * 2 ** itry)
+
+        return random.uniform(0, delay)
+    # ---------------------------------
+    def _on_failure(self, itry : int, exc : RuntimeError, name : str) -> Union[float,None]:
+        '''
+        Returns seconds to wait before the next try, None if there are no tries left
+        '''
+        self._breaker.record(failed=True)
+        if itry + 1 == self._ntry:
+            log.error(f'Giving up after {self._ntry} tries for {name}: {exc}')
+            return None
+
+        delay = self._get_delay(itry)
+        log.warning(f'Try {itry + 1}/{self._ntry} failed for {name}, retrying in {delay:.1f} seconds: {exc}')
+
+        return delay
+    # ---------------------------------
+    def call(self, function : Callable[[], Result], name : str = '') -> Result:
+        '''
+        Parameters
+        ------------------
+        function: Function without arguments, raising RuntimeError when it fails
+        name    : Name of what is being done, used in messages, e.g. path being queried
+
+        Returns
+        ------------------
+        Return value of function, after as many tries as needed.
+        Raises the last RuntimeError if all the tries failed
+        '''
+        for itry in range(self._ntry):
+            self._breaker.wait()
+            if self._bucket is not None:
+                self._bucket.acquire()
+
+            try:
+                result = function()
+            except RuntimeError as exc:
+                delay = self._on_failure(itry, exc, name)
+                if delay is None:
+                    raise
+
+                time.sleep(delay)
+                continue
+
+            self._breaker.record(failed=False)
+
+            return result
+
+        raise ValueError('Number of tries has to be at least one')
+    # ---------------------------------
+    async def call_async(self, function : Callable[[], Awaitable[Result]], name : str = '') -> Result:
+        '''
+        Same as `call`, taking a function that returns an awaitable
+        '''
+        for itry in range(self._ntry):
+            await self._breaker.wait_async()
+            if self._bucket is not None:
+                await self._bucket.acquire_async()
+
+            try:
+                result = await function()
+            except RuntimeError as exc:
+                delay = self._on_failure(itry, exc, name)
+                if delay is None:
+                    raise
+
+                await asyncio.sleep(delay)
+                continue
+
+            self._breaker.record(failed=False)
+
+            return result
+
+        raise ValueError('Number of tries has to be at least one')
+# ---------------------------------
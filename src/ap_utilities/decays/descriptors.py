@@ -0,0 +1,126 @@
+'''
+Module with functions used to normalize decay descriptors from DecFiles
+and extract the particles in them
+'''
+import re
+
+from ap_utilities.logging.log_store import LogStore
+
+log = LogStore.add_logger('ap_utilities:descriptors')
+# ---------------------------
+class Data:
+    '''
+    Class storing shared data
+    '''
+    d_repl_sym = {
+            'cc'        :      'CC',
+            '->'        :     '==>',
+            }
+
+    d_repl_par = {
+            'psi(2S)'    :    'psi_2S_',
+            'psi(1S)'    :    'psi_1S_',
+            'K*(892)'    :    'K*_892_',
+            'phi(1020)'  :  'phi_1020_',
+            'K_1(1270)'  :  'K_1_1270_',
+            'K_2*(1430)' : 'K_2*_1430_',
+            }
+
+    d_repl_spa = {
+            '('        :     ' ( ',
+            ')'        :     ' ) ',
+            '['        :     ' [ ',
+            ']'        :     ' ] ',
+            }
+# ---------------------------
+def reformat_decay(decay : str) -> str:
+    '''
+    Takes decay descriptor
+    Returns it with symbols renamed and spaces around parentheses and brackets, such that it can be split into particles
+    '''
+    # Symbol renaming needed, e.g. -> ==>, cc -> CC
+    for org, new in Data.d_repl_sym.items():
+        decay = decay.replace(org, new)
+
+    # Need to make special substrings into underscored ones
+    # e.g. J/psi(1S) -> J/psi_1S_
+    for org, new in Data.d_repl_par.items():
+        decay = decay.replace(org, new)
+
+    # Add spaces to parentheses and brackets
+    for org, new in Data.d_repl_spa.items():
+        decay = decay.replace(org, new)
+
+    # Underscores are part of neutrino names
+    # Particles otherwise only use letters
+    # Numbers should be excluded, due to anti-D0 -> D~0
+    decay = re.sub(r'anti-([a-zA-Z,_]+)', r'\1~', decay)
+
+    return decay
+# ---------------------------
+def _replace_back(part : str) -> str:
+    for org, new in Data.d_repl_par.items():
+        if new in part:
+            part = part.replace(new, org)
+
+    return part
+# ---------------------------
+def particles_from_decay(decay : str) -> list[str]:
+    '''
+    Takes decay descriptor formatted with `reformat_decay`
+    Returns list of particles in it, in order of appearance
+    '''
+    l_repl = list(Data.d_repl_sym.values())
+    l_repl+= list(Data.d_repl_spa.values())
+    l_repl = [ repl.replace(' ', '') for repl in l_repl ]
+
+    l_part = decay.split(' ')
+    l_part = [ part for part in l_part if part not in l_repl ]
+    l_part = [ part for part in l_part if part != ''         ]
+    l_part = [ _replace_back(part) for part in l_part ]
+
+    # Anti-neutrinos and neutrinos will use nu(_index) branch names
+    # Need this to make sure neutrinos appear as repeated
+    l_part = [ part.rstrip('~') for part in l_part ]
+
+    log.debug(f'Found particles: {l_part}')
+
+    return l_part
+# ---------------------------
+def _fix_beauty(decay : str, event_type : str, verbose : bool) -> str:
+    if 'Beauty' not in decay:
+        return decay
+
+    if event_type == '11102453':
+        bname = 'B0'
+    else:
+        if verbose:
+            log.warning(f'Cannot identify B meson type for {event_type}')
+        bname = 'Beauty'
+
+    decay = decay.replace('Beauty', bname)
+
+    return decay
+# ---------------------------
+def _fix_phi(decay : str) -> str:
+    rgx   = r'phi(?!\s*\(\s*1020\s*\)\s*)'
+    decay = re.sub(rgx, 'phi(1020)', decay)
+
+    return decay
+# ---------------------------
+def fix_names(decay : str, event_type : str, verbose : bool = True) -> str:
+    '''
+    Decay field in decay files is not properly written, need to fix here, before using decay
+
+    verbose: If False, will not warn about decays that cannot be fixed
+    '''
+    decay = decay.replace('K_1+' ,  'K_1(1270)+')
+    decay = decay.replace('K*+'  ,    'K*(892)+')
+    decay = decay.replace('K*0'  ,    'K*(892)0')
+    decay = decay.replace('D_s*' ,        'D*_s')
+    decay = decay.replace('My_'  ,            '')
+    decay = _fix_phi(decay)
+    decay = _fix_beauty(decay, event_type, verbose)
+
+    return decay
+# ---------------------------
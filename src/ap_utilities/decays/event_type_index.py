@@ -0,0 +1,240 @@
+'''
+Module containing EventTypeIndex class and functions used to read lists of event types
+'''
+from typing              import Union, Iterable
+from importlib.resources import files
+
+import numpy
+import yaml
+
+from ap_utilities.decays            import naming_index as nix
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:event_type_index')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    ndigit     = 8
+    s_wildcard = {'x', 'X', '?'}
+    # Powers of 10 for each digit of the event type, most significant first
+    arr_power  = 10 ** numpy.arange(ndigit - 1, -1, -1, dtype=numpy.uint32)
+# ---------------------------------
+class EventTypeIndex:
+    '''
+    Class holding event types as integers in a sorted array, such that they
+    can be selected through patterns on their digits, e.g. `12xx3xxx`.
+
+    The leading fixed digits of a pattern are resolved with a binary search,
+    the rest with masks over the digits of the remaining event types.
+    '''
+    # ---------------------------------
+    def __init__(self, event_types : Iterable[Union[str,int]]):
+        '''
+        Parameters
+        ------------------
+        event_types: Event types, e.g. ['12153001', 11114000]
+        '''
+        self._arr_code  = to_codes(event_types)
+        self._arr_digit = (self._arr_code[:, None] // Data.arr_power) % 10
+        self._arr_digit = self._arr_digit.astype(numpy.uint8)
+    # ---------------------------------
+    @classmethod
+    def from_naming(cls) -> 'EventTypeIndex':
+        '''
+        Returns
+        ------------------
+        Index with every event type in `evt_name.yaml`
+        '''
+        d_evt_name = nix.read_table('evt_name')
+
+        return cls(d_evt_name)
+    # ---------------------------------
+    def __len__(self) -> int:
+        return len(self._arr_code)
+    # ---------------------------------
+    @property
+    def codes(self) -> numpy.ndarray:
+        '''
+        Sorted array of event types as integers
+        '''
+        return self._arr_code
+    # ---------------------------------
+    def _parse_pattern(self, pattern : str) -> list[Union[int,None]]:
+        '''
+        Takes pattern, e.g. 12xx3xxx or 12
+        Returns list with 8 elements, the digit or None for wildcards
+        '''
+        if len(pattern) > Data.ndigit:
+            raise ValueError(f'Pattern {pattern} has more than {Data.ndigit} characters')
+
+        # Patterns shorter than an event type are prefixes
+        pattern = pattern.ljust(Data.ndigit, 'x')
+        l_digit = []
+        for char in pattern:
+            if char in Data.s_wildcard:
+                l_digit.append(None)
+                continue
+
+            if not char.isdigit():
+                raise ValueError(f'Invalid character {char} in pattern {pattern}, expected digit or one of {Data.s_wildcard}')
+
+            l_digit.append(int(char))
+
+        return l_digit
+    # ---------------------------------
+    def _get_range(self, l_digit : list[Union[int,None]]) -> tuple[int,int]:
+        '''
+        Returns indices of first and one past last event type starting with the leading fixed digits
+        '''
+        prefix  = 0
+        nprefix = 0
+        for digit in l_digit:
+            if digit is None:
+                break
+
+            prefix   = 10 * prefix + digit
+            nprefix += 1
+
+        scale = 10 ** (Data.ndigit - nprefix)
+        low   = numpy.searchsorted(self._arr_code, prefix       * scale, side='left')
+        high  = numpy.searchsorted(self._arr_code, (prefix + 1) * scale, side='left')
+
+        return int(low), int(high)
+    # ---------------------------------
+    def match(self, pattern : str) -> numpy.ndarray:
+        '''
+        Parameters
+        ------------------
+        pattern: Pattern of digits, with `x`, `X` or `?` as wildcards, e.g. 12xx3xxx
+                 if shorter than an event type, it is taken as a prefix, e.g. 12 = 12xxxxxx
+
+        Returns
+        ------------------
+        Sorted array of event types, as integers, matching the pattern
+        '''
+        l_digit    = self._parse_pattern(pattern)
+        low, high  = self._get_range(l_digit)
+        arr_code   = self._arr_code[low:high]
+        arr_digit  = self._arr_digit[low:high]
+
+        arr_mask   = numpy.ones(len(arr_code), dtype=bool)
+        for i_digit, digit in enumerate(l_digit):
+            if digit is None:
+                continue
+
+            arr_mask &= arr_digit[:, i_digit] == digit
+
+        return arr_code[arr_mask]
+    # ---------------------------------
+    def select(
+            self,
+            pattern  : str = '',
+            within   : Union[Iterable[Union[str,int]],None] = None,
+            outside  : Union[Iterable[Union[str,int]],None] = None) -> numpy.ndarray:
+        '''
+        Parameters
+        ------------------
+        pattern: Pattern of digits, see `match`, by default all event types
+        within : If passed, only these event types are kept, e.g. the ones of an analysis
+        outside: If passed, these event types are dropped
+
+        Returns
+        ------------------
+        Sorted array of event types, as integers
+        '''
+        arr_code = self.match(pattern)
+        if within is not None:
+            arr_code = numpy.intersect1d(arr_code, to_codes(within), assume_unique=True)
+
+        if outside is not None:
+            arr_code = numpy.setdiff1d(arr_code, to_codes(outside), assume_unique=True)
+
+        return arr_code
+# ---------------------------------
+def to_codes(event_types : Iterable[Union[str,int]]) -> numpy.ndarray:
+    '''
+    Parameters
+    ------------------
+    event_types: Event types as strings or integers
+
+    Returns
+    ------------------
+    Sorted array of unique event types as unsigned integers
+    '''
+    l_code = [ int(event_type) for event_type in event_types ]
+
+    return numpy.unique(numpy.array(l_code, dtype=numpy.uint32))
+# ---------------------------------
+def to_event_types(codes : Iterable[int]) -> list[str]:
+    '''
+    Parameters
+    ------------------
+    codes: Event types as integers
+
+    Returns
+    ------------------
+    List of event types as strings, e.g. ['12153001']
+    '''
+    return [ f'{code:0{Data.ndigit}d}' for code in codes ]
+# ---------------------------------
+def _load_analyses(name : str) -> dict:
+    path = files('ap_utilities_data').joinpath(f'analyses/{name}.yaml')
+    with open(str(path), encoding='utf-8') as ifile:
+        return yaml.safe_load(ifile)
+# ---------------------------------
+def _flatten(data : Union[list,dict,int,str]) -> list:
+    if isinstance(data, dict):
+        return list(data)
+
+    if not isinstance(data, list):
+        return [data]
+
+    l_val = []
+    for item in data:
+        l_val += _flatten(item)
+
+    return l_val
+# ---------------------------------
+def get_analysis_codes(analysis : str) -> numpy.ndarray:
+    '''
+    Parameters
+    ------------------
+    analysis: Name of analysis in `analyses/analyses.yaml`, e.g. rx
+
+    Returns
+    ------------------
+    Sorted array of event types, as integers, used by the analysis
+    '''
+    d_analysis = _load_analyses('analyses')
+    if analysis not in d_analysis:
+        raise ValueError(f'Analysis {analysis} not found among: {list(d_analysis)}')
+
+    return to_codes(_flatten(d_analysis[analysis]))
+# ---------------------------------
+def get_priority_codes(
+        categories : Union[list[str],None] = None,
+        samples    : str                   = 'by_priority') -> dict[str,numpy.ndarray]:
+    '''
+    Parameters
+    ------------------
+    categories: Sections of the file with samples, e.g. ['high_priority'], by default all of them
+    samples   : Name of file with samples in `analyses`, e.g. by_priority
+
+    Returns
+    ------------------
+    Dictionary between category and sorted array of event types, as integers
+    '''
+    d_sample   = _load_analyses(samples)
+    categories = list(d_sample) if categories is None else categories
+
+    d_code = {}
+    for category in categories:
+        if category not in d_sample:
+            raise ValueError(f'Category {category} not found among: {list(d_sample)}')
+
+        d_code[category] = to_codes(_flatten(d_sample[category]))
+
+    return d_code
+# ---------------------------------
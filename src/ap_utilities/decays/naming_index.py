@@ -0,0 +1,203 @@
+'''
+Module in charge of building and reading the binary index with the naming tables
+
+The YAML files in `ap_utilities_data/naming` are compiled into a single
+SQLite file, which is shipped as package data. Reading a table from it
+takes milliseconds, while parsing the YAML file takes about a second.
+'''
+import os
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from typing              import Union
+from functools           import cache
+from importlib.resources import files
+
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
+
+# Only needed to build the index or when it is not usable
+yaml = lazy_import('yaml')
+log  = LogStore.add_logger('ap_utilities:naming_index')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    # Bump when the layout of the index changes
+    version    = 1
+    index_name = 'naming_index.sqlite'
+    # Checking the index hashes the YAML files, threads wait for the first check instead of repeating it
+    lock       = threading.Lock()
+    l_table    = [
+            'evt_dec',
+            'evt_form',
+            'evt_name',
+            'evt_old_name',
+            'form_evt',
+            'lower_original',
+            'name_evt',
+            'old_name_evt']
+# ---------------------------------
+def _naming_path(name : str) -> str:
+    path = files('ap_utilities_data').joinpath(f'naming/{name}')
+
+    return str(path)
+# ---------------------------------
+def get_index_path() -> str:
+    '''
+    Returns
+    ------------------
+    Path to index shipped with the project
+    '''
+    return _naming_path(Data.index_name)
+# ---------------------------------
+def get_sources_hash() -> str:
+    '''
+    Returns
+    ------------------
+    SHA256 hash of the YAML files used to build the index, used to tell if the index is stale
+    '''
+    hsh = hashlib.sha256()
+    for table in Data.l_table:
+        hsh.update(table.encode('utf-8'))
+        with open(_naming_path(f'{table}.yaml'), 'rb') as ifile:
+            hsh.update(ifile.read())
+
+    return hsh.hexdigest()
+# ---------------------------------
+def _read_yaml(table : str) -> dict[str,str]:
+    with open(_naming_path(f'{table}.yaml'), encoding='utf-8') as ifile:
+        d_data = yaml.safe_load(ifile)
+
+    return d_data
+# ---------------------------------
+def build_index(path : Union[str,None] = None) -> str:
+    '''
+    Will parse the YAML naming tables and save them to an SQLite file
+
+    Parameters
+    ------------------
+    path: Path to index, if not passed, will use the one shipped with the project
+
+    Returns
+    ------------------
+    Path to index
+    '''
+    path = get_index_path() if path is None else path
+    ddir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(ddir, exist_ok=True)
+
+    # Written to a temporary file, such that readers never see a half built index
+    fdesc, tmp_path = tempfile.mkstemp(dir=ddir, suffix='.tmp')
+    os.close(fdesc)
+
+    try:
+        with sqlite3.connect(tmp_path) as conn:
+            conn.execute('CREATE TABLE meta   (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+            conn.execute('CREATE TABLE naming (tbl TEXT, key TEXT, value TEXT, PRIMARY KEY (tbl, key)) WITHOUT ROWID')
+
+            for table in Data.l_table:
+                d_data = _read_yaml(table)
+                log.debug(f'Adding {len(d_data)} entries from {table}')
+                conn.executemany('INSERT INTO naming VALUES (?, ?, ?)', [ (table, str(key), str(val)) for key, val in d_data.items() ])
+
+            conn.execute('INSERT INTO meta VALUES (?, ?)', ('version', str(Data.version)))
+            conn.execute('INSERT INTO meta VALUES (?, ?)', ('sources', get_sources_hash()))
+        conn.close()
+
+        # mkstemp creates the file readable only by the owner
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+    is_valid.cache_clear()
+    log.info(f'Saved naming index to: {path}')
+
+    return path
+# ---------------------------------
+def _connect(path : str) -> sqlite3.Connection:
+    return sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+# ---------------------------------
+@cache
+def is_valid(path : Union[str,None] = None) -> bool:
+    '''
+    Parameters
+    ------------------
+    path: Path to index, if not passed, will use the one shipped with the project
+
+    Returns
+    ------------------
+    True if the index exists, has the current layout and was built from the current YAML files
+    '''
+    path = get_index_path() if path is None else path
+    if not os.path.isfile(path):
+        log.debug(f'Index not found: {path}')
+        return False
+
+    try:
+        conn   = _connect(path)
+        d_meta = dict(conn.execute('SELECT key, value FROM meta'))
+        conn.close()
+    except sqlite3.DatabaseError as exc:
+        log.warning(f'Cannot read index {path}: {exc}')
+        return False
+
+    if d_meta.get('version') != str(Data.version):
+        log.warning(f'Index version {d_meta.get("version")} differs from {Data.version}, run make_naming_index')
+        return False
+
+    if d_meta.get('sources') != get_sources_hash():
+        log.warning(f'Index {path} is stale, run make_naming_index')
+        return False
+
+    return True
+# ---------------------------------
+def load_table(table : str, path : Union[str,None] = None) -> Union[dict[str,str],None]:
+    '''
+    Parameters
+    ------------------
+    table: Name of the naming table, e.g. evt_form
+    path : Path to index, if not passed, will use the one shipped with the project
+
+    Returns
+    ------------------
+    Dictionary with the contents of the table, None if the index is missing or stale
+    '''
+    if table not in Data.l_table:
+        raise ValueError(f'Table {table} not found among: {Data.l_table}')
+
+    path = get_index_path() if path is None else path
+    with Data.lock:
+        valid = is_valid(path)
+
+    if not valid:
+        return None
+
+    conn   = _connect(path)
+    d_data = dict(conn.execute('SELECT key, value FROM naming WHERE tbl = ?', (table,)))
+    conn.close()
+
+    return d_data
+# ---------------------------------
+def read_table(table : str) -> dict[str,str]:
+    '''
+    Parameters
+    ------------------
+    table: Name of the naming table, e.g. evt_form
+
+    Returns
+    ------------------
+    Dictionary with the contents of the table, taken from the index or, if this one is not usable, from the YAML file
+    '''
+    d_data = load_table(table)
+    if d_data is not None:
+        return d_data
+
+    log.debug(f'Naming index not usable, falling back to: {table}.yaml')
+
+    return _read_yaml(table)
+# ---------------------------------
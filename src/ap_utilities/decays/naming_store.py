@@ -0,0 +1,304 @@
+'''
+Module containing NamingStore class
+
+The naming tables are written into a flat, read-only, binary file, which
+is memory mapped by the processes using it. The operating system keeps a
+single copy of the file in memory, regardless of the number of processes.
+'''
+import os
+import sys
+import mmap
+import json
+import array
+import struct
+import tempfile
+from typing import Union
+
+from ap_utilities.decays            import naming_index as nix
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:naming_store')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    # Bump when the layout of the file changes
+    version = 1
+    magic   = b'APNAMING'
+    # Magic, then size of JSON header, as little endian unsigned 64 bits integer
+    prefix  = struct.Struct('<8sQ')
+    # Arrays are little endian unsigned 32 bits integers, only then they can be read in place
+    native  = sys.byteorder == 'little' and struct.calcsize('I') == 4
+    l_table = [
+            'evt_form',
+            'evt_name',
+            'evt_old_name',
+            'form_evt',
+            'lower_original',
+            'name_evt',
+            'old_name_evt']
+# ---------------------------------
+class NamingStore:
+    '''
+    Class providing the lookups of `NamingTable` from a memory mapped file made with `NamingStore.write`
+
+    The file contains a pool with every string, stored once, and for each table
+    the IDs of its keys, sorted, and of its values. Lookups are binary searches
+    done directly on the mapped memory, nothing is copied into the process.
+
+    Usage:
+
+    path = NamingStore.write()
+    with ProcessPoolExecutor(initializer=aput.attach_store, initargs=(path,)) as executor:
+        ...
+    '''
+    # ---------------------------------
+    def __init__(self, path : str):
+        '''
+        Parameters
+        ------------------
+        path: Path to file made with `NamingStore.write`
+        '''
+        self._path = path
+        with open(path, 'rb') as ifile:
+            self._mmap = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, nheader = Data.prefix.unpack_from(self._mmap, 0)
+        if magic != Data.magic:
+            self._mmap.close()
+            raise ValueError(f'File {path} is not a naming store')
+
+        start    = Data.prefix.size
+        d_header = json.loads(self._mmap[start:start + nheader])
+        if d_header['version'] != Data.version:
+            self._mmap.close()
+            raise ValueError(f'Store {path} has version {d_header["version"]}, expected {Data.version}')
+
+        self._sources = d_header['sources']
+        self._nevent  = d_header['nevent']
+        self._buffer  = memoryview(self._mmap)
+        self._pool    = d_header['pool']
+        self._offset  = self._get_array(d_header['offsets'], d_header['nstring'] + 1)
+        self._d_table = {}
+        for table, (key_start, value_start, size) in d_header['tables'].items():
+            self._d_table[table] = (self._get_array(key_start, size), self._get_array(value_start, size))
+    # ---------------------------------
+    def _get_array(self, start : int, size : int) -> memoryview:
+        if Data.native:
+            return self._buffer[start:start + 4 * size].cast('I')
+
+        # Other machines get a copy, in their byte order
+        arr = array.array('I', struct.unpack_from(f'<{size}I', self._buffer, start))
+
+        return memoryview(arr)
+    # ---------------------------------
+    @staticmethod
+    def write(path : Union[str,None] = None) -> str:
+        '''
+        Parameters
+        ------------------
+        path: Path to file where store will be written, by default a temporary file
+
+        Returns
+        ------------------
+        Path to store, the caller is in charge of removing it when no longer needed
+        '''
+        if path is None:
+            fdesc, path = tempfile.mkstemp(prefix='naming_store_', suffix='.bin')
+            os.close(fdesc)
+
+        d_table = { table : nix.read_table(table) for table in Data.l_table }
+        content = _serialize(d_table, sources=nix.get_sources_hash())
+
+        with open(path, 'wb') as ofile:
+            ofile.write(content)
+
+        log.debug(f'Saved naming store with {len(content)} bytes to: {path}')
+
+        return path
+    # ---------------------------------
+    @classmethod
+    def open(cls, path : str) -> 'NamingStore':
+        '''
+        Parameters
+        ------------------
+        path: Path to file made with `NamingStore.write`
+
+        Returns
+        ------------------
+        Instance of NamingStore reading from that file
+        '''
+        store = cls(path)
+        if store.sources != nix.get_sources_hash():
+            log.warning(f'Store {path} was made from different naming tables')
+
+        return store
+    # ---------------------------------
+    @property
+    def sources(self) -> str:
+        '''
+        Hash of the naming tables the store was made from
+        '''
+        return self._sources
+    # ---------------------------------
+    def close(self) -> None:
+        '''
+        Releases the mapped file
+        '''
+        if self._mmap.closed:
+            return
+
+        self._offset.release()
+        for arr_key, arr_val in self._d_table.values():
+            arr_key.release()
+            arr_val.release()
+
+        self._buffer.release()
+        self._mmap.close()
+    # ---------------------------------
+    def __enter__(self) -> 'NamingStore':
+        return self
+    # ---------------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+    # ---------------------------------
+    def _get_string(self, index : int) -> bytes:
+        start = self._pool + self._offset[index]
+        end   = self._pool + self._offset[index + 1]
+
+        return self._mmap[start:end]
+    # ---------------------------------
+    def _get(self, table : str, key : Union[str,None]) -> Union[str,None]:
+        if key is None:
+            return None
+
+        arr_key, arr_val = self._d_table[table]
+        target = key.encode('utf-8')
+        low    = 0
+        high   = len(arr_key)
+        while low < high:
+            mid = (low + high) // 2
+            if self._get_string(arr_key[mid]) < target:
+                low = mid + 1
+            else:
+                high= mid
+
+        if low == len(arr_key) or self._get_string(arr_key[low]) != target:
+            return None
+
+        return self._get_string(arr_val[low]).decode('utf-8')
+    # ---------------------------------
+    def __len__(self) -> int:
+        return self._nevent
+    # ---------------------------------
+    def __contains__(self, event_type : str) -> bool:
+        return self._get('evt_name', event_type) is not None or self._get('evt_old_name', event_type) is not None
+    # ---------------------------------
+    def get_decay_name(self, event_type : str, formatted : bool = True) -> Union[str,None]:
+        '''
+        See `NamingTable.get_decay_name`
+        '''
+        return self._get('evt_form' if formatted else 'evt_name', event_type)
+    # ---------------------------------
+    def get_event_type(self, nickname : str, formatted : bool = True) -> Union[str,None]:
+        '''
+        See `NamingTable.get_event_type`
+        '''
+        return self._get('form_evt' if formatted else 'name_evt', nickname)
+    # ---------------------------------
+    def get_new_nick(self, old_nick : str) -> Union[str,None]:
+        '''
+        See `NamingTable.get_new_nick`
+        '''
+        return self._get('evt_form', self._get('old_name_evt', old_nick))
+    # ---------------------------------
+    def get_old_nick(self, new_nick : str) -> Union[str,None]:
+        '''
+        See `NamingTable.get_old_nick`
+        '''
+        return self._get('evt_old_name', self._get('form_evt', new_nick))
+    # ---------------------------------
+    def get_event_type_from_old(self, old_nick : str) -> Union[str,None]:
+        '''
+        See `NamingTable.get_event_type_from_old`
+        '''
+        return self._get('old_name_evt', old_nick)
+    # ---------------------------------
+    def get_original(self, lower_case : str) -> Union[str,None]:
+        '''
+        See `NamingTable.get_original`
+        '''
+        return self._get('lower_original', lower_case)
+    # ---------------------------------
+    def get_nicknames(self, kind : str = 'formatted') -> list[str]:
+        '''
+        See `NamingTable.get_nicknames`
+        '''
+        d_table = {
+                'formatted' : 'form_evt',
+                'raw'       : 'name_evt',
+                'old'       : 'old_name_evt',
+                'lower'     : 'lower_original',
+                }
+
+        if kind not in d_table:
+            raise ValueError(f'Invalid kind of nickname {kind}, expected one of: {list(d_table)}')
+
+        arr_key, _ = self._d_table[d_table[kind]]
+
+        return [ self._get_string(index).decode('utf-8') for index in arr_key ]
+# ---------------------------------
+def _serialize(d_table : dict[str,dict[str,str]], sources : str) -> bytes:
+    '''
+    Takes dictionary between table name and contents, and hash of sources
+    Returns content of store
+    '''
+    d_string : dict[bytes,int] = {}
+    def _get_id(value : str) -> int:
+        return d_string.setdefault(value.encode('utf-8'), len(d_string))
+
+    d_ids = {}
+    for table, d_data in d_table.items():
+        l_pair = sorted((key.encode('utf-8'), _get_id(key), _get_id(val)) for key, val in d_data.items())
+        d_ids[table] = ([ key_id for _, key_id, _ in l_pair ], [ val_id for _, _, val_id in l_pair ])
+
+    # Event types with Run1/2 nickname need not have a Run3 one
+    nevent   = len(set(d_table['evt_name']) | set(d_table['old_name_evt'].values()))
+    pool     = b''.join(d_string)
+    l_offset = [0]
+    for string in d_string:
+        l_offset.append(l_offset[-1] + len(string))
+
+    # Arrays of 32 bits integers go first, then the pool of strings
+    l_array  = [l_offset]
+    for l_key, l_val in d_ids.values():
+        l_array += [l_key, l_val]
+
+    nheader  = 4096
+    l_start  = []
+    start    = Data.prefix.size + nheader
+    for arr in l_array:
+        l_start.append(start)
+        start += 4 * len(arr)
+
+    d_header = {
+            'version' : Data.version,
+            'sources' : sources,
+            'nevent'  : nevent,
+            'nstring' : len(d_string),
+            'offsets' : l_start[0],
+            'pool'    : start,
+            'tables'  : { table : [l_start[1 + 2 * i_table], l_start[2 + 2 * i_table], len(d_ids[table][0])] for i_table, table in enumerate(d_ids) },
+            }
+
+    header = json.dumps(d_header).encode('utf-8')
+    if len(header) > nheader:
+        raise ValueError(f'Header of store has {len(header)} bytes, more than {nheader}')
+
+    l_part = [Data.prefix.pack(Data.magic, len(header)), header.ljust(nheader, b' ')]
+    l_part+= [ struct.pack(f'<{len(arr)}I', *arr) for arr in l_array ]
+    l_part.append(pool)
+
+    return b''.join(l_part)
+# ---------------------------------
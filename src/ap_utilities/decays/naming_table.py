@@ -0,0 +1,221 @@
+'''
+Module containing NamingTable class
+'''
+import sys
+from typing import Union
+
+from ap_utilities.decays            import naming_index as nix
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:naming_table')
+# ---------------------------------
+class NamingTable:
+    '''
+    Class holding the mappings between event types and nicknames from all the naming tables.
+
+    Each event type and nickname is stored once, in columns indexed by an integer ID,
+    every direction of lookup is a single dictionary probe followed by a column access.
+    '''
+    # ---------------------------------
+    def __init__(self, d_table : dict[str, dict[str,str]]):
+        '''
+        Parameters
+        ------------------
+        d_table: Dictionary between name of naming table, e.g. evt_form, and its contents
+        '''
+        d_evt_name = d_table['evt_name'    ]
+        d_evt_form = d_table['evt_form'    ]
+        d_evt_old  = d_table['evt_old_name']
+        d_old_evt  = d_table['old_name_evt']
+
+        # Event types with Run1/2 nickname need not have a Run3 one
+        l_evt      = list(d_evt_name) + [ evt for evt in d_old_evt.values() if evt not in d_evt_name ]
+        l_evt      = list(dict.fromkeys(l_evt))
+
+        self._l_evt  : list[str]                 = [ sys.intern(evt) for evt in l_evt ]
+        self._l_name : list[Union[str,None]]     = [ _intern(d_evt_name.get(evt)) for evt in self._l_evt ]
+        self._l_form : list[Union[str,None]]     = [ _intern(d_evt_form.get(evt)) for evt in self._l_evt ]
+        self._l_old  : list[Union[str,None]]     = [ _intern(d_evt_old.get(evt))  for evt in self._l_evt ]
+
+        # The same integer objects are shared by all the indices
+        l_id         = list(range(len(self._l_evt)))
+        self._d_evt  = dict(zip(self._l_evt, l_id))
+        self._d_name = self._get_index(d_table['name_evt'    ], l_id)
+        self._d_form = self._get_index(d_table['form_evt'    ], l_id)
+        self._d_old  = self._get_index(d_old_evt             , l_id)
+
+        self._d_lower      : dict[str,int] = {}
+        self._d_lower_data : dict[str,str] = {}
+        self._fill_lower(d_table['lower_original'], l_id)
+    # ---------------------------------
+    @classmethod
+    def load(cls) -> 'NamingTable':
+        '''
+        Returns
+        ------------------
+        Instance of NamingTable built from the tables shipped with the project
+        '''
+        l_table = ['evt_name', 'evt_form', 'evt_old_name', 'old_name_evt', 'name_evt', 'form_evt', 'lower_original']
+        d_table = { table : nix.read_table(table) for table in l_table }
+
+        return cls(d_table)
+    # ---------------------------------
+    def _get_index(self, d_key_evt : dict[str,str], l_id : list[int]) -> dict[str,int]:
+        d_index = {}
+        for key, evt in d_key_evt.items():
+            if evt not in self._d_evt:
+                log.warning(f'Event type {evt} for {key} not found, skipping')
+                continue
+
+            d_index[sys.intern(key)] = l_id[self._d_evt[evt]]
+
+        return d_index
+    # ---------------------------------
+    def _fill_lower(self, d_lower : dict[str,str], l_id : list[int]) -> None:
+        '''
+        Lower case names of MC samples point to rows of the table,
+        the rest, e.g. data samples, are kept as strings
+        '''
+        for lower, original in d_lower.items():
+            if original in self._d_form:
+                self._d_lower[lower] = l_id[self._d_form[original]]
+            else:
+                self._d_lower_data[lower] = original
+    # ---------------------------------
+    def __len__(self) -> int:
+        return len(self._l_evt)
+    # ---------------------------------
+    def __contains__(self, event_type : str) -> bool:
+        return event_type in self._d_evt
+    # ---------------------------------
+    def get_decay_name(self, event_type : str, formatted : bool = True) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        event_type: Event type, e.g. 12153001
+        formatted : If True will return formatted nickname, e.g. no spaces
+
+        Returns
+        ------------------
+        Nickname, None if not found
+        '''
+        index = self._d_evt.get(event_type)
+        if index is None:
+            return None
+
+        return self._l_form[index] if formatted else self._l_name[index]
+    # ---------------------------------
+    def get_event_type(self, nickname : str, formatted : bool = True) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        nickname : Nickname of sample
+        formatted: If True, nickname is expected to be formatted
+
+        Returns
+        ------------------
+        Event type, None if not found
+        '''
+        d_index = self._d_form if formatted else self._d_name
+        index   = d_index.get(nickname)
+        if index is None:
+            return None
+
+        return self._l_evt[index]
+    # ---------------------------------
+    def get_new_nick(self, old_nick : str) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        old_nick: Nickname used in Run1/2
+
+        Returns
+        ------------------
+        Formatted nickname used in Run3, None if not found
+        '''
+        index = self._d_old.get(old_nick)
+        if index is None:
+            return None
+
+        return self._l_form[index]
+    # ---------------------------------
+    def get_old_nick(self, new_nick : str) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        new_nick: Formatted nickname used in Run3
+
+        Returns
+        ------------------
+        Nickname used in Run1/2, None if not found
+        '''
+        index = self._d_form.get(new_nick)
+        if index is None:
+            return None
+
+        return self._l_old[index]
+    # ---------------------------------
+    def get_event_type_from_old(self, old_nick : str) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        old_nick: Nickname used in Run1/2
+
+        Returns
+        ------------------
+        Event type, None if not found
+        '''
+        index = self._d_old.get(old_nick)
+        if index is None:
+            return None
+
+        return self._l_evt[index]
+    # ---------------------------------
+    def get_original(self, lower_case : str) -> Union[str,None]:
+        '''
+        Parameters
+        ------------------
+        lower_case: Lower case version of formatted nickname
+
+        Returns
+        ------------------
+        Formatted nickname, None if not found
+        '''
+        index = self._d_lower.get(lower_case)
+        if index is None:
+            return self._d_lower_data.get(lower_case)
+
+        return self._l_form[index]
+    # ---------------------------------
+    def get_nicknames(self, kind : str = 'formatted') -> list[str]:
+        '''
+        Parameters
+        ------------------
+        kind: Type of nickname, one of formatted, raw, old or lower, the last one being the lower case formatted nicknames
+
+        Returns
+        ------------------
+        List of nicknames of that type
+        '''
+        d_index = {
+                'formatted' : self._d_form,
+                'raw'       : self._d_name,
+                'old'       : self._d_old,
+                'lower'     : self._d_lower,
+                }
+
+        if kind not in d_index:
+            raise ValueError(f'Invalid kind of nickname {kind}, expected one of: {list(d_index)}')
+
+        l_nick = list(d_index[kind])
+        if kind == 'lower':
+            l_nick += list(self._d_lower_data)
+
+        return l_nick
+# ---------------------------------
+def _intern(value : Union[str,None]) -> Union[str,None]:
+    if value is None:
+        return None
+
+    return sys.intern(value)
+# ---------------------------------
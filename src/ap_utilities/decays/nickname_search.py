@@ -0,0 +1,204 @@
+'''
+Module containing NicknameSearch class, used to find nicknames by prefix
+or by similarity, e.g. to suggest the right name after a typo
+'''
+from __future__ import annotations
+
+import bisect
+from typing import Iterable
+
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
+
+numpy = lazy_import('numpy')
+log   = LogStore.add_logger('ap_utilities:nickname_search')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    # Length of substrings used to find candidates
+    ngram      = 3
+    # Number of candidates, per requested suggestion, whose edit distance is calculated
+    ncandidate = 2
+    # Character that cannot appear in nicknames, used to pad them
+    padding    = '\x00'
+# ---------------------------------
+class NicknameSearch:
+    '''
+    Class used to search among nicknames
+
+    Prefix searches use binary search over the sorted names. Similarity
+    searches use an inverted index between n-grams of the lower case names,
+    to pick the candidates sharing the most n-grams with the query, these are
+    then ranked by edit distance.
+    '''
+    # ---------------------------------
+    def __init__(self, names : Iterable[str]):
+        '''
+        Parameters
+        ------------------
+        names: Nicknames to search among
+        '''
+        self._l_name   = sorted(set(names))
+        self._l_lower  = [ name.lower() for name in self._l_name ]
+        self._arr_ngram= numpy.array([ len(_get_ngrams(name)) for name in self._l_lower ], dtype=numpy.int32)
+        self._d_posting= self._get_postings()
+    # ---------------------------------
+    def _get_postings(self) -> dict[str,numpy.ndarray]:
+        d_posting : dict[str,list[int]] = {}
+        for index, name in enumerate(self._l_lower):
+            for ngram in _get_ngrams(name):
+                d_posting.setdefault(ngram, []).append(index)
+
+        log.debug(f'Indexed {len(d_posting)} n-grams from {len(self._l_name)} names')
+
+        return { ngram : numpy.array(l_index, dtype=numpy.int32) for ngram, l_index in d_posting.items() }
+    # ---------------------------------
+    def __len__(self) -> int:
+        return len(self._l_name)
+    # ---------------------------------
+    def __contains__(self, name : str) -> bool:
+        index = bisect.bisect_left(self._l_name, name)
+
+        return index < len(self._l_name) and self._l_name[index] == name
+    # ---------------------------------
+    def prefix(self, text : str, limit : int = 10) -> list[str]:
+        '''
+        Parameters
+        ------------------
+        text : Beginning of nickname
+        limit: Maximum number of names returned
+
+        Returns
+        ------------------
+        Sorted list of names starting with `text`
+        '''
+        low    = bisect.bisect_left(self._l_name, text)
+        l_name = []
+        for name in self._l_name[low:low + limit]:
+            if not name.startswith(text):
+                break
+
+            l_name.append(name)
+
+        return l_name
+    # ---------------------------------
+    def _get_candidates(self, text : str, nbest : int) -> tuple[numpy.ndarray, numpy.ndarray]:
+        '''
+        Returns indices of names sharing most n-grams with text, best first, and number of shared n-grams
+        '''
+        l_posting = [ self._d_posting[ngram] for ngram in _get_ngrams(text) if ngram in self._d_posting ]
+        if not l_posting:
+            return numpy.array([], dtype=int), numpy.array([], dtype=int)
+
+        arr_common = numpy.bincount(numpy.concatenate(l_posting), minlength=len(self._l_name))
+        # Dice coefficient between the n-grams of the query and of each name
+        arr_score  = arr_common / (self._arr_ngram + len(_get_ngrams(text)))
+
+        nbest      = min(nbest, len(self._l_name))
+        arr_index  = numpy.argpartition(-arr_score, nbest - 1)[:nbest]
+        arr_index  = arr_index[numpy.argsort(-arr_score[arr_index], kind='stable')]
+        arr_index  = arr_index[arr_common[arr_index] > 0]
+
+        return arr_index, arr_common[arr_index]
+    # ---------------------------------
+    def suggest(self, text : str, k : int = 5, max_distance : int = 10) -> list[str]:
+        '''
+        Parameters
+        ------------------
+        text        : Nickname, possibly with typos, case is ignored
+        k           : Maximum number of suggestions
+        max_distance: Names further than this edit distance from `text` are not suggested
+
+        Returns
+        ------------------
+        List of names closest to `text`, closest first
+        '''
+        if k <= 0:
+            return []
+
+        text       = text.lower()
+        nngram     = len(_get_ngrams(text))
+        d_peq      = _get_pattern(text)
+        arr_index, arr_common = self._get_candidates(text, nbest=k * Data.ncandidate)
+
+        l_distance = []
+        for index, common in zip(arr_index.tolist(), arr_common.tolist()):
+            name  = self._l_lower[index]
+            # Each edit changes at most `ngram` n-grams, which bounds the distance from below
+            bound = max(abs(len(name) - len(text)), -(-(max(nngram, self._arr_ngram[index]) - common) // Data.ngram))
+            limit = l_distance[k - 1][0] if len(l_distance) >= k else max_distance
+            if bound > limit:
+                continue
+
+            distance = _edit_distance(d_peq, len(text), name)
+            if distance > limit:
+                continue
+
+            l_distance.append((distance, self._l_name[index]))
+            l_distance.sort()
+
+        return [ name for _, name in l_distance[:k] ]
+# ---------------------------------
+def _get_ngrams(text : str) -> set[str]:
+    # Padding makes the beginning and end of names count
+    text = Data.padding * (Data.ngram - 1) + text + Data.padding * (Data.ngram - 1)
+
+    return { text[i_char:i_char + Data.ngram] for i_char in range(len(text) - Data.ngram + 1) }
+# ---------------------------------
+def edit_distance(first : str, second : str) -> int:
+    '''
+    Parameters
+    ------------------
+    first : String
+    second: String
+
+    Returns
+    ------------------
+    Levenshtein distance between the strings, i.e. number of insertions, deletions and substitutions
+    needed to go from one to the other.
+    '''
+    return _edit_distance(_get_pattern(first), len(first), second)
+# ---------------------------------
+def _get_pattern(text : str) -> dict[str,int]:
+    '''
+    Returns dictionary between character and bit vector with the positions where it appears in text
+    '''
+    d_peq : dict[str,int] = {}
+    for index, char in enumerate(text):
+        d_peq[char] = d_peq.get(char, 0) | (1 << index)
+
+    return d_peq
+# ---------------------------------
+def _edit_distance(d_peq : dict[str,int], nchar : int, text : str) -> int:
+    '''
+    Bit parallel algorithm of Myers, with one Python integer as bit vector,
+    d_peq is made with `_get_pattern` from a string with `nchar` characters
+    '''
+    if nchar == 0:
+        return len(text)
+
+    last  = 1 << (nchar - 1)
+    full  = (1 << nchar) - 1
+    pos   = full
+    neg   = 0
+    score = nchar
+    for char in text:
+        eq    = d_peq.get(char, 0)
+        xv    = eq | neg
+        xh    = (((eq & pos) + pos) ^ pos) | eq
+        ph    = (neg | ~(xh | pos)) & full
+        mh    = pos & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+
+        ph    = ((ph << 1) | 1) & full
+        mh    = (mh << 1) & full
+        pos   = (mh | ~(xv | ph)) & full
+        neg   = ph & xv
+
+    return score
+# ---------------------------------
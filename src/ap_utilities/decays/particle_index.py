@@ -0,0 +1,258 @@
+'''
+Module containing ParticleIndex class
+'''
+import re
+import json
+from typing    import Union, Iterable
+from functools import lru_cache
+
+import numpy
+
+from ap_utilities.decays            import descriptors  as dsc
+from ap_utilities.decays            import naming_index as nix
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:particle_index')
+# ---------------------------------
+class Data:
+    '''
+    Class storing attributes shared
+    '''
+    # Bump when the normalization of particles or the layout of the saved index changes
+    version   = 1
+    # Parenthesized masses attached to a particle name, e.g. rho(770)+
+    # the ones in dsc.Data.d_repl_par are already protected by dsc.reformat_decay
+    mass_rgx  = r'(?<=[A-Za-z*\'])\((\d+)\)'
+    back_rgx  = r'(?<=[A-Za-z*\'])_(\d+)_'
+    split_rgx = r'==>|=>|[,{}^|]'
+    s_skip    = {'nos', 'os', 'CC', 'cc', 'pp', 'jet'}
+# ---------------------------------
+class ParticleIndex:
+    '''
+    Class holding an inverted index between particles and the event types
+    whose decay descriptor, from `evt_dec.yaml`, contains them.
+
+    Each particle maps to a bitmap, stored as a Python integer, where bit `i`
+    is set if the i-th event type contains the particle. Queries are then
+    bitwise operations.
+    '''
+    # ---------------------------------
+    def __init__(self, l_event_type : list[str], d_posting : dict[str,int], sources : str = ''):
+        '''
+        Parameters
+        ------------------
+        l_event_type: List of event types, the position in the list is the bit in the bitmaps
+        d_posting   : Dictionary between normalized particle name and bitmap of event types
+        sources     : Hash of the naming tables the index was built from
+        '''
+        self._l_event_type = l_event_type
+        self._arr_evt_type = numpy.array(l_event_type, dtype=str)
+        self._d_posting    = d_posting
+        self._sources      = sources
+        self._full         = (1 << len(l_event_type)) - 1
+    # ---------------------------------
+    @classmethod
+    def build(cls, d_decay : Union[dict[str,str],None] = None) -> 'ParticleIndex':
+        '''
+        Parameters
+        ------------------
+        d_decay: Dictionary between event type and decay descriptor, by default the contents of `evt_dec.yaml`
+
+        Returns
+        ------------------
+        Instance of ParticleIndex
+        '''
+        sources = ''
+        if d_decay is None:
+            d_decay = nix.read_table('evt_dec')
+            sources = nix.get_sources_hash()
+
+        l_event_type = list(d_decay)
+        d_posting    = {}
+        for i_evt, event_type in enumerate(l_event_type):
+            bit = 1 << i_evt
+            for particle in particles_from_decay(d_decay[event_type], event_type):
+                d_posting[particle] = d_posting.get(particle, 0) | bit
+
+        nevt = len(l_event_type)
+        npar = len(d_posting)
+        log.debug(f'Indexed {npar} particles in {nevt} decays')
+
+        return cls(l_event_type, d_posting, sources=sources)
+    # ---------------------------------
+    @classmethod
+    def load(cls, path : str) -> Union['ParticleIndex',None]:
+        '''
+        Parameters
+        ------------------
+        path: Path to JSON file made with `save`
+
+        Returns
+        ------------------
+        Instance of ParticleIndex, None if the file was made with a different version or from different naming tables
+        '''
+        with open(path, encoding='utf-8') as ifile:
+            d_data = json.load(ifile)
+
+        if d_data['version'] != Data.version:
+            log.warning(f'Index in {path} has version {d_data["version"]}, expected {Data.version}')
+            return None
+
+        if d_data['sources'] != nix.get_sources_hash():
+            log.warning(f'Index in {path} is stale')
+            return None
+
+        d_posting = { particle : int(bitmap, 16) for particle, bitmap in d_data['postings'].items() }
+
+        return cls(d_data['event_types'], d_posting, sources=d_data['sources'])
+    # ---------------------------------
+    def save(self, path : str) -> None:
+        '''
+        Parameters
+        ------------------
+        path: Path to JSON file where index will be saved
+        '''
+        d_data = {
+                'version'     : Data.version,
+                'sources'     : self._sources,
+                'event_types' : self._l_event_type,
+                'postings'    : { particle : f'{bitmap:x}' for particle, bitmap in self._d_posting.items() },
+                }
+
+        log.debug(f'Saving index to: {path}')
+        with open(path, 'w', encoding='utf-8') as ofile:
+            json.dump(d_data, ofile)
+    # ---------------------------------
+    @property
+    def particles(self) -> list[str]:
+        '''
+        Sorted list of particle names in the index
+        '''
+        return sorted(self._d_posting)
+    # ---------------------------------
+    def __len__(self) -> int:
+        return len(self._l_event_type)
+    # ---------------------------------
+    def _get_bitmap(self, particle : str) -> int:
+        name = normalize_particle(particle)
+        if name not in self._d_posting:
+            log.debug(f'Particle {particle}, normalized to {name}, not found')
+            return 0
+
+        return self._d_posting[name]
+    # ---------------------------------
+    def _get_mask(
+            self,
+            all_of  : Iterable[str],
+            any_of  : Iterable[str],
+            none_of : Iterable[str]) -> int:
+        mask = self._full
+        for particle in all_of:
+            mask &= self._get_bitmap(particle)
+
+        l_any = list(any_of)
+        if l_any:
+            bitmap = 0
+            for particle in l_any:
+                bitmap |= self._get_bitmap(particle)
+
+            mask &= bitmap
+
+        for particle in none_of:
+            mask &= ~self._get_bitmap(particle)
+
+        return mask
+    # ---------------------------------
+    def _bits_from_mask(self, mask : int) -> numpy.ndarray:
+        nbyte  = (len(self._l_event_type) + 7) // 8
+        arr_u8 = numpy.frombuffer(mask.to_bytes(nbyte, 'little'), dtype=numpy.uint8)
+        arr_bit= numpy.unpackbits(arr_u8, bitorder='little')
+
+        return numpy.flatnonzero(arr_bit)
+    # ---------------------------------
+    def count(
+            self,
+            all_of  : Iterable[str] = (),
+            any_of  : Iterable[str] = (),
+            none_of : Iterable[str] = ()) -> int:
+        '''
+        Returns number of event types matching query, see `query`
+        '''
+        mask = self._get_mask(all_of, any_of, none_of)
+
+        return bin(mask).count('1')
+    # ---------------------------------
+    def query(
+            self,
+            all_of  : Iterable[str] = (),
+            any_of  : Iterable[str] = (),
+            none_of : Iterable[str] = ()) -> list[str]:
+        '''
+        Parameters
+        ------------------
+        all_of : Particles that must all be in the decay, e.g. ['e+', 'e-', 'K*0']
+        any_of : At least one of these particles must be in the decay
+        none_of: None of these particles can be in the decay
+
+        Particles are normalized the same way as the decays, e.g. K*0 -> K*(892)0, anti-D0 -> D~0
+        Charge conjugated decays, i.e. with `cc`, are indexed with the particles as written
+
+        Returns
+        ------------------
+        List of event types matching query, in the order of `evt_dec.yaml`
+        '''
+        mask = self._get_mask(all_of, any_of, none_of)
+
+        arr_index = self._bits_from_mask(mask)
+
+        return self._arr_evt_type[arr_index].tolist()
+# ---------------------------------
+def _clean_particles(l_particle : list[str]) -> list[str]:
+    l_clean = []
+    for particle in l_particle:
+        for part in re.split(Data.split_rgx, particle):
+            part = re.sub(Data.back_rgx, r'(\1)', part)
+            if not part[:1].isalpha() or part in Data.s_skip:
+                continue
+
+            l_clean.append(part)
+
+    return l_clean
+# ---------------------------------
+def particles_from_decay(decay : str, event_type : str = '') -> set[str]:
+    '''
+    Parameters
+    ------------------
+    decay     : Decay descriptor as in DecFiles
+    event_type: Event type, used by the normalization of some decays
+
+    Returns
+    ------------------
+    Set of normalized particle names in the decay, using the normalization of `make_fields`
+    '''
+    decay  = dsc.fix_names(decay, event_type, verbose=False)
+    decay  = re.sub(Data.mass_rgx, r'_\1_', decay)
+    decay  = dsc.reformat_decay(decay)
+    l_part = dsc.particles_from_decay(decay)
+
+    return set(_clean_particles(l_part))
+# ---------------------------------
+@lru_cache(maxsize=1024)
+def normalize_particle(particle : str) -> str:
+    '''
+    Parameters
+    ------------------
+    particle: Particle name, e.g. K*0
+
+    Returns
+    ------------------
+    Name of particle as stored in the index, e.g. K*(892)0
+    '''
+    s_part = particles_from_decay(particle)
+    if len(s_part) != 1:
+        raise ValueError(f'Cannot normalize {particle} into a single particle, found: {s_part}')
+
+    [name] = s_part
+
+    return name
+# ---------------------------------
@@ -1,11 +1,20 @@
 '''
 Module containing utility functions
 '''
-from typing              import Union
-from functools           import cache
-from importlib.resources import files
+from __future__ import annotations
 
-import yaml
+import threading
+from typing              import Union, Iterable
+from functools           import lru_cache
+
+from ap_utilities.generic.lazy           import lazy_import
+from ap_utilities.decays.naming_table    import NamingTable
+from ap_utilities.decays.naming_store    import NamingStore
+from ap_utilities.decays.nickname_search import NicknameSearch
+from ap_utilities.logging.log_store      import LogStore
+
+numpy = lazy_import('numpy')
+log   = LogStore.add_logger('ap_utilities:decays_utilities')
 
 # ---------------------------------
 class Data:
@@ -15,13 +24,31 @@ class Data:
 
     d_form_long : dict[str,str]
     d_form_short: dict[str,str]
-
+    # Rules of both dictionaries, in the order in which they are applied
+    t_form_rule : tuple[tuple[str,str], ...]
+
+    # Maximum number of formatted nicknames kept in memory
+    form_cache_size= 2 ** 15
+    # Number of similar names suggested when a nickname is not found
+    nsuggestion    = 3
+    l_missing      = ['raise', 'sentinel', 'mask']
     is_initialized = False
+
+    # Loaded on first use, the lock makes sure that this happens once
+    # when the first use is concurrent, e.g. from BkkChecker threads
+    lock           = threading.RLock()
+    table          : Union[NamingTable,NamingStore,None] = None
+    d_search       : dict[str,NicknameSearch] = {}
 # ---------------------------------
 def _initialize():
     if Data.is_initialized:
         return
 
+    with Data.lock:
+        if not Data.is_initialized:
+            _set_format_rules()
+# ---------------------------------
+def _set_format_rules():
     d_form_short                        = {}
     d_form_short[                  '.'] =      'p'
     d_form_short[                  '-'] =     'mn'
@@ -41,6 +68,7 @@ def _initialize():
 
     Data.d_form_long = d_form_long
     Data.d_form_short= d_form_short
+    Data.t_form_rule = tuple(d_form_long.items()) + tuple(d_form_short.items())
 
     Data.is_initialized = True
 # ---------------------------------
@@ -50,14 +78,96 @@ def _apply_format(d_format : dict[str,str], name : str) -> str:
 
     return name
 # ---------------------------------
-@cache
-def _load_data(file_name : str) -> dict:
-    file_path = files('ap_utilities_data').joinpath(f'naming/{file_name}')
-    file_path = str(file_path)
-    with open(file_path, encoding='utf-8') as ifile:
-        d_data = yaml.safe_load(ifile)
+def _get_table() -> Union[NamingTable,NamingStore]:
+    table = Data.table
+    if table is not None:
+        return table
+
+    with Data.lock:
+        if Data.table is None:
+            log.debug('Loading naming table')
+            Data.table = NamingTable.load()
+
+        return Data.table
+# ---------------------------------
+def _get_search(kind : str) -> NicknameSearch:
+    search = Data.d_search.get(kind)
+    if search is not None:
+        return search
+
+    with Data.lock:
+        if kind not in Data.d_search:
+            l_nick = _get_table().get_nicknames(kind=kind)
+            Data.d_search[kind] = NicknameSearch(l_nick)
+
+        return Data.d_search[kind]
+# ---------------------------------
+def attach_store(path : str) -> None:
+    '''
+    Makes the lookups of this module read from a store made with `NamingStore.write`,
+    instead of loading the naming tables. Meant to be used as initializer of process pools, e.g.:
+
+    path = NamingStore.write()
+    with ProcessPoolExecutor(initializer=aput.attach_store, initargs=(path,)) as executor:
+        ...
+
+    Parameters
+    ------------------
+    path: Path to store
+    '''
+    with Data.lock:
+        Data.table = NamingStore.open(path)
+        Data.d_search.clear()
+# ---------------------------------
+def preload(background : bool = False, search : bool = False) -> Union[threading.Thread,None]:
+    '''
+    Loads naming tables and formatting rules, such that the first lookup does not pay for it
+
+    Parameters
+    ------------------
+    background: If True, will load them in a daemon thread, lookups made meanwhile wait for it
+    search    : If True, will also build the indices used to suggest nicknames
+
+    Returns
+    ------------------
+    Thread doing the loading if `background` is True, otherwise None
+    '''
+    def _load() -> None:
+        _initialize()
+        _get_table()
+        if search:
+            for kind in ['formatted', 'old', 'lower']:
+                _get_search(kind)
+
+    if not background:
+        _load()
+        return None
+
+    thread = threading.Thread(target=_load, name='naming_preload', daemon=True)
+    thread.start()
+
+    return thread
+# ---------------------------------
+def suggest_nicknames(nickname : str, kind : str = 'formatted', k : int = 5) -> list[str]:
+    '''
+    Parameters
+    ------------------
+    nickname: Nickname, possibly with typos
+    kind    : Type of nicknames to search among, formatted, raw, old or lower
+    k       : Maximum number of suggestions
+
+    Returns
+    ------------------
+    List with up to `k` nicknames closest to `nickname`, closest first
+    '''
+    return _get_search(kind).suggest(nickname, k=k)
+# ---------------------------------
+def _did_you_mean(nickname : str, kind : str) -> str:
+    l_nick = suggest_nicknames(nickname, kind=kind, k=Data.nsuggestion)
+    if not l_nick:
+        return ''
 
-    return d_data
+    return f', did you mean: {", ".join(l_nick)}'
 # ---------------------------------
 def format_nickname(nickname : str) -> str:
     '''
@@ -67,12 +177,17 @@ def format_nickname(nickname : str) -> str:
     '''
     _initialize()
 
-    nickname = _apply_format(Data.d_form_long , nickname)
-    nickname = _apply_format(Data.d_form_short, nickname)
+    return _format_nickname(nickname)
+# ---------------------------------
+@lru_cache(maxsize=Data.form_cache_size)
+def _format_nickname(nickname : str) -> str:
+    # Each str.replace is a pass in C, for these short strings this is
+    # faster than a single pass with a combined regex and a Python callback
+    for org, new in Data.t_form_rule:
+        nickname = nickname.replace(org, new)
 
     return nickname
 # ---------------------------------
-# ---------------------------------
 def read_decay_name(
         event_type : Union[str,int],
         formatted  : bool = True) -> str:
@@ -89,17 +204,10 @@ def read_decay_name(
     if isinstance(event_type, int):
         event_type = str(event_type)
 
-    _initialize()
-
-    yaml_path  = 'evt_form.yaml' if formatted else 'evt_name.yaml'
-
-    d_evt_name = _load_data(yaml_path)
-
-    if event_type not in d_evt_name:
+    value = _get_table().get_decay_name(event_type, formatted=formatted)
+    if value is None:
         raise ValueError(f'Event type {event_type} not found')
 
-    value = d_evt_name[event_type]
-
     return value
 # ---------------------------------
 def read_event_type(nickname : str) -> str:
@@ -107,19 +215,14 @@ def read_event_type(nickname : str) -> str:
     Takes nickname after reformatting, i.e. replacement of commans, equals, etc.
     Returns corresponding event type 
     '''
-    _initialize()
-
-    d_name_evt = _load_data('form_evt.yaml')
-
     is_ss = False
     if nickname.endswith('_SS'):
         nickname = nickname[:-3]
         is_ss    = True
 
-    if nickname not in d_name_evt:
-        raise ValueError(f'Event type {nickname} not found')
-
-    value = d_name_evt[nickname]
+    value = _get_table().get_event_type(nickname)
+    if value is None:
+        raise ValueError(f'Event type {nickname} not found{_did_you_mean(nickname, "formatted")}')
 
     if is_ss:
         value = f'{value}_SS'
@@ -131,51 +234,38 @@ def new_from_old_nick(nickname : str) -> str:
     Function that takes a decay nick name using Run1/2 naming
     and returns nicknames using Run3 naming
     '''
-    _initialize()
-
-    d_old_evt = _load_data('old_name_evt.yaml')
-    if nickname not in d_old_evt:
-        raise ValueError(f'Old nickname {nickname} not found in: old_name_evt.yaml')
-
-    evt_type   = d_old_evt[nickname]
-
-    d_evt_name = _load_data('evt_form.yaml')
-    if evt_type not in d_evt_name:
-        raise ValueError(f'Event type {evt_type} not found in: evt_name.yaml')
+    table    = _get_table()
+    new_nick = table.get_new_nick(nickname)
+    if new_nick is not None:
+        return new_nick
 
-    new_nick   = d_evt_name[evt_type]
+    evt_type = table.get_event_type_from_old(nickname)
+    if evt_type is None:
+        raise ValueError(f'Old nickname {nickname} not found in: old_name_evt.yaml{_did_you_mean(nickname, "old")}')
 
-    return new_nick
+    raise ValueError(f'Event type {evt_type} not found in: evt_name.yaml')
 # ---------------------------------
 def old_from_new_nick(nickname : str) -> str:
     '''
     Function that takes a decay nick name using Run3 naming
     and returns nicknames using Run1/2 naming
     '''
-    _initialize()
-
-    d_name_evt = _load_data('form_evt.yaml')
-    if nickname not in d_name_evt:
-        raise ValueError(f'Nickname {nickname} not found in: name_evt.yaml')
-
-    evt_type   = d_name_evt[nickname]
+    table    = _get_table()
+    old_nick = table.get_old_nick(nickname)
+    if old_nick is not None:
+        return old_nick
 
-    d_evt_old  = _load_data('evt_old_name.yaml')
-    if evt_type not in d_evt_old:
-        raise ValueError(f'Event type {evt_type} not found in: evt_old_name.yaml')
+    evt_type = table.get_event_type(nickname)
+    if evt_type is None:
+        raise ValueError(f'Nickname {nickname} not found in: name_evt.yaml{_did_you_mean(nickname, "formatted")}')
 
-    old_nick   = d_evt_old[evt_type]
-
-    return old_nick
+    raise ValueError(f'Event type {evt_type} not found in: evt_old_name.yaml')
 # ---------------------------------
 def name_from_lower_case(lower_case : str) -> str:
     '''
     Using new naming, but all lower case, will return
     original naming. Needed to deal with way AP names samples.
     '''
-    _initialize()
-
-    d_data  = _load_data('lower_original.yaml')
     org_arg = lower_case
 
     if   lower_case.endswith('gev'):
@@ -187,12 +277,95 @@ def name_from_lower_case(lower_case : str) -> str:
     else:
         pass
 
-    if lower_case not in d_data:
-        raise ValueError(f'Sample {lower_case} not found in: lower_original.yaml')
+    name = _get_table().get_original(lower_case)
+    if name is None:
+        raise ValueError(f'Sample {lower_case} not found in: lower_original.yaml{_did_you_mean(lower_case, "lower")}')
 
-    name = d_data[lower_case]
     if org_arg.endswith('_ss'):
         name = f'{name}_SS'
 
     return name
 # ---------------------------------
+def _lookup_many(
+        l_value  : list[Union[str,None]],
+        l_key    : list[str],
+        missing  : str,
+        sentinel : str,
+        kind     : str) -> Union[numpy.ndarray, tuple[numpy.ndarray, numpy.ndarray, list[str]]]:
+    '''
+    Takes the results of looking up each key, None when missing
+    Returns them as an array, after applying policy for missing values
+    '''
+    if missing not in Data.l_missing:
+        raise ValueError(f'Invalid missing value policy {missing}, expected one of: {Data.l_missing}')
+
+    arr_found = numpy.array([ value is not None for value in l_value ], dtype=bool)
+    l_error   = [ f'{kind} {key} not found' for key, found in zip(l_key, arr_found) if not found ]
+
+    if missing == 'raise' and l_error:
+        nerror = len(l_error)
+        text   = '\n'.join(l_error)
+        raise ValueError(f'Found {nerror} missing entries:\n{text}')
+
+    l_value   = [ sentinel if value is None else value for value in l_value ]
+    arr_value = numpy.array(l_value, dtype=str)
+
+    if missing == 'mask':
+        return arr_value, arr_found, l_error
+
+    return arr_value
+# ---------------------------------
+def read_decay_names(
+        event_types : Iterable[Union[str,int]],
+        formatted   : bool = True,
+        missing     : str  = 'raise',
+        sentinel    : str  = '') -> Union[numpy.ndarray, tuple[numpy.ndarray, numpy.ndarray, list[str]]]:
+    '''
+    Parameters
+    ------------------
+    event_types: List or array of strings or integers corresponding to MC samples
+    formatted  : If True will reformat names to be usable for naming files, e.g. no spaces
+    missing    : What to do with event types that are not found:
+                 raise   : Raise ValueError listing all of them
+                 sentinel: Use `sentinel` as their name
+                 mask    : Use `sentinel` as their name and also return a boolean array, True for found names, and a list of errors
+    sentinel   : Value used for missing names
+
+    Returns
+    ------------------
+    Array of decay names aligned with the event types, see `missing`
+    '''
+    table  = _get_table()
+    l_evt  = [ str(event_type) for event_type in event_types ]
+    l_name = [ table.get_decay_name(event_type, formatted=formatted) for event_type in l_evt ]
+
+    return _lookup_many(l_name, l_evt, missing=missing, sentinel=sentinel, kind='Event type')
+# ---------------------------------
+def read_event_types(
+        nicknames : Iterable[str],
+        missing   : str  = 'raise',
+        sentinel  : str  = '') -> Union[numpy.ndarray, tuple[numpy.ndarray, numpy.ndarray, list[str]]]:
+    '''
+    Parameters
+    ------------------
+    nicknames: List or array of formatted nicknames, as taken by `read_event_type`
+    missing  : What to do with nicknames that are not found, see `read_decay_names`
+    sentinel : Value used for missing event types
+
+    Returns
+    ------------------
+    Array of event types aligned with the nicknames, see `missing`
+    '''
+    table = _get_table()
+    l_nick= [ str(nickname) for nickname in nicknames ]
+    l_evt = []
+    for nickname in l_nick:
+        if not nickname.endswith('_SS'):
+            l_evt.append(table.get_event_type(nickname))
+            continue
+
+        evt_type = table.get_event_type(nickname[:-3])
+        l_evt.append(None if evt_type is None else f'{evt_type}_SS')
+
+    return _lookup_many(l_evt, l_nick, missing=missing, sentinel=sentinel, kind='Nickname')
+# ---------------------------------
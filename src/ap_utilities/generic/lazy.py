@@ -0,0 +1,45 @@
+'''
+Module with functions used to defer imports of heavy modules to their first use
+'''
+import importlib
+from types  import ModuleType
+from typing import Any
+
+# ---------------------------------
+class LazyModule(ModuleType):
+    '''
+    Class standing for a module that is imported when one of its attributes is first accessed
+    '''
+    # ---------------------------------
+    def __init__(self, name : str):
+        super().__init__(name)
+    # ---------------------------------
+    def __getattr__(self, attr : str) -> Any:
+        # Only called for attributes not found, i.e. before the module is imported
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+
+        return getattr(module, attr)
+# ---------------------------------
+def lazy_import(name : str) -> ModuleType:
+    '''
+    Parameters
+    ------------------
+    name: Name of module, e.g. numpy or dmu.generic.utilities
+
+    Returns
+    ------------------
+    Object standing for the module, which will be imported the first time one of its attributes is accessed,
+    i.e. errors due to missing modules are raised then.
+
+    Usage:
+
+    pnd = lazy_import('pandas')
+    ...
+    df  = pnd.DataFrame() # pandas is imported here
+
+    Annotations using the module, e.g. `-> pnd.DataFrame`, are evaluated when the function is defined
+    and would import it, modules using this function should have `from __future__ import annotations`.
+    '''
+    return LazyModule(name)
+# ---------------------------------
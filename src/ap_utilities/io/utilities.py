@@ -1,6 +1,9 @@
 '''
 Module with utility functions for reading and writting files
 '''
+import os
+import contextlib
+from typing import Iterator, TextIO
 
 # -----------------------
 def _format(line : str) -> str:
@@ -26,3 +29,29 @@ def reformat_yaml(path : str) -> None:
     with open(path, 'w', encoding='utf-8') as ofile:
         ofile.write(text)
 # -----------------------
+def get_ana_dir() -> str:
+    '''
+    Returns directory where outputs of analysis go, $ANADIR if set, otherwise a directory in /tmp
+    '''
+    if 'ANADIR' not in os.environ:
+        return '/tmp/ap_utilities/output'
+
+    return os.environ['ANADIR']
+# -----------------------
+@contextlib.contextmanager
+def open_atomic(path : str) -> Iterator[TextIO]:
+    '''
+    Context manager returning a file open for writing next to `path`, which replaces
+    `path` only when leaving the context without errors. Readers see either the old
+    or the new file, never a partial one, e.g. if the job is killed while writing.
+    '''
+    tmp_path = f'{path}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as ofile:
+            yield ofile
+
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+# -----------------------
@@ -0,0 +1,127 @@
+'''
+Module with functions reading the tables of counters that Gaudi algorithms print when they finalize, e.g.:
+
+Bu_Kee_eq_btosllball05_DPC     INFO Number of counters : 2
+ |    Counter                                      |     #     |    sum     | mean/eff^* | rms/err^*  |     min     |     max     |
+ | "# non-empty events for field MCDecayTree"      |     13584 |      13584 |     1.0000 |     0.0000 |      1.0000 |      1.0000 |
+ |*"# passed"                                      |       100 |         50 |( 50.00000 +- 5.000000)% |
+'''
+import re
+from dataclasses import dataclass
+from typing      import Iterable, Union
+
+from ap_utilities.logging.log_store import LogStore
+
+log=LogStore.add_logger('ap_utilities:counter_parser')
+# ---------------------------------------------
+class Data:
+    '''
+    Class storing shared attributes
+    '''
+    # Algorithm names are clipped to this length in the logs
+    name_length = 30
+    header      = 'Number of counters'
+    # Same marker as the one used to find the tables at the end of the logs, see `log_info.py`
+    finalize    = 'Application Manager Finalized'
+    eff_regex   = re.compile(r'\(\s*(?P<eff>[-+\d.eE]+)\s*\+-\s*(?P<err>[-+\d.eE]+)\s*\)%')
+# ---------------------------------------------
+@dataclass(frozen=True)
+class Counter:
+    '''
+    Class with one row of a table of counters. For efficiency counters, marked with `*`
+    in the logs, `mean` and `rms` are the efficiency and its error, as fractions
+    '''
+    name      : str
+    count     : int
+    sum       : Union[float,None] = None
+    mean      : Union[float,None] = None
+    rms       : Union[float,None] = None
+    min       : Union[float,None] = None
+    max       : Union[float,None] = None
+    efficiency: bool              = False
+# ---------------------------------------------
+def _to_float(value : str) -> Union[float,None]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+# ---------------------------------------------
+def parse_row(line : str) -> Union[Counter,None]:
+    '''
+    Parameters
+    -------------
+    line: Line of table of counters
+
+    Returns
+    -------------
+    Counter in line, None for the header or lines that cannot be read
+    '''
+    l_field = [ field.strip() for field in line.strip().strip('|').split('|') ]
+    if len(l_field) < 2:
+        return None
+
+    name       = l_field[0]
+    efficiency = name.startswith('*')
+    name       = name.lstrip('*').strip()
+    if not (name.startswith('"') and name.endswith('"')):
+        return None
+
+    try:
+        count = int(l_field[1])
+    except ValueError:
+        log.debug(f'Cannot read count from: {line}')
+        return None
+
+    l_value = [ _to_float(field) for field in l_field[2:] ]
+    l_value+= [None] * (5 - len(l_value))
+    if efficiency and len(l_field) > 3:
+        mtch = Data.eff_regex.match(l_field[3])
+        if mtch:
+            l_value[1:3] = [float(mtch.group('eff')) / 100, float(mtch.group('err')) / 100]
+
+    return Counter(name[1:-1], count, *l_value[:5], efficiency=efficiency)
+# ---------------------------------------------
+def clip_name(name : str) -> str:
+    '''
+    Returns algorithm name as it appears in the logs
+    '''
+    return name[:Data.name_length]
+# ---------------------------------------------
+def parse_counters(lines : Iterable[str]) -> dict[str,dict[str,Counter]]:
+    '''
+    Parameters
+    -------------
+    lines: Lines of log, read once
+
+    Returns
+    -------------
+    Dictionary between algorithm name, as printed in the log, and its counters, by name. The algorithms
+    are in the order of the log, for repeated names the first table is kept. Lines after
+    `Application Manager Finalized`, i.e. after the tables, are not read
+    '''
+    d_table : dict[str,dict[str,Counter]] = {}
+    d_row   : Union[dict[str,Counter],None] = None
+    for line in lines:
+        if d_row is not None and line.lstrip().startswith('|'):
+            counter = parse_row(line)
+            if counter is not None:
+                d_row.setdefault(counter.name, counter)
+
+            continue
+
+        d_row = None
+        if Data.header in line:
+            [alg_name, *_] = line.split()
+            d_row = {}
+            if alg_name not in d_table:
+                d_table[alg_name] = d_row
+
+            continue
+
+        if Data.finalize in line:
+            break
+
+    log.debug(f'Found counters for {len(d_table)} algorithms')
+
+    return d_table
+# ---------------------------------------------
@@ -0,0 +1,158 @@
+'''
+Module with LogCache class
+'''
+from __future__ import annotations
+
+import os
+import json
+import threading
+import collections
+import dataclasses
+from typing import Union
+
+from ap_utilities.logfiles.counter_parser import Counter
+from ap_utilities.generic.lazy            import lazy_import
+from ap_utilities.logging.log_store       import LogStore
+
+# Only needed when the cache is saved to a file
+sqlite3 = lazy_import('sqlite3')
+log=LogStore.add_logger('ap_utilities:log_cache')
+
+# Path, size and modification time of zip file
+Key = tuple[str,int,int]
+# ---------------------------------------------
+class LogCache:
+    '''
+    Class storing the counters read from the DaVinci logs of jobs, see `counter_parser.parse_counters`,
+    such that each log is parsed once, for as long as its zip file does not change.
+
+    Entries are found by the path, size and modification time of the zip file. The last `maxsize`
+    used entries are kept in memory and, optionally, all of them are saved in a SQLite file,
+    such that later runs, or other processes, do not parse the logs again.
+    '''
+    # ---------------------------------------------
+    def __init__(self, maxsize : int = 128, path : Union[str,None] = None):
+        '''
+        Parameters
+        ------------------
+        maxsize: Number of logs whose counters are kept in memory
+        path   : Path to SQLite file where counters are saved, if None, they are only kept in memory
+        '''
+        if maxsize < 1:
+            raise ValueError(f'Invalid maximum size: {maxsize}')
+
+        self._maxsize = maxsize
+        self._path    = path
+        # Same cache is used from validation threads
+        self._lock    = threading.Lock()
+        self._d_entry : collections.OrderedDict[Key,tuple[str,dict[str,dict[str,Counter]]]] = collections.OrderedDict()
+        self._conn    : Union[sqlite3.Connection,None] = None
+
+        if path is None:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Several processes can write to the file when reading logs in a pool
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS logs (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, log_path TEXT, tables TEXT) WITHOUT ROWID')
+        self._conn.commit()
+
+        log.debug(f'Using cache: {path}')
+    # ---------------------------------------------
+    @staticmethod
+    def get_key(zip_path : str) -> Union[Key,None]:
+        '''
+        Returns key of zip file, None if it does not exist
+        '''
+        try:
+            stat = os.stat(zip_path)
+        except FileNotFoundError:
+            return None
+
+        return os.path.abspath(zip_path), stat.st_size, stat.st_mtime_ns
+    # ---------------------------------------------
+    def get(self, key : Key) -> Union[tuple[str,dict[str,dict[str,Counter]]],None]:
+        '''
+        Parameters
+        ------------------
+        key: Key of zip file, see `get_key`
+
+        Returns
+        ------------------
+        Tuple with path to log inside zip file and counters of each algorithm, None if not cached
+        '''
+        with self._lock:
+            if key in self._d_entry:
+                self._d_entry.move_to_end(key)
+                return self._d_entry[key]
+
+            if self._conn is None:
+                return None
+
+            row = self._conn.execute('SELECT log_path, tables FROM logs WHERE path = ? AND size = ? AND mtime = ?', key).fetchone()
+
+        if row is None:
+            return None
+
+        log_path, tables = row
+        d_table = { alg_name : { values[0] : Counter(*values) for values in l_values } for alg_name, l_values in json.loads(tables).items() }
+        self._add(key, log_path, d_table)
+
+        return log_path, d_table
+    # ---------------------------------------------
+    def _add(self, key : Key, log_path : str, d_table : dict[str,dict[str,Counter]]) -> None:
+        with self._lock:
+            self._d_entry[key] = log_path, d_table
+            self._d_entry.move_to_end(key)
+            while len(self._d_entry) > self._maxsize:
+                self._d_entry.popitem(last=False)
+    # ---------------------------------------------
+    def put(self, key : Key, log_path : str, d_table : dict[str,dict[str,Counter]]) -> None:
+        '''
+        Parameters
+        ------------------
+        key     : Key of zip file, see `get_key`, taken before reading it
+        log_path: Path to log inside zip file
+        d_table : Counters of each algorithm
+        '''
+        self._add(key, log_path, d_table)
+        if self._conn is None:
+            return
+
+        # Counters saved as lists of their fields, in order
+        d_values = { alg_name : [ dataclasses.astuple(counter) for counter in d_counter.values() ] for alg_name, d_counter in d_table.items() }
+        with self._lock:
+            # Older entries of the same zip file are replaced
+            self._conn.execute('INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?)', (*key, log_path, json.dumps(d_values)))
+            self._conn.commit()
+    # ---------------------------------------------
+    def __len__(self) -> int:
+        '''
+        Number of logs whose counters are in memory
+        '''
+        with self._lock:
+            return len(self._d_entry)
+    # ---------------------------------------------
+    def clear(self) -> None:
+        '''
+        Drops entries in memory, the ones saved in the SQLite file are kept
+        '''
+        with self._lock:
+            self._d_entry.clear()
+    # ---------------------------------------------
+    def close(self) -> None:
+        '''
+        Closes the connection to the file, if any
+        '''
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    # ---------------------------------------------
+    def __enter__(self) -> 'LogCache':
+        return self
+    # ---------------------------------------------
+    def __exit__(self, *args) -> None:
+        self.close()
+# ---------------------------------------------
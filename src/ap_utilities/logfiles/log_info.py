@@ -1,129 +1,361 @@
 '''
 Module storing LogInfo class
 '''
+from __future__ import annotations
+
+import io
 import os
-import re
-import glob
+import fnmatch
 import zipfile
-import functools
-from typing import Union
+from concurrent.futures import as_completed
+from typing             import IO, Mapping, Union
 
-from ap_utilities.logging.log_store import LogStore
+from ap_utilities.logfiles                import counter_parser as cpr
+from ap_utilities.logfiles.counter_parser import Counter
+from ap_utilities.logfiles.log_cache      import LogCache, Key
+from ap_utilities.generic.lazy            import lazy_import
+from ap_utilities.logging.log_store       import LogStore
 
+pnd = lazy_import('pandas')
 log = LogStore.add_logger('ap_utilities:log_info')
 # ---------------------------------------------
+class Data:
+    '''
+    Class storing shared attributes
+    '''
+    # Counters are printed by the algorithms when they finalize, between these lines
+    stopped   = b'Application Manager Stopped'
+    finalized = b'Application Manager Finalized'
+    chunk     = 2 ** 16
+    # Beyond this, reading the whole log line by line needs less memory
+    max_tail  = 2 ** 26
+    columns   = ['sample', 'algorithm', 'counter', 'value', 'mcdt', 'error']
+    # Used by instances made without a cache
+    cache     = LogCache()
+# ---------------------------------------------
 class LogInfo:
     '''
     Class taking a zip file with logging information from AP pipelines
     and extracting information like the number of entries that it ran over
+
+    The DaVinci log is read once, from the zip file as a stream, nothing is extracted to disk.
+    The tables of counters of all the algorithms are kept in a cache, see `log_cache.py`, and the
+    lookups of the counters of each algorithm, by this or other instances, do not read the log
+    again, unless the zip file changes
+
+    The tables are printed at the end of the log. Only its last bytes are kept in memory and
+    searched for the finalization of the job, the lines before it are never split or decoded
     '''
     # ---------------------------------------------
-    def __init__(self, zip_path : str):
+    def __init__(
+            self,
+            zip_path  : str,
+            tail_size : Union[int,None]      = 4 * 2 ** 20,
+            cache     : Union[LogCache,None] = None):
+        '''
+        Parameters
+        ------------------
+        zip_path : Path to zip file made by the job
+        tail_size: Number of bytes at the end of the log where the counters are searched first,
+                   made larger if they are not there. If None, the whole log is read line by line
+        cache    : Cache with counters of logs already read, by default one shared by all instances, kept in memory
+        '''
         self._zip_path = zip_path
+        self._tail_size= tail_size
+        self._cache    = Data.cache if cache is None else cache
         self._log_wc   = 'DaVinci_*.log'
+        self._prefix   = '# non-empty events for field'
 
-        self._out_path : str
-        self._log_path : str
-
-        self._entries_regex : str = r'\s*\|\s*"#\snon-empty events for field .*"\s*\|\s*(\d+)\s*\|.*'
+        self._log_path : str = zip_path
+        self._key      : Union[Key,None] = None
+        self._d_table  : Union[dict[str,dict[str,Counter]],None] = None
+        self._d_mcdt   : dict[str,Union[Counter,None]] = {}
     # ---------------------------------------------
-    def _get_log_path(self) -> str:
-        path_wc = f'{self._out_path}/*/{self._log_wc}'
+    def _get_log_member(self, zip_ref : zipfile.ZipFile) -> zipfile.ZipInfo:
+        '''
+        Returns DaVinci log, found in the central directory of the zip file, without reading the members
+        '''
+        l_info = [ info for info in zip_ref.infolist() if fnmatch.fnmatch(os.path.basename(info.filename), self._log_wc) ]
 
         try:
-            [log_path] = glob.glob(path_wc)
+            [info] = l_info
         except ValueError as exc:
-            raise FileNotFoundError(f'Cannot find one and only one DaVinci log file in: {path_wc}') from exc
+            raise FileNotFoundError(f'Cannot find one and only one DaVinci log file in: {self._zip_path}') from exc
 
-        return log_path
+        return info
     # ---------------------------------------------
-    @functools.lru_cache()
-    def _get_dv_lines(self) -> Union[list[str],None]:
-        if not os.path.isfile(self._zip_path):
-            log.warning(f'Cannot find: {self._zip_path}')
+    def _read_region(self, zip_ref : zipfile.ZipFile, info : zipfile.ZipInfo, tail_size : int) -> Union[bytes,None]:
+        '''
+        Returns part of the log where the algorithms finalize, None if it does not start in its last `tail_size` bytes
+        '''
+        with zip_ref.open(info) as ifile:
+            # Decompressed and dropped in chunks, a member can only be read forward
+            _skip(ifile, info.file_size - tail_size)
+            data = ifile.read()
+
+        start = data.rfind(Data.stopped)
+        if start < 0:
             return None
 
-        with zipfile.ZipFile(self._zip_path, 'r') as zip_ref:
-            zip_ref.extractall(self._out_path)
+        end = data.find(Data.finalized, start)
 
-        self._log_path = self._get_log_path()
+        return data[start:] if end < 0 else data[start:end]
+    # ---------------------------------------------
+    def _read_tables(self, zip_ref : zipfile.ZipFile, info : zipfile.ZipInfo) -> dict[str,dict[str,Counter]]:
+        tail_size = self._tail_size
+        while tail_size is not None and tail_size < min(info.file_size, Data.max_tail):
+            region = self._read_region(zip_ref, info, tail_size)
+            if region is not None:
+                d_table = cpr.parse_counters(region.decode('utf-8', errors='replace').splitlines())
+                if d_table:
+                    return d_table
+
+                break
 
-        with open(self._log_path, encoding='utf-8') as ifile:
-            l_line = ifile.read().splitlines()
+            tail_size *= 4
 
-        return l_line
+        log.debug(f'Reading whole log: {self._log_path}')
+        with zip_ref.open(info) as ifile:
+            return cpr.parse_counters(io.TextIOWrapper(ifile, encoding='utf-8', errors='replace'))
     # ---------------------------------------------
-    def _entries_from_line(self, line : str) -> Union[int,None]:
-        mtch = re.match(self._entries_regex, line)
-        if not mtch:
-            log.warning(f'Cannot extract number of entries from line \"{line}\" using regex \"{self._entries_regex}\"')
+    def _get_tables(self) -> Union[dict[str,dict[str,Counter]],None]:
+        '''
+        Returns counters of each algorithm, see `counter_parser.parse_counters`, None if the zip file does not exist
+        '''
+        key = LogCache.get_key(self._zip_path)
+        if key is None:
+            log.warning(f'Cannot find: {self._zip_path}')
             return None
 
-        entries = mtch.group(1)
+        if key == self._key:
+            return self._d_table
+
+        entry = self._cache.get(key)
+        if entry is None:
+            with zipfile.ZipFile(self._zip_path, 'r') as zip_ref:
+                info  = self._get_log_member(zip_ref)
+                entry = f'{self._zip_path}:{info.filename}', self._read_tables(zip_ref, info)
+
+            self._cache.put(key, *entry)
+        else:
+            log.debug(f'Using cached counters of: {self._zip_path}')
+
+        self._log_path, self._d_table = entry
+        self._d_mcdt = self._get_mcdt_counters(self._d_table)
+        self._key    = key
 
-        return int(entries)
+        return self._d_table
     # ---------------------------------------------
-    def _all_in_line(self, line : str, l_substr : list[str]) -> bool:
-        found = True
-        for substr in l_substr:
-            found = found and substr in line
+    def _get_alg_key(self, d_table : dict[str,dict[str,Counter]], alg_name : str) -> Union[str,None]:
+        '''
+        Returns name under which the counters of the algorithm are, None if it is not in the log
+        '''
+        alg_name = cpr.clip_name(alg_name)
+        if alg_name in d_table:
+            return alg_name
 
-        return found
+        # Names printed with more than the algorithm name
+        for key in d_table:
+            if alg_name in key:
+                return key
+
+        return None
     # ---------------------------------------------
-    def _index_at_first_instance(self, l_line : list[str], l_substr : list[str]) -> Union[int,None]:
-        index = None
-        for i_line, line in enumerate(l_line):
-            if self._all_in_line(line, l_substr):
-                index = i_line
-                break
+    @property
+    def algorithms(self) -> list[str]:
+        '''
+        Names of algorithms with counters, as printed in the log, empty if the zip file does not exist
+        '''
+        d_table = self._get_tables()
 
-        return index
+        return [] if d_table is None else list(d_table)
     # ---------------------------------------------
-    def _get_line_with_entries(self, l_line : list[str], alg_name : str) -> Union[str,None]:
-        algo_index = self._index_at_first_instance(l_line, l_substr=[alg_name, 'Number of counters'])
-        if algo_index is None:
-            log.warning(f'Cannot find line with \"Number of counters\" and \"{alg_name}\" in {self._log_path}')
-            return None
+    def get_counters(self, alg_name : str) -> Union[dict[str,Counter],None]:
+        '''
+        Parameters
+        ------------------
+        alg_name: Name of algorithm, clipped as in the logs if needed
 
-        l_line = l_line[algo_index:]
+        Returns
+        ------------------
+        Dictionary between name of counter and counter, None if the algorithm or the zip file are not found
+        '''
+        d_table = self._get_tables()
+        if d_table is None:
+            return None
 
-        atrm_index = self._index_at_first_instance(l_line, l_substr=['ApplicationMgr'])
-        if atrm_index is None:
-            log.warning('Cannot find line with ApplicationMgr')
+        key = self._get_alg_key(d_table, alg_name)
+        if key is None:
             return None
 
-        l_line = l_line[:atrm_index]
+        return dict(d_table[key])
+    # ---------------------------------------------
+    def _get_mcdt_counters(self, d_table : dict[str,dict[str,Counter]]) -> dict[str,Union[Counter,None]]:
+        '''
+        Returns dictionary between algorithm and counter with its non-empty events. If the algorithm
+        does not have it, the one of the first algorithm after it in the log that has it is used
+        '''
+        d_mcdt : dict[str,Union[Counter,None]] = {}
+        latest : Union[Counter,None]           = None
+        for alg_name in reversed(d_table):
+            l_counter = [ counter for counter in d_table[alg_name].values() if counter.name.startswith(self._prefix) and not counter.efficiency ]
+            latest    = l_counter[0] if l_counter else latest
+            d_mcdt[alg_name] = latest
 
-        none_index = self._index_at_first_instance(l_line, l_substr=[' | "# non-empty events for field'])
-        if none_index is None:
-            log.warning('Cannot find line with non empty events line')
+        return d_mcdt
+    # ---------------------------------------------
+    def _get_mcdt_counter(self, d_table : dict[str,dict[str,Counter]], alg_name : str) -> Union[Counter,None]:
+        key = self._get_alg_key(d_table, alg_name)
+        if key is None:
+            log.warning(f'Cannot find line with \"Number of counters\" and \"{cpr.clip_name(alg_name)}\" in {self._log_path}')
             return None
 
-        return l_line[none_index]
+        counter = self._d_mcdt[key]
+        if counter is None:
+            log.warning('Cannot find line with non empty events line')
+
+        return counter
+    # ---------------------------------------------
+    def _get_rows(self, sample : str, l_alg_name : list[str]) -> list[tuple]:
+        '''
+        Returns rows of `batch` for this log
+        '''
+        d_table = self._get_tables()
+        if d_table is None:
+            return [(sample, None, None, None, False, f'Cannot find: {self._zip_path}')]
+
+        l_row = []
+        for alg_name in l_alg_name:
+            d_counter = self.get_counters(alg_name)
+            if d_counter is None:
+                l_row.append((sample, alg_name, None, None, False, f'Cannot find counters of {alg_name} in {self._log_path}'))
+                continue
+
+            mcdt      = self._get_mcdt_counter(d_table, alg_name)
+            l_counter = list(d_counter.values())
+            if mcdt is not None and mcdt not in l_counter:
+                l_counter.append(mcdt)
+
+            l_row += [ (sample, alg_name, counter.name, counter.count, counter == mcdt, None) for counter in l_counter ]
+
+        return l_row
+    # ---------------------------------------------
+    @classmethod
+    def batch(
+            cls,
+            paths     : Mapping[str,str],
+            alg_names : Union[list[str],None] = None,
+            workers   : int                   = 1,
+            chunksize : int                   = 8,
+            tail_size : Union[int,None]       = 4 * 2 ** 20,
+            cache_path: Union[str,None]       = None) -> pnd.DataFrame:
+        '''
+        Reads the counters of many jobs, using a pool of processes
+
+        Parameters
+        ------------------
+        paths    : Dictionary between sample and path to zip file of its job
+        alg_names: Algorithms whose counters are read, by default the one named as the sample, which fills MCDecayTree
+        workers  : Number of processes, with one, the logs are read in this process
+        chunksize: Number of jobs sent at once to each process
+        tail_size: See `__init__`
+        cache_path: Path to SQLite file where the counters are saved and read, see `LogCache`, if None, the
+                   cache of the instances is used, which is not shared by the processes of the pool
+
+        Returns
+        ------------------
+        Dataframe with columns `sample`, `algorithm`, `counter`, `value`, the number of entries of the counter, `mcdt` and `error`.
+        For each algorithm, the counter with non-empty events used by `get_mcdt_entries` is also added, when it is
+        taken from the next algorithm, and is the only row with `mcdt` set. Jobs that failed, e.g. missing or corrupted
+        zip files, have a single row with the error, and algorithms not found in the log have a row with the error each.
+        '''
+        l_job   = list(paths.items())
+        l_chunk = [ l_job[start:start + chunksize] for start in range(0, len(l_job), chunksize) ]
+        log.info(f'Reading {len(l_job)} logs in {len(l_chunk)} chunks with {workers} processes')
+
+        if workers == 1:
+            l_rows = [ _get_chunk_rows(chunk, alg_names, tail_size, cache_path) for chunk in l_chunk ]
+        else:
+            l_rows = _get_pool_rows(l_chunk, alg_names, tail_size, cache_path, workers)
+
+        df = pnd.DataFrame([ row for rows in l_rows for row in rows ], columns=Data.columns)
+        for sample, error in df.loc[df.error.notna(), ['sample', 'error']].itertuples(index=False):
+            log.error(f'Cannot read log of {sample}: {error}')
+
+        return df
     # ---------------------------------------------
     def get_mcdt_entries(self, alg_name : str, fall_back : int = -1) -> int:
         '''
         Returns entries that DaVinci ran over to get MCDecayTree
         '''
-        # If not clipped, long names will cause failure
-        # due to clipping in logs
-        alg_name       = alg_name[:30]
-        self._out_path = f'/tmp/log_info/{alg_name}'
-        os.makedirs(self._out_path, exist_ok=True)
-
-        l_line            = self._get_dv_lines()
-        if l_line is None:
+        d_table = self._get_tables()
+        if d_table is None:
             return fall_back
 
-        line_with_entries = self._get_line_with_entries(l_line, alg_name)
-        if line_with_entries is None:
+        counter = self._get_mcdt_counter(d_table, alg_name)
+        if counter is None:
             return fall_back
 
-        nentries          = self._entries_from_line(line_with_entries)
-        if nentries is None:
-            return fall_back
+        nentries = counter.count
 
         log.debug(f'Found {nentries} entries')
 
         return nentries
 # ---------------------------------------------
+def _skip(ifile : IO[bytes], nbyte : int) -> None:
+    '''
+    Reads and drops `nbyte` bytes of file
+    '''
+    while nbyte > 0:
+        data   = ifile.read(min(Data.chunk, nbyte))
+        if not data:
+            return
+
+        nbyte -= len(data)
+# ---------------------------------------------
+def _get_chunk_rows(
+        l_job      : list[tuple[str,str]],
+        alg_names  : Union[list[str],None],
+        tail_size  : Union[int,None],
+        cache_path : Union[str,None]) -> list[tuple]:
+    '''
+    Returns rows of `LogInfo.batch` for a chunk of jobs, run in the processes of the pool
+    '''
+    cache = Data.cache if cache_path is None else LogCache(path=cache_path)
+    l_row = []
+    for sample, zip_path in l_job:
+        try:
+            obj    = LogInfo(zip_path, tail_size=tail_size, cache=cache)
+            l_row += obj._get_rows(sample, [sample] if alg_names is None else alg_names) # pylint: disable=protected-access
+        except Exception as exc: # pylint: disable=broad-exception-caught
+            l_row.append((sample, None, None, None, False, f'{type(exc).__name__}: {exc}'))
+
+    if cache is not Data.cache:
+        cache.close()
+
+    return l_row
+# ---------------------------------------------
+def _get_pool_rows(
+        l_chunk   : list[list[tuple[str,str]]],
+        alg_names : Union[list[str],None],
+        tail_size : Union[int,None],
+        cache_path: Union[str,None],
+        workers   : int) -> list[list[tuple]]:
+    '''
+    Returns rows of each chunk, in the same order, chunks whose process failed have an error for each of their jobs
+    '''
+    # Brings multiprocessing, not needed to read a single log
+    from concurrent.futures import ProcessPoolExecutor # pylint: disable=import-outside-toplevel
+
+    l_rows : list[list[tuple]] = [ [] for _ in l_chunk ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        d_index = { executor.submit(_get_chunk_rows, chunk, alg_names, tail_size, cache_path) : index for index, chunk in enumerate(l_chunk) }
+        for future in as_completed(d_index):
+            index = d_index[future]
+            try:
+                l_rows[index] = future.result()
+            except Exception as exc: # pylint: disable=broad-exception-caught
+                l_rows[index] = [ (sample, None, None, None, False, f'{type(exc).__name__}: {exc}') for sample, _ in l_chunk[index] ]
+
+    return l_rows
+# ---------------------------------------------
@@ -3,7 +3,11 @@ Module holding LogStore
 '''
 
 import logging
-import logzero
+
+from ap_utilities.generic.lazy import lazy_import
+
+# Only needed by the logzero backend
+logzero = lazy_import('logzero')
 
 #------------------------------------------------------------
 class StoreFormater(logging.Formatter):
@@ -6,15 +6,17 @@ Script in charge of:
 - Checking which event types are in the all section but not in the classified one
 - Save summary to YAML
 '''
+from __future__ import annotations
 
 import argparse
 
-from dmu.generic           import utilities as gut
-from dmu.logging.log_store import LogStore
-from omegaconf             import DictConfig, ListConfig
-from ap_utilities.decays   import utilities as aput
+from ap_utilities.decays            import utilities as aput
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
 
-log=LogStore.add_logger('ap_utilities:analyze_samples')
+gut      =lazy_import('dmu.generic.utilities')
+omegaconf=lazy_import('omegaconf')
+log      =LogStore.add_logger('ap_utilities:analyze_samples')
 # ----------------------
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='Script used to update config with event types')
@@ -23,7 +25,7 @@ def _parse_args() -> argparse.Namespace:
 
     return args
 # ----------------------
-def _analyze_conf(cfg : DictConfig) -> None:
+def _analyze_conf(cfg : omegaconf.DictConfig) -> None:
     '''
     This method creates YAML file with information mentioned in scripts main docstring
 
@@ -40,8 +42,9 @@ def _analyze_conf(cfg : DictConfig) -> None:
         if section == 'all':
             continue
 
-        if section.startswith('missing') and isinstance(d_evt_type, ListConfig):
-            d_mis[section] = { etype : aput.read_decay_name(event_type=etype) for etype in d_evt_type }
+        if section.startswith('missing') and isinstance(d_evt_type, omegaconf.ListConfig):
+            l_nick         = aput.read_decay_names(event_types=d_evt_type).tolist()
+            d_mis[section] = dict(zip(d_evt_type, l_nick))
 
         if isinstance(d_evt_type, dict):
             tmp = { key : val for key, val in d_evt_type.items() if key not in cfg.all }
@@ -49,18 +52,15 @@ def _analyze_conf(cfg : DictConfig) -> None:
 
     gut.dump_json(data=d_mis, path='./missing.yaml')
 
-    d_missing = {}
-    for evt_type in cfg.all:
-        if _found_in_any_section(evt_type=evt_type, cfg=cfg):
-            continue
-
-        d_missing[evt_type] = aput.read_decay_name(event_type=evt_type)
+    l_evt_type = [ evt_type for evt_type in cfg.all if not _found_in_any_section(evt_type=evt_type, cfg=cfg) ]
+    l_nick     = aput.read_decay_names(event_types=l_evt_type).tolist()
+    d_missing  = dict(zip(l_evt_type, l_nick))
 
     d_missing = dict(sorted(d_missing.items(), key=lambda item: item[1]))
     d_summary = { 'new' : d_new, 'missing' : d_missing }
     gut.dump_json(data=d_summary, path='./summary.yaml')
 # ----------------------
-def _found_in_any_section(evt_type : int, cfg : DictConfig) -> bool:
+def _found_in_any_section(evt_type : int, cfg : omegaconf.DictConfig) -> bool:
     '''
     Parameters
     -------------
@@ -10,12 +10,13 @@ from collections         import Counter
 from importlib.resources import files
 
 import argparse
-import yaml
 
 import ap_utilities.io.utilities     as iout 
 import ap_utilities.decays.utilities as aput
+from ap_utilities.generic.lazy      import lazy_import
 from ap_utilities.logging.log_store import LogStore
 
+yaml= lazy_import('yaml')
 log = LogStore.add_logger('ap_utilities:check_production')
 # --------------------------
 class Data:
@@ -118,12 +119,6 @@ def _load_samples() -> None:
     Data.d_samples['samples'    ] = s_samp_sample
     Data.d_samples[Data.analysis] = _get_analysis_nicknames()
 # -------------------------
-def _nickname_from_evt_type(evt_type : int) -> str:
-    etype    = str(evt_type)
-    nickname = aput.read_decay_name(event_type=etype)
-
-    return nickname
-# -------------------------
 def _flatten_list(lst : list) -> list:
     l_val = []
     for item in lst:
@@ -148,7 +143,7 @@ def _get_analysis_nicknames() -> set[str]:
 
     l_evt_type = d_analysis[Data.analysis]
     l_evt_type = _flatten_list(l_evt_type)
-    l_nick_name= [ _nickname_from_evt_type(event_type) for event_type in l_evt_type ]
+    l_nick_name= aput.read_decay_names(event_types=l_evt_type).tolist()
 
     return set(l_nick_name)
 # -------------------------
@@ -1,13 +1,23 @@
 '''
 Script used to check which MC samples are found in grid
 '''
+from __future__ import annotations
+
 import argparse
 
-from dataclasses                          import dataclass
-from ap_utilities.logging.log_store       import LogStore
-from ap_utilities.bookkeeping.bkk_checker import BkkChecker
-from ap_utilities.bookkeeping             import sample_config as scf 
+from dataclasses                            import dataclass
+from ap_utilities.generic.lazy              import lazy_import
+from ap_utilities.logging.log_store         import LogStore
+from ap_utilities.bookkeeping.bkk_scheduler import BkkScheduler
+from ap_utilities.bookkeeping.bkk_checker   import get_event_types
+from ap_utilities.bookkeeping.bkk_path      import BkkPath
+from ap_utilities.bookkeeping.bkk_cache     import BkkCache
+from ap_utilities.bookkeeping.bkk_journal   import BkkJournal
+from ap_utilities.bookkeeping.throttle      import Throttle
+from ap_utilities.bookkeeping               import bkk_backend   as bkb
+from ap_utilities.bookkeeping               import sample_config as scf 
 
+omegaconf = lazy_import('omegaconf')
 log=LogStore.add_logger('ap_utilities_scripts:check_samples')
 # --------------------------------
 @dataclass
@@ -19,27 +29,82 @@ class Data:
     config  : str
     nthread : int
     log_lvl : int
+    refresh : bool
+    ttl_fnd : float
+    ttl_mis : float
+    engine  : str
+    timeout : float
+    backend : str
+    budget  : float
+    ntry    : int
+    rate    : float
+    resume  : bool
+    list    : bool
+    metrics : str
 # ----------------------------------------
 def _parse_args() -> None:
     parser = argparse.ArgumentParser(description='Used to filter samples based on what exists in the GRID')
     parser.add_argument('-s', '--samples', type=str, help='Name of file storing event types, e.g. by_priority', required=True)
     parser.add_argument('-c', '--config' , type=str, help='Name of file storing configuration, e.g. 2024', required=True)
-    parser.add_argument('-n', '--nthread', type=int, help='Number of threads', default=1)
+    parser.add_argument('-n', '--nthread', type=int, help='Number of threads, or of concurrent queries with asyncio engine', default=1)
+    parser.add_argument('-e', '--engine' , type=str, help='Way to run queries', default='threads', choices=['threads', 'asyncio'])
+    parser.add_argument('-b', '--backend', type=str, help='Way to call Dirac, worker keeps one process per thread for the whole run', default='subprocess', choices=['subprocess', 'worker'])
+    parser.add_argument('-w', '--budget' , type=float, help='Minutes after which no new query starts, samples are checked by priority', default=None)
+    parser.add_argument('--ntry'         , type=int  , help='Maximum number of times a failed query is made', default=3)
+    parser.add_argument('--rate'         , type=float, help='Maximum number of queries per second', default=None)
+    parser.add_argument('-t', '--timeout', type=float, help='Seconds after which a query is killed and retried', default=None)
     parser.add_argument('-l', '--log_lvl', type=int, help='Logging level', default=20, choices=[10,20,30,40])
+    parser.add_argument('-r', '--refresh', action='store_true', help='If used, will query all paths, instead of using cached results')
+    parser.add_argument('--list'         , action='store_true', help='If used, will print the paths that would be checked, for each section, and exit')
+    parser.add_argument('--metrics'      , type=str  , help='If passed, path where the time spent by the queries is saved, in Prometheus format if it ends in .prom, otherwise JSON', default=None)
+    parser.add_argument('--resume'       , action='store_true', help='If used, will not query paths checked by the last run, e.g. if it was interrupted')
+    parser.add_argument('--ttl_found'    , type=float, help='Hours after which cached paths with files are queried again'   , default=7 * 24)
+    parser.add_argument('--ttl_missing'  , type=float, help='Hours after which cached paths without files are queried again', default=24)
     args = parser.parse_args()
 
     Data.samples  = args.samples
     Data.config   = args.config
     Data.nthread  = args.nthread
     Data.log_lvl  = args.log_lvl
+    Data.refresh  = args.refresh
+    Data.ttl_fnd  = args.ttl_found
+    Data.ttl_mis  = args.ttl_missing
+    Data.engine   = args.engine
+    Data.timeout  = args.timeout
+    Data.backend  = args.backend
+    Data.budget   = args.budget
+    Data.ntry     = args.ntry
+    Data.rate     = args.rate
+    Data.resume   = args.resume
+    Data.list     = args.list
+    Data.metrics  = args.metrics
 # --------------------------------
 def _set_logs() -> None:
     log.debug(f'Running with log level: {Data.log_lvl}')
 
     LogStore.set_level('ap_utilities:bkk_checker'          , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_cache'            , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_journal'          , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_stats'            , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_path'             , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_metrics'          , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_backend'          , Data.log_lvl)
+    LogStore.set_level('ap_utilities:bkk_scheduler'        , Data.log_lvl)
+    LogStore.set_level('ap_utilities:priority_pool'        , Data.log_lvl)
+    LogStore.set_level('ap_utilities:throttle'             , Data.log_lvl)
     LogStore.set_level('ap_utilities:sample_config'        , Data.log_lvl)
     LogStore.set_level('ap_utilities_scripts:check_samples', Data.log_lvl)
 # --------------------------------
+def _list_paths(cfg : omegaconf.DictConfig) -> None:
+    '''
+    Prints bookkeeping paths of each section, nothing is written or queried
+    '''
+    for name, section in cfg.sections.items():
+        l_path = BkkPath(section.settings).get_paths(get_event_types(section))
+        print(f'{name}:')
+        for path in dict.fromkeys(l_path):
+            print(f'    {path}')
+# --------------------------------
 def main():
     '''
     Script starts here
@@ -54,10 +119,23 @@ def main():
         'low_priority', 
         'very_low_priority'])
 
-    for name, section in cfg.sections.items():
-        log.info(f'Processing section: {name}')
-        obj=BkkChecker(name, section)
-        obj.save(nthreads=Data.nthread)
+    if Data.list:
+        _list_paths(cfg)
+        return
+
+    cache = BkkCache(
+            ttl_found  =3600 * Data.ttl_fnd,
+            ttl_missing=3600 * Data.ttl_mis,
+            refresh    =Data.refresh)
+
+    throttle = Throttle(ntry=Data.ntry, rate=Data.rate)
+    with bkb.get_backend(Data.backend, nworker=Data.nthread) as backend, BkkJournal(resume=Data.resume) as journal, \
+         BkkScheduler(cfg, cache=cache, backend=backend, throttle=throttle, journal=journal) as obj:
+        budget = None if Data.budget is None else 60 * Data.budget
+        obj.save(nthreads=Data.nthread, engine=Data.engine, timeout=Data.timeout, budget=budget)
+
+    if Data.metrics is not None:
+        obj.metrics.save(Data.metrics)
 # --------------------------------
 if __name__ == '__main__':
     main()
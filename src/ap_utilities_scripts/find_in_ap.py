@@ -8,16 +8,17 @@ $ANADIR/bkk_checker/block_*/info.yaml
 - Check if ntuples corresponding to each line exist in BKK.
 - Build a new info.yaml for missing samples
 '''
+from __future__ import annotations
+
 import os
 import glob
 import argparse
 
-import apd
-import pandas as pnd
-
-from apd                   import SampleCollection
-from dmu.logging.log_store import LogStore
+from dmu.logging.log_store     import LogStore
+from ap_utilities.generic.lazy import lazy_import
 
+apd=lazy_import('apd')
+pnd=lazy_import('pandas')
 log=LogStore.add_logger('ap_utilities:find_in_ap')
 # ----------------------
 def _info_from_line(line : str) -> tuple[str, str, str]:
@@ -66,7 +67,7 @@ def _get_info() -> list[tuple[str, str, str]]:
     return [ _info_from_line(line=line) for line in l_line ]
 # ----------------------
 def _found_type(
-    col      : SampleCollection,
+    col      : apd.SampleCollection,
     evt_type : str, 
     block    : str) -> bool:
     '''
@@ -124,7 +125,7 @@ def main():
 
     dset      = apd.get_analysis_data(working_group='RD', analysis='rd_ap_2024')
     scol      = dset.all_samples()
-    if not isinstance(scol, SampleCollection):
+    if not isinstance(scol, apd.SampleCollection):
         raise RuntimeError('Cannot extract SampleCollection instance')
 
     t_info    = _get_info()
@@ -6,11 +6,12 @@ import argparse
 from typing                         import Union
 from importlib.resources            import files
 
-import yaml
-
 import ap_utilities.decays.utilities as aput
+from ap_utilities.decays            import descriptors as dsc
+from ap_utilities.generic.lazy      import lazy_import
 from ap_utilities.logging.log_store import LogStore
 
+yaml= lazy_import('yaml')
 log = LogStore.add_logger('ap_utilities:make_fields')
 # ---------------------------
 class Data:
@@ -33,27 +34,6 @@ class Data:
             '12425011',
             ]
 
-    d_repl_sym = {
-            'cc'        :      'CC',
-            '->'        :     '==>',
-            }
-
-    d_repl_par = {
-            'psi(2S)'    :    'psi_2S_',
-            'psi(1S)'    :    'psi_1S_',
-            'K*(892)'    :    'K*_892_',
-            'phi(1020)'  :  'phi_1020_',
-            'K_1(1270)'  :  'K_1_1270_',
-            'K_2*(1430)' : 'K_2*_1430_',
-            }
-
-    d_repl_spa = {
-            '('        :     ' ( ',
-            ')'        :     ' ) ',
-            '['        :     ' [ ',
-            ']'        :     ' ] ',
-            }
-
     l_event_type : list[str]
     d_decay      : dict[str,str]
 
@@ -136,30 +116,9 @@ def _parse_args() -> None:
 
     LogStore.set_level('ap_utilities:make_fields', args.log_lvl)
 # ---------------------------
-def _reformat_decay(decay : str) -> str:
-    # Symbol renaming needed, e.g. -> ==>, cc -> CC
-    for org, new in Data.d_repl_sym.items():
-        decay = decay.replace(org, new)
-
-    # Need to make special substrings into underscored ones
-    # e.g. J/psi(1S) -> J/psi_1S_
-    for org, new in Data.d_repl_par.items():
-        decay = decay.replace(org, new)
-
-    # Add spaces to parentheses and brackets
-    for org, new in Data.d_repl_spa.items():
-        decay = decay.replace(org, new)
-
-    # Underscores are part of neutrino names
-    # Particles otherwise only use letters
-    # Numbers should be excluded, due to anti-D0 -> D~0
-    decay = re.sub(r'anti-([a-zA-Z,_]+)', r'\1~', decay)
-
-    return decay
-# ---------------------------
 def _reformat_back_decay(decay : str) -> str:
     # Put back special characters original naming
-    for org, new in Data.d_repl_par.items():
+    for org, new in dsc.Data.d_repl_par.items():
         decay = decay.replace(new, org)
 
     # Decay cannot have space here, other spaces are allowed
@@ -174,31 +133,6 @@ def _reformat_back_decay(decay : str) -> str:
 
     return decay
 # ---------------------------
-def _replace_back(part : str) -> str:
-    for org, new in Data.d_repl_par.items():
-        if new in part:
-            part = part.replace(new, org)
-
-    return part
-# ---------------------------
-def _particles_from_decay(decay : str) -> list[str]:
-    l_repl = list(Data.d_repl_sym.values())
-    l_repl+= list(Data.d_repl_spa.values())
-    l_repl = [ repl.replace(' ', '') for repl in l_repl ]
-
-    l_part = decay.split(' ')
-    l_part = [ part for part in l_part if part not in l_repl ]
-    l_part = [ part for part in l_part if part != ''         ]
-    l_part = [ _replace_back(part) for part in l_part ]
-
-    # Anti-neutrinos and neutrinos will use nu(_index) branch names
-    # Need this to make sure neutrinos appear as repeated
-    l_part = [ part.rstrip('~') for part in l_part ]
-
-    log.debug(f'Found particles: {l_part}')
-
-    return l_part
-# ---------------------------
 def _skip_decay(event_type : str, decay : str) -> bool:
     if event_type in Data.l_skip_type:
         log.debug(f'Skipping decay: {decay}')
@@ -326,49 +260,15 @@ def _nickname_from_particle(name : str, event_type : str, decname : str) -> str:
 
     return nick
 # ---------------------------
-def _fix_beauty(decay : str, event_type : str) -> str:
-    if 'Beauty' not in decay:
-        return decay
-
-    if event_type == '11102453':
-        bname = 'B0'
-    else:
-        log.warning(f'Cannot identify B meson type for {event_type}')
-        bname = 'Beauty'
-
-    decay = decay.replace('Beauty', bname)
-
-    return decay
-# ---------------------------
-def _fix_phi(decay : str) -> str:
-    rgx   = r'phi(?!\s*\(\s*1020\s*\)\s*)'
-    decay = re.sub(rgx, 'phi(1020)', decay)
-
-    return decay
-# ---------------------------
-def _fix_names(decay : str, event_type : str) -> str:
-    '''
-    Decay field in decay files is not properly written, need to fix here, before using decay
-    '''
-    decay = decay.replace('K_1+' ,  'K_1(1270)+')
-    decay = decay.replace('K*+'  ,    'K*(892)+')
-    decay = decay.replace('K*0'  ,    'K*(892)0')
-    decay = decay.replace('D_s*' ,        'D*_s')
-    decay = decay.replace('My_'  ,            '')
-    decay = _fix_phi(decay)
-    decay = _fix_beauty(decay, event_type)
-
-    return decay
-# ---------------------------
 def _get_decay(event_type : str, decname : str) -> Union[None,dict[str,str]]:
     decay = Data.d_decay[event_type]
-    decay = _fix_names(decay, event_type)
+    decay = dsc.fix_names(decay, event_type)
 
     if _skip_decay(event_type, decay):
         return None
 
-    decay = _reformat_decay(decay)
-    l_par = _particles_from_decay(decay)
+    decay = dsc.reformat_decay(decay)
+    l_par = dsc.particles_from_decay(decay)
     l_par = _rename_repeated(l_par)
     decay = _reformat_back_decay(decay)
     decay = _check_unhatted_decay(decay, event_type)
@@ -4,12 +4,13 @@ such that the keys are the nicknames and the values are the event types
 '''
 import argparse
 from importlib.resources import files
-import yaml
 
 import ap_utilities.decays.utilities as aput
 
+from ap_utilities.generic.lazy      import lazy_import
 from ap_utilities.logging.log_store import LogStore
 
+yaml= lazy_import('yaml')
 log = LogStore.add_logger('ap_utilities:make_name_evt')
 # ------------------------------
 def _get_data() -> dict[str,str]:
@@ -0,0 +1,32 @@
+'''
+Script used to compile the YAML files with the naming tables into
+the binary index read by `ap_utilities.decays.utilities`
+'''
+import argparse
+
+from ap_utilities.decays            import naming_index as nix
+from ap_utilities.logging.log_store import LogStore
+
+log = LogStore.add_logger('ap_utilities:make_naming_index')
+# ------------------------------
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Script used to build the binary index with the naming tables')
+    parser.add_argument('-o', '--output' , type=str, help='Path to output index, by default the one shipped with the project')
+    parser.add_argument('-l', '--log_lvl', type=int, help='Logging level', choices=[10,20,30], default=20)
+    args = parser.parse_args()
+
+    return args
+# ------------------------------
+def main():
+    '''
+    Script starts here
+    '''
+    args = _parse_args()
+    LogStore.set_level('ap_utilities:naming_index', args.log_lvl)
+
+    path = nix.build_index(path=args.output)
+    if not nix.is_valid(path):
+        raise RuntimeError(f'Index not valid after building it: {path}')
+# ------------------------------
+if __name__ == '__main__':
+    main()
@@ -4,14 +4,16 @@ MC samples in:
 
 ap_utilities_data/analyses/by_priority.yaml
 '''
+from __future__ import annotations
 
 import argparse
-import pandas as pnd
 
-from dmu.pdataframe        import utilities as put
-from dmu.logging.log_store import LogStore
-from dmu.generic           import utilities as gut
+from ap_utilities.generic.lazy      import lazy_import
+from ap_utilities.logging.log_store import LogStore
 
+pnd=lazy_import('pandas')
+put=lazy_import('dmu.pdataframe.utilities')
+gut=lazy_import('dmu.generic.utilities')
 log=LogStore.add_logger('ap_utilities:make_samples_table')
 # ----------------------
 def _parse_args() -> argparse.Namespace:
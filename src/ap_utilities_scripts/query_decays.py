@@ -0,0 +1,68 @@
+'''
+Script used to find event types from the particles in their decay descriptors
+'''
+from __future__ import annotations
+
+import os
+import argparse
+
+import ap_utilities.decays.utilities as aput
+from ap_utilities.decays                import naming_index as nix
+from ap_utilities.generic.lazy          import lazy_import
+from ap_utilities.logging.log_store     import LogStore
+
+# Uses numpy, only needed after parsing arguments
+pix = lazy_import('ap_utilities.decays.particle_index')
+log = LogStore.add_logger('ap_utilities:query_decays')
+# ------------------------------
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Script used to find event types whose decays contain given particles, e.g. -a e+ e- K*0')
+    parser.add_argument('-a', '--all_of' , nargs='+', action='extend', help='Particles that must all be in the decay' , default=[])
+    parser.add_argument('-o', '--any_of' , nargs='+', action='extend', help='At least one of these has to be in the decay', default=[])
+    parser.add_argument('-n', '--none_of', nargs='+', action='extend', help='None of these can be in the decay'       , default=[])
+    parser.add_argument('-i', '--index'  , type=str , help='Path to JSON file with index, it will be made if missing or stale')
+    parser.add_argument('-c', '--count'  , action='store_true', help='If used, will only print the number of event types found')
+    parser.add_argument('-l', '--log_lvl', type=int , help='Logging level', choices=[10,20,30], default=20)
+    args = parser.parse_args()
+
+    return args
+# ------------------------------
+def _get_index(path : str) -> pix.ParticleIndex:
+    if path is None:
+        return pix.ParticleIndex.build()
+
+    if os.path.isfile(path):
+        index = pix.ParticleIndex.load(path)
+        if index is not None:
+            return index
+
+    index = pix.ParticleIndex.build()
+    index.save(path)
+
+    return index
+# ------------------------------
+def main():
+    '''
+    Script starts here
+    '''
+    args = _parse_args()
+    LogStore.set_level('ap_utilities:query_decays'  , args.log_lvl)
+    LogStore.set_level('ap_utilities:particle_index', args.log_lvl)
+
+    index = _get_index(args.index)
+    if args.count:
+        print(index.count(all_of=args.all_of, any_of=args.any_of, none_of=args.none_of))
+        return
+
+    l_evt_type = index.query(all_of=args.all_of, any_of=args.any_of, none_of=args.none_of)
+    l_nickname = aput.read_decay_names(l_evt_type, missing='sentinel', sentinel='---').tolist()
+    d_decay    = nix.read_table('evt_dec')
+
+    for evt_type, nickname in zip(l_evt_type, l_nickname):
+        print(f'{evt_type:<12}{nickname:<60}{d_decay[evt_type]}')
+
+    nfound = len(l_evt_type)
+    log.info(f'Found {nfound} event types')
+# ------------------------------
+if __name__ == '__main__':
+    main()
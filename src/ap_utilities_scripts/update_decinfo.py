@@ -10,10 +10,11 @@ import glob
 from dataclasses           import dataclass
 from importlib.resources   import files
 
-import tqdm
-import yaml
+from ap_utilities.generic.lazy      import lazy_import
 from ap_utilities.logging.log_store import LogStore
 
+tqdm= lazy_import('tqdm')
+yaml= lazy_import('yaml')
 log=LogStore.add_logger('ap_utilities_scripts:update_decinfo')
 # ------------------------------
 @dataclass
@@ -4,9 +4,10 @@ formatted sample names
 '''
 from importlib.resources import files
 
-import yaml
+from ap_utilities.decays       import utilities as aput
+from ap_utilities.generic.lazy import lazy_import
 
-from ap_utilities.decays import utilities as aput
+yaml = lazy_import('yaml')
 
 # --------------------------------
 def _add_data_low_org(d_low_org : dict[str,str]) -> dict[str,str]:
@@ -1,6 +1,8 @@
 '''
 Script used to validate ntuples produced by AP pipelines
 '''
+from __future__ import annotations
+
 import os
 import glob
 import shutil
@@ -10,14 +12,14 @@ from typing              import ClassVar
 from dataclasses         import dataclass
 from concurrent.futures  import ThreadPoolExecutor, as_completed
 
-import tqdm
-import yaml
-import pandas as pnd
-
-from ROOT                            import TFile, TDirectoryFile, TTree # type: ignore
+from ap_utilities.generic.lazy       import lazy_import
 from ap_utilities.logging.log_store  import LogStore
 from ap_utilities.logfiles.log_info  import LogInfo
 
+tqdm= lazy_import('tqdm')
+yaml= lazy_import('yaml')
+pnd = lazy_import('pandas')
+ROOT= lazy_import('ROOT')
 log = LogStore.add_logger('ap_utilities_scripts:validate_ap_tuples')
 # -------------------------------
 @dataclass
@@ -28,6 +30,7 @@ class Data:
     pipeline_id : int
     config_path : str
     nthread     : int
+    log_cache   : Union[str,None]
     cfg         : dict
 
     d_tree_miss      : ClassVar[dict[str, list[str]]]     = {}
@@ -49,12 +52,14 @@ def _parse_args() -> None:
     parser.add_argument('-p','--pipeline', type=int, help='Pipeline ID', required=True)
     parser.add_argument('-f','--cfg_path', type=str, help='Path to config file with the description of how to validate', required=True)
     parser.add_argument('-l','--log_lvl' , type=int, help='Logging level', default=20, choices=[10,20,30])
-    parser.add_argument('-t','--nthread' , type=int, help='Number of threads', default=1)
+    parser.add_argument('-t','--nthread' , type=int, help='Number of threads, and of processes reading the logs', default=1)
+    parser.add_argument('-c','--log_cache', type=str, help='Path to SQLite file with counters of logs already read, reused by later runs')
     args = parser.parse_args()
 
     Data.pipeline_id = args.pipeline
     Data.config_path = args.cfg_path
     Data.nthread     = args.nthread
+    Data.log_cache   = args.log_cache
 
     LogStore.set_level('ap_utilities_scripts:validate_ap_tuples', args.log_lvl)
 # -------------------------------
@@ -135,13 +140,13 @@ def _add_to_dictionary(d_data : dict, identifier : str, key : str, value : int)
 
     d_data[identifier][key] = value
 # -------------------------------
-def _is_valid_reco_dir(sample : str, file_dir : TDirectoryFile) -> bool:
+def _is_valid_reco_dir(sample : str, file_dir : ROOT.TDirectoryFile) -> bool:
     if hasattr(file_dir, 'MCDecayTree'):
         nentries = file_dir.MCDecayTree.GetEntries()
         _add_to_dictionary(Data.d_tree_entries, sample, key=file_dir.GetName(), value=nentries)
         return False
 
-    if not hasattr(file_dir, 'DecayTree') or not isinstance(file_dir.DecayTree, TTree):
+    if not hasattr(file_dir, 'DecayTree') or not isinstance(file_dir.DecayTree, ROOT.TTree):
         _add_to_dictionary(Data.d_tree_entries, sample, key=file_dir.GetName(), value=0)
         return False
 
@@ -154,7 +159,7 @@ def _is_valid_reco_dir(sample : str, file_dir : TDirectoryFile) -> bool:
 
     return True
 # -------------------------------
-def _check_mcdt_entries(sample : str, l_dir : list[TDirectoryFile]) -> dict[str,int]:
+def _check_mcdt_entries(sample : str, l_dir : list[ROOT.TDirectoryFile]) -> dict[str,int]:
     '''
     Given a sample and a list of directories with a tree each
     If the MCDecayTree is not found return None, if it is found and the entries agree with what is in d_sample_entries
@@ -177,7 +182,7 @@ def _validate_trees(root_path : str) -> None:
     s_expected= set(l_expected)
 
     root_path = _copy_path(root_path)
-    rfile     = TFile(root_path)
+    rfile     = ROOT.TFile(root_path)
     l_key     = rfile.GetListOfKeys()
     l_dir     = [ key.ReadObj() for key in l_key if key.ReadObj().InheritsFrom('TDirectoryFile') ]
     s_found   = { fdir.GetName() for fdir in l_dir if _is_valid_reco_dir(sample, fdir)}
@@ -201,11 +206,23 @@ def _save_trees(sample : str, s_tree_name : set[str], d_data : dict[str, list[st
     l_tree_name = list(s_tree_name)
     d_data.update({sample : l_tree_name})
 # -------------------------------
-def _update_sample_stats(log_path : str) -> None:
-    sample   = _sample_from_path(log_path)
-    obj      = LogInfo(zip_path = log_path)
-
-    Data.d_sample_entries[sample] = obj.get_mcdt_entries(sample, fall_back=-1)
+def _update_sample_stats(l_out_path : list[str]) -> None:
+    '''
+    Reads the entries of MCDecayTree from the logs of the jobs with a ROOT file, all at once, in `nthread` processes
+    '''
+    d_log_path = {}
+    for job_path in l_out_path:
+        root_path = _get_file_path(job_path, ending='_2.tuple.root')
+        log_path  = _get_file_path(job_path, ending=         '.zip')
+        if log_path is not None and root_path is not None:
+            d_log_path[_sample_from_path(job_path)] = log_path
+
+    df     = LogInfo.batch(d_log_path, workers=Data.nthread, cache_path=Data.log_cache)
+    # Column is not boolean when there are no rows
+    df     = df[df.mcdt.astype(bool)]
+    d_entry= df.set_index('sample').value.to_dict()
+
+    Data.d_sample_entries.update({ sample : int(d_entry.get(sample, -1)) for sample in d_log_path })
 # -------------------------------
 def _check_job(sample : str, log_path : Union[str,None], root_path : Union[str,None]):
     if log_path is None:
@@ -233,7 +250,6 @@ def _validate_job(job_path : str) -> None:
         Data.l_missing_job.append(job_path)
         return
 
-    _update_sample_stats(log_path)
     _validate_root_file(root_path)
 # -------------------------------
 def _validate() -> None:
@@ -242,6 +258,7 @@ def _validate() -> None:
 
     npath = len(l_out_path)
     log.info(f'Checking {npath} jobs')
+    _update_sample_stats(l_out_path)
 
     if Data.nthread > 1:
         _validate_with_multithreading(l_out_path)
@@ -0,0 +1,105 @@
+'''
+Module with fixtures shared by tests
+'''
+import os
+import zipfile
+from typing import Callable, Union
+
+import pytest
+from omegaconf import OmegaConf, DictConfig
+
+from ap_utilities.decays.event_type_index import EventTypeIndex, to_event_types
+from dmu.generic                          import utilities as gut
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by fixtures
+    '''
+    fake_dirac_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_dirac')
+# --------------------------------------------------
+@pytest.fixture
+def fake_dirac(monkeypatch : pytest.MonkeyPatch, tmp_path) -> str:
+    '''
+    Makes the Dirac commands resolve to the fakes in `tests/fake_dirac`, see them for the
+    environment variables controlling their behaviour. Outputs go to a temporary $ANADIR.
+
+    Returns path to file where the fakes write each queried path
+    '''
+    log_path = str(tmp_path / 'dirac_calls.txt')
+
+    monkeypatch.setenv('PATH'          , f'{Data.fake_dirac_dir}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.setenv('ANADIR'        , str(tmp_path / 'ana_dir'))
+    monkeypatch.setenv('FAKE_DIRAC_LOG', log_path)
+
+    return log_path
+# --------------------------------------------------
+@pytest.fixture
+def make_section() -> Callable[[Union[int,None]],DictConfig]:
+    '''
+    Returns function taking a number of event types and returning the first section of `tests/rd_samples.yaml`,
+    with that many event types, the first ones of the naming tables, or the ones of the file if None
+    '''
+    def _make_section(nevent : Union[int,None] = None) -> DictConfig:
+        cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+        cfg = cfg.sections.one
+        if nevent is None:
+            return cfg
+
+        l_evt = to_event_types(EventTypeIndex.from_naming().codes[:nevent])
+
+        return OmegaConf.merge(cfg, {'evt_type' : l_evt})
+
+    return _make_section
+# --------------------------------------------------
+def read_calls(log_path : str) -> list[str]:
+    '''
+    Returns list of paths queried to the fake Dirac
+    '''
+    if not os.path.isfile(log_path):
+        return []
+
+    with open(log_path, encoding='utf-8') as ifile:
+        return ifile.read().splitlines()
+# --------------------------------------------------
+def _get_table(alg_name : str, nentries : Union[int,None]) -> list[str]:
+    '''
+    Returns lines printed by Gaudi with the counters of an algorithm, with the name clipped as in the logs
+    '''
+    l_line = [
+    f'{alg_name[:30]:<30}     INFO Number of counters : 2',
+    ' |    Counter                                      |     #     |    sum     | mean/eff^* | rms/err^*  |     min     |     max     |']
+    if nentries is not None:
+        l_line.append(f' | "# non-empty events for field MCDecayTree"      | {nentries:>9} | {nentries:>10} |     1.0000 |     0.0000 |      1.0000 |      1.0000 |')
+
+    l_line.append(f' | "# processed events"                            | {nentries or 100:>9} |')
+
+    return l_line
+# --------------------------------------------------
+def make_zip(
+        path      : str,
+        d_entries : dict[str,Union[int,None]],
+        nfill     : int  = 1000,
+        method    : int  = zipfile.ZIP_DEFLATED,
+        stopped   : bool = True) -> str:
+    '''
+    Makes zip file like the ones of AP jobs, with a DaVinci log that has a table of counters
+    for each algorithm, with the given number of non-empty events, after `nfill` lines.
+    Without `stopped`, the line before the finalization of the algorithms is missing
+    '''
+    l_line = [ f'EventLoopMgr         INFO Processing event {index}' for index in range(nfill) ]
+    if stopped:
+        l_line += ['ApplicationMgr       INFO Application Manager Stopped successfully']
+
+    for alg_name, nentries in d_entries.items():
+        l_line += _get_table(alg_name, nentries)
+
+    l_line += ['ApplicationMgr       INFO Application Manager Finalized successfully']
+    l_line += [ f'ToolSvc              INFO Removing tool {index}' for index in range(100) ]
+
+    with zipfile.ZipFile(path, 'w', compression=method) as zip_ref:
+        zip_ref.writestr('00012345_00000001/prodConf_DaVinci_00012345_00000001_1.py', 'options')
+        zip_ref.writestr('00012345_00000001/DaVinci_00012345_00000001_1.log', '\n'.join(l_line) + '\n')
+
+    return path
+# --------------------------------------------------
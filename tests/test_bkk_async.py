@@ -0,0 +1,101 @@
+'''
+Module with tests for the asyncio engine of BkkChecker
+'''
+import time
+import asyncio
+from typing     import Callable
+from contextlib import aclosing
+
+import yaml
+import pytest
+from conftest  import read_calls
+
+from ap_utilities.bookkeeping.bkk_checker   import BkkChecker
+from ap_utilities.bookkeeping.throttle      import Throttle
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    nevent  = 100
+    latency = 2.0
+# --------------------------------------------------
+def test_concurrent(fake_dirac : str, monkeypatch : pytest.MonkeyPatch, tmp_path, make_section : Callable) -> None:
+    '''
+    Hundreds of slow queries run at the same time and results keep input order
+    '''
+    monkeypatch.setenv('FAKE_DIRAC_LATENCY', str(Data.latency))
+    monkeypatch.setenv('FAKE_DIRAC_MISSING', '/1110')
+
+    cfg   = make_section(Data.nevent)
+    start = time.monotonic()
+    BkkChecker('many', cfg).save(nthreads=Data.nevent, engine='asyncio')
+    total = time.monotonic() - start
+
+    assert len(read_calls(fake_dirac)) == Data.nevent
+    # Serially this would take nevent * latency, most of the time left is spent starting the fake
+    assert total < 0.2 * Data.nevent * Data.latency
+
+    l_found = [ evt for evt in cfg.evt_type if not evt.startswith('1110') ]
+    out_dir = tmp_path / 'ana_dir/bkk_checker/many'
+    with open(out_dir / 'info.yaml', encoding='utf-8') as ifile:
+        l_line = ifile.read().splitlines()
+
+    assert len(l_line) == len(l_found)
+    for line, evt in zip(l_line, l_found):
+        assert f'"{evt}"' in line
+# --------------------------------------------------
+def test_timeout(fake_dirac : str, monkeypatch : pytest.MonkeyPatch, tmp_path, make_section : Callable) -> None:
+    '''
+    Queries slower than the timeout are killed and their samples are not checked
+    '''
+    monkeypatch.setenv('FAKE_DIRAC_LATENCY', '30')
+
+    start = time.monotonic()
+    BkkChecker('slow', make_section(4), throttle=Throttle(ntry=1)).save(nthreads=4, engine='asyncio', timeout=2)
+
+    assert time.monotonic() - start < 10
+    assert len(read_calls(fake_dirac)) == 4
+
+    out_dir = tmp_path / 'ana_dir/bkk_checker/slow'
+    with open(out_dir / 'info.yaml', encoding='utf-8') as ifile:
+        assert ifile.read() == ''
+
+    with open(out_dir / 'unchecked.yaml', encoding='utf-8') as ifile:
+        d_unchecked = yaml.safe_load(ifile)
+
+    assert len(d_unchecked) == 4
+    assert all(d_data['reason'] == 'failed' for d_data in d_unchecked.values())
+# --------------------------------------------------
+def test_iter_found(fake_dirac : str, monkeypatch : pytest.MonkeyPatch, make_section : Callable) -> None:
+    '''
+    Results are streamed as queries finish and leaving early cancels the rest
+    '''
+    monkeypatch.setenv('FAKE_DIRAC_LATENCY', '0.5')
+    obj = BkkChecker('stream', make_section(20))
+
+    async def _first() -> tuple[str,bool]:
+        async with aclosing(obj.iter_found(nconcurrent=4)) as results:
+            async for result in results:
+                return result
+
+        raise ValueError('No result')
+
+    start            = time.monotonic()
+    event_type, found= asyncio.run(_first())
+
+    assert time.monotonic() - start < 5
+    assert found
+    assert event_type in obj._l_event_type # pylint: disable=protected-access
+    assert len(read_calls(fake_dirac)) < 20
+# --------------------------------------------------
+def test_invalid_engine(fake_dirac : str, make_section : Callable) -> None:
+    '''
+    Unknown engines are rejected
+    '''
+    with pytest.raises(ValueError):
+        BkkChecker('bad', make_section(2)).save(engine='processes')
+
+    assert read_calls(fake_dirac) == []
+# --------------------------------------------------
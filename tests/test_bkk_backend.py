@@ -0,0 +1,151 @@
+'''
+Module with tests for the backends used by BkkChecker
+'''
+import os
+import time
+from typing import Callable
+
+import pytest
+from conftest  import read_calls
+
+from ap_utilities.bookkeeping.bkk_checker import BkkChecker
+from ap_utilities.bookkeeping             import bkk_backend as bkb
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    nevent  = 20
+    bkk     = '/MC/2024/Beam6800GeV-2024.W31.34-MagUp-Nu6.3-25ns-Pythia8/Sim10d/HLT2-2024.W31.34/11102211/HLT2.DST'
+# --------------------------------------------------
+def _read_info(tmp_path, name : str) -> str:
+    with open(tmp_path / f'ana_dir/bkk_checker/{name}/info.yaml', encoding='utf-8') as ifile:
+        return ifile.read()
+# --------------------------------------------------
+def test_fake(fake_dirac : str, tmp_path, make_section : Callable) -> None:
+    '''
+    In process backend gives the same results as the Dirac command, without starting it
+    '''
+    cfg     = make_section(Data.nevent)
+    backend = bkb.FakeBackend(missing=['/1000'])
+
+    BkkChecker('fake', cfg, backend=backend).save(nthreads=4)
+    assert len(backend.calls) == Data.nevent
+    assert read_calls(fake_dirac) == []
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('FAKE_DIRAC_MISSING', '/1000')
+        BkkChecker('command', cfg).save()
+
+    assert len(read_calls(fake_dirac)) == Data.nevent
+    assert _read_info(tmp_path, 'fake') == _read_info(tmp_path, 'command')
+    assert '10000000' not in _read_info(tmp_path, 'fake')
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_worker(fake_dirac : str, tmp_path, engine : str, make_section : Callable) -> None:
+    '''
+    Queries of several sections go through the same, long lived, processes
+    '''
+    cfg = make_section(Data.nevent)
+    with bkb.WorkerBackend(nworker=3, kind='fake') as backend:
+        BkkChecker('first' , cfg, backend=backend).save(nthreads=3, engine=engine)
+        BkkChecker('second', cfg, backend=backend).save(nthreads=3, engine=engine)
+
+        assert backend._nstart == 3 # pylint: disable=protected-access
+
+    assert len(read_calls(fake_dirac)) == 2 * Data.nevent
+
+    BkkChecker('command', cfg).save()
+    assert _read_info(tmp_path, 'first') == _read_info(tmp_path, 'command')
+    assert _read_info(tmp_path, 'second') == _read_info(tmp_path, 'command')
+# --------------------------------------------------
+def test_worker_timeout(fake_dirac : str, monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Worker that does not answer in time is replaced
+    '''
+    monkeypatch.setenv('FAKE_DIRAC_LATENCY', '3')
+    with bkb.WorkerBackend(kind='fake') as backend:
+        assert backend.query(Data.bkk, timeout=0.5) is None
+
+        monkeypatch.setenv('FAKE_DIRAC_LATENCY', '0')
+        stdout = backend.query(Data.bkk, timeout=10)
+
+        assert backend._nstart == 2 # pylint: disable=protected-access
+
+    assert stdout == bkb.FakeBackend().query(Data.bkk)
+    assert len(read_calls(fake_dirac)) == 2
+# --------------------------------------------------
+def test_worker_error(fake_dirac : str, monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Failed queries raise and the worker is kept
+    '''
+    monkeypatch.setenv('FAKE_DIRAC_FAIL', '1')
+    with bkb.WorkerBackend(kind='fake') as backend:
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match='overloaded'):
+                backend.query(Data.bkk)
+
+        assert backend._nstart == 1 # pylint: disable=protected-access
+
+    assert len(read_calls(fake_dirac)) == 2
+# --------------------------------------------------
+def test_worker_died(fake_dirac : str) -> None:
+    '''
+    Worker that cannot be written to fails the query as a RuntimeError, such that it is retried, and is replaced
+    '''
+    with bkb.WorkerBackend(kind='fake') as backend:
+        backend.query(Data.bkk)
+
+        # Pipe nobody reads, as the one of a worker that died after its last query
+        [proc]            = backend._l_proc # pylint: disable=protected-access
+        fd_read, fd_write = os.pipe()
+        os.close(fd_read)
+        proc.stdin.close()
+        proc.stdin = os.fdopen(fd_write, 'w')
+
+        with pytest.raises(RuntimeError, match='Cannot query worker'):
+            backend.query(Data.bkk)
+
+        assert backend.query(Data.bkk) == bkb.FakeBackend().query(Data.bkk)
+        assert backend._nstart == 2 # pylint: disable=protected-access
+
+    assert len(read_calls(fake_dirac)) == 2
+# --------------------------------------------------
+def test_read_line() -> None:
+    '''
+    Timeout also applies to answers that stop in the middle of the line
+    '''
+    fd_read, fd_write = os.pipe()
+    os.write(fd_write, b'{"path" : "/MC/')
+
+    start = time.monotonic()
+    assert bkb._read_line(fd_read, timeout=0.5) is None # pylint: disable=protected-access
+    assert time.monotonic() - start < 2
+
+    os.write(fd_write, b'found"}\n')
+    assert bkb._read_line(fd_read, timeout=0.5) == 'found"}\n' # pylint: disable=protected-access
+
+    os.close(fd_write)
+    assert bkb._read_line(fd_read, timeout=0.5) == '' # pylint: disable=protected-access
+    os.close(fd_read)
+# --------------------------------------------------
+def test_invalid() -> None:
+    '''
+    Unknown backends are rejected
+    '''
+    with pytest.raises(ValueError):
+        bkb.get_backend('grid')
+# --------------------------------------------------
+def test_abstract() -> None:
+    '''
+    Backends without query cannot be made
+    '''
+    class NoQuery(bkb.BkkBackend):
+        '''
+        Backend missing query
+        '''
+
+    with pytest.raises(TypeError):
+        NoQuery() # pylint: disable=abstract-class-instantiated
+# --------------------------------------------------
@@ -0,0 +1,56 @@
+'''
+Module with tests for BkkCache class
+'''
+import time
+
+from conftest import read_calls
+
+from ap_utilities.bookkeeping.bkk_cache   import BkkCache
+from ap_utilities.bookkeeping.bkk_checker import BkkChecker
+from dmu.generic                          import utilities as gut
+
+# --------------------------------------------------
+def test_expiration(tmp_path) -> None:
+    '''
+    Paths with and without files expire after their own times
+    '''
+    cache = BkkCache(path=str(tmp_path / 'cache.sqlite'), ttl_found=100, ttl_missing=0.1)
+    cache.put('/MC/found'  , 3, 'three files')
+    cache.put('/MC/missing', 0, 'no files')
+
+    assert cache.get('/MC/found'  ) == (3, 'three files')
+    assert cache.get('/MC/missing') == (0, 'no files')
+    assert cache.get('/MC/other'  ) is None
+
+    time.sleep(0.2)
+    assert cache.get('/MC/found'  ) == (3, 'three files')
+    assert cache.get('/MC/missing') is None
+# --------------------------------------------------
+def test_refresh(tmp_path) -> None:
+    '''
+    When refreshing, nothing is read, but results are written
+    '''
+    path  = str(tmp_path / 'cache.sqlite')
+    cache = BkkCache(path=path, refresh=True)
+    cache.put('/MC/found', 3, 'three files')
+
+    assert cache.get('/MC/found') is None
+    assert BkkCache(path=path).get('/MC/found') == (3, 'three files')
+# --------------------------------------------------
+def test_checker(fake_dirac : str, tmp_path) -> None:
+    '''
+    Second run only queries Dirac for paths not in the cache
+    '''
+    d_cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    cfg   = d_cfg['sections']['one']
+    path  = str(tmp_path / 'cache.sqlite')
+
+    BkkChecker('one', cfg, cache=BkkCache(path=path)).save()
+    assert len(read_calls(fake_dirac)) == 2
+
+    BkkChecker('one', cfg, cache=BkkCache(path=path)).save()
+    assert len(read_calls(fake_dirac)) == 2
+
+    BkkChecker('one', cfg, cache=BkkCache(path=path, refresh=True)).save()
+    assert len(read_calls(fake_dirac)) == 4
+# --------------------------------------------------
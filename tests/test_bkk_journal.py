@@ -0,0 +1,114 @@
+'''
+Module with tests for BkkJournal class
+'''
+import os
+import json
+
+import pytest
+from conftest import read_calls
+
+from ap_utilities.bookkeeping.bkk_journal   import BkkJournal
+from ap_utilities.bookkeeping.bkk_checker   import BkkChecker
+from ap_utilities.bookkeeping.bkk_scheduler import BkkScheduler
+from ap_utilities.bookkeeping.bkk_backend   import FakeBackend
+from ap_utilities.io                        import utilities as iout
+from dmu.generic                            import utilities as gut
+
+# --------------------------------------------------
+def test_resume(tmp_path) -> None:
+    '''
+    Results are read back only when resuming, a line cut by a crash is skipped and
+    does not take with it the result appended after it
+    '''
+    path = str(tmp_path / 'journal.jsonl')
+    with BkkJournal(path=path) as journal:
+        journal.put('/MC/found'  , 3, 'three files')
+        journal.put('/MC/missing', 0, 'no files')
+
+    with open(path, 'a', encoding='utf-8') as ofile:
+        ofile.write('{"path" : "/MC/cut", "nfi')
+
+    with BkkJournal(path=path, resume=True) as journal:
+        assert journal.paths == ['/MC/found', '/MC/missing']
+        assert journal.get('/MC/found'  ) == (3, 'three files')
+        assert journal.get('/MC/missing') == (0, 'no files')
+        assert journal.get('/MC/cut'    ) is None
+        journal.put('/MC/new'  , 1, 'one file')
+        journal.put('/MC/other', 2, 'two files')
+
+    with BkkJournal(path=path, resume=True) as journal:
+        assert journal.paths == ['/MC/found', '/MC/missing', '/MC/new', '/MC/other']
+        assert journal.get('/MC/new') == (1, 'one file')
+
+    with BkkJournal(path=path) as journal:
+        assert journal.paths == []
+        assert journal.get('/MC/found') is None
+# --------------------------------------------------
+def test_interrupted(fake_dirac : str, tmp_path) -> None:
+    '''
+    Run interrupted by failing queries, is resumed querying only what is missing from journal
+    '''
+    cfg  = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    path = str(tmp_path / 'journal.jsonl')
+
+    class Interrupted(Exception):
+        '''
+        Stands for the job being killed
+        '''
+
+    class InterruptedBackend(FakeBackend):
+        '''
+        Backend killing the run after the first queries
+        '''
+        def query(self, bkk : str, timeout = None):
+            if len(self.calls) == 3:
+                raise Interrupted()
+
+            return super().query(bkk, timeout=timeout)
+
+    with BkkJournal(path=path) as journal, pytest.raises(Interrupted):
+        BkkScheduler(cfg, backend=InterruptedBackend(), journal=journal).save()
+
+    with open(path, encoding='utf-8') as ifile:
+        l_path = [ json.loads(line)['path'] for line in ifile ]
+
+    assert len(l_path) == 3
+
+    backend = FakeBackend()
+    with BkkJournal(path=path, resume=True) as journal:
+        scheduler = BkkScheduler(cfg, backend=backend, journal=journal)
+        scheduler.save()
+
+        assert sorted(backend.calls + l_path) == sorted(scheduler.paths)
+        assert sorted(journal.paths)          == sorted(scheduler.paths)
+
+    # Resumed run gives same outputs as a full one
+    d_info = {}
+    for name in cfg.sections:
+        with open(tmp_path / f'ana_dir/bkk_checker/{name}/info.yaml', encoding='utf-8') as ifile:
+            d_info[name] = ifile.read()
+
+    for name, section in cfg.sections.items():
+        BkkChecker(name, section).save()
+        with open(tmp_path / f'ana_dir/bkk_checker/{name}/info.yaml', encoding='utf-8') as ifile:
+            assert ifile.read() == d_info[name]
+
+    assert len(read_calls(fake_dirac)) == len(scheduler.paths)
+# --------------------------------------------------
+def test_open_atomic(tmp_path) -> None:
+    '''
+    File is only replaced if writing it finished
+    '''
+    path = str(tmp_path / 'info.yaml')
+    with iout.open_atomic(path) as ofile:
+        ofile.write('old')
+
+    with pytest.raises(KeyboardInterrupt), iout.open_atomic(path) as ofile:
+        ofile.write('partial')
+        raise KeyboardInterrupt
+
+    with open(path, encoding='utf-8') as ifile:
+        assert ifile.read() == 'old'
+
+    assert os.listdir(tmp_path) == ['info.yaml']
+# --------------------------------------------------
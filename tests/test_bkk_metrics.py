@@ -0,0 +1,97 @@
+'''
+Module with tests for QueryMetrics class
+'''
+import json
+from typing import Callable
+
+import pytest
+
+from ap_utilities.bookkeeping.bkk_metrics import QueryMetrics
+from ap_utilities.bookkeeping.bkk_checker import BkkChecker
+from ap_utilities.bookkeeping.bkk_backend import FakeBackend, SubprocessBackend
+
+# --------------------------------------------------
+def test_summary() -> None:
+    '''
+    Quantiles and gauges from known measurements
+    '''
+    metrics = QueryMetrics()
+    for value in range(1, 101):
+        metrics.record('wait', value / 1000)
+
+    for depth in [3, 2, 1, 0]:
+        metrics.record_depth(depth)
+
+    d_summary = metrics.get_summary()
+    d_wait    = d_summary['stages']['wait']
+
+    assert list(d_summary['stages']) == ['wait']
+    assert d_wait['count'] == 100
+    assert d_wait['p50'  ] == pytest.approx(0.0505)
+    assert d_wait['p99'  ] == pytest.approx(0.09901)
+    assert d_wait['max'  ] == pytest.approx(0.100)
+    assert d_summary['queue'] == {'mean' : 1.5, 'max' : 3}
+
+    with pytest.raises(ValueError):
+        metrics.record('sleep', 1)
+# --------------------------------------------------
+def test_export(tmp_path) -> None:
+    '''
+    Summary is saved as JSON or in Prometheus format
+    '''
+    metrics = QueryMetrics()
+    with metrics.query():
+        metrics.record('wait', 0.5)
+
+    metrics.save(str(tmp_path / 'metrics.json'))
+    metrics.save(str(tmp_path / 'metrics.prom'))
+
+    d_summary = json.loads((tmp_path / 'metrics.json').read_text())
+    assert d_summary['stages']['wait']['sum'] == 0.5
+    assert d_summary['in_flight']['max'] == 1
+
+    l_line = (tmp_path / 'metrics.prom').read_text().splitlines()
+    assert '# TYPE bkk_query_stage_seconds summary'                   in l_line
+    assert 'bkk_query_stage_seconds{stage="wait",quantile="0.5"} 0.5' in l_line
+    assert 'bkk_query_stage_seconds_count{stage="query"} 1'           in l_line
+    assert 'bkk_in_flight_max 1'                                      in l_line
+    # Every sample line is a name, with optional labels, and a number
+    for line in l_line:
+        if not line.startswith('#'):
+            float(line.split(' ')[-1])
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_checker(fake_dirac : str, engine : str, make_section : Callable) -> None:
+    '''
+    Stages of the queries made by the checker are measured
+    '''
+    _       = fake_dirac
+    metrics = QueryMetrics()
+    obj     = BkkChecker('one', make_section(), backend=FakeBackend(latency=0.1), metrics=metrics)
+    obj.save(nthreads=2, engine=engine)
+
+    d_summary = metrics.get_summary()
+    d_stage   = d_summary['stages']
+    assert sorted(d_stage) == ['parse', 'query', 'wait', 'write']
+    assert all(d_stat['count'] == 2 for d_stat in d_stage.values())
+    assert d_stage['wait']['p50'] >= 0.1
+    assert d_stage['query']['max'] >= d_stage['wait']['max']
+    # Query includes the stages after the backend answers
+    assert d_stage['query']['sum'] >= sum(d_stage[stage]['sum'] for stage in ['wait', 'parse', 'write'])
+    assert d_summary['in_flight']['max'] <= 2
+    assert d_summary['queue']['max'] == 1
+    assert d_summary['throughput'] > 0
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_subprocess(fake_dirac : str, engine : str, make_section : Callable) -> None:
+    '''
+    Starting Dirac is measured apart from waiting for it
+    '''
+    _   = fake_dirac
+    obj = BkkChecker('one', make_section(), backend=SubprocessBackend())
+    obj.save(engine=engine)
+
+    d_stage = obj.metrics.get_summary()['stages']
+    assert d_stage['spawn']['count'] == 2
+    assert d_stage['wait' ]['count'] == 2
+# --------------------------------------------------
@@ -0,0 +1,95 @@
+'''
+Module with tests for BkkPath class
+'''
+import os
+
+import pytest
+from omegaconf import OmegaConf
+
+from ap_utilities.bookkeeping.bkk_path      import BkkPath
+from ap_utilities.bookkeeping.bkk_scheduler import BkkScheduler
+from ap_utilities.bookkeeping.bkk_checker   import get_event_types
+from dmu.generic                            import utilities as gut
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store shared attributes
+    '''
+    d_settings = {
+            'year'     : 2024,
+            'block_id' : '2024.W35.37',
+            'hlt_conf' : '2024.W35.39',
+            'polarity' : 'MagUp',
+            'nu_path'  : 'Nu6.3',
+            'sim_vers' : 'Sim10d',
+            'generator': 'Pythia8'}
+# --------------------------------------------------
+def test_default() -> None:
+    '''
+    Settings without template use the default one
+    '''
+    obj = BkkPath(OmegaConf.create(Data.d_settings))
+
+    assert obj.get_path('11102211') == '/MC/2024/Beam6800GeV-2024.W35.37-MagUp-Nu6.3-25ns-Pythia8/Sim10d/HLT2-2024.W35.39/11102211/HLT2.DST'
+    assert obj.get_paths(['11102211', '11102202']) == [obj.get_path('11102211'), obj.get_path('11102202')]
+# --------------------------------------------------
+def test_default_block() -> None:
+    '''
+    Settings without template, of a block with samples in other paths
+    '''
+    settings = OmegaConf.create({**Data.d_settings, 'block_id' : '2024.W31.34', 'hlt_conf' : '2024.W31.34'})
+    obj      = BkkPath(settings)
+
+    assert obj.get_path('11102211') == '/MC/2024/Beam6800GeV-2024.W31.34-MagUp-Nu6.3-25ns-Pythia8/Sim10d/HLT1_2024.W31.34_noUT/HLT2-2024.W31.34/11102211/HLT2.DST'
+# --------------------------------------------------
+def test_override() -> None:
+    '''
+    Block with its own template
+    '''
+    cfg = gut.load_conf(package='ap_utilities_data', fpath='samples/2024.yaml')
+    l_path = [ BkkPath(section.settings).get_path('11102211') for section in cfg.sections.values() ]
+
+    assert l_path[0] == '/MC/2024/Beam6800GeV-2024.W31.34-MagUp-Nu6.3-25ns-Pythia8/Sim10d/HLT1_2024.W31.34_noUT/HLT2-2024.W31.34/11102211/HLT2.DST'
+    assert all('noUT' not in path for path in l_path[1:])
+# --------------------------------------------------
+@pytest.mark.parametrize('template', [
+    '/MC/{year}/{block}/{event_type}/HLT2.DST',
+    '/MC/{year}/HLT2.DST',
+    '/MC/{year}/{event_type}/{event_type}/HLT2.DST',
+    '/MC/{year:>6}/{event_type}/HLT2.DST',
+    '/MC/{}/{event_type}/HLT2.DST'])
+def test_invalid(template : str) -> None:
+    '''
+    Templates with unknown fields, or without a single event type, are rejected when loading
+    '''
+    settings = OmegaConf.create({**Data.d_settings, 'bkk_path' : template})
+    with pytest.raises(ValueError):
+        BkkPath(settings)
+# --------------------------------------------------
+def test_path_matrix(tmp_path, monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Paths of every section, without querying
+    '''
+    monkeypatch.setenv('ANADIR', str(tmp_path))
+
+    cfg    = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    d_path = BkkScheduler(cfg).get_path_matrix()
+
+    assert list(d_path) == ['one', 'two', 'three']
+    assert d_path['one'][0] == '/MC/2024/Beam6800GeV-2024.W31.34-MagUp-Nu6.3-25ns-Pythia8/Sim10d/HLT1_2024.W31.34_noUT/HLT2-2024.W31.34/11102211/HLT2.DST'
+    assert [ path.split('/')[-2] for path in d_path['three'] ] == ['14143013', '14113032']
+    assert 'Sim10d-SplitSim02' in d_path['two'][1]
+# --------------------------------------------------
+def test_paths_without_checker(tmp_path, monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Paths of a section, from its settings and samples, are the ones of the checker, without writing anything
+    '''
+    monkeypatch.setenv('ANADIR', str(tmp_path))
+
+    cfg    = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    d_path = { name : list(dict.fromkeys(BkkPath(section.settings).get_paths(get_event_types(section)))) for name, section in cfg.sections.items() }
+
+    assert os.listdir(tmp_path) == []
+    assert d_path == BkkScheduler(cfg).get_path_matrix()
+# --------------------------------------------------
@@ -0,0 +1,93 @@
+'''
+Module with tests for BkkScheduler class
+'''
+import yaml
+import pytest
+from omegaconf import OmegaConf
+
+from ap_utilities.bookkeeping.bkk_scheduler import BkkScheduler
+from ap_utilities.bookkeeping.bkk_checker   import BkkChecker
+from ap_utilities.bookkeeping.bkk_backend   import FakeBackend
+from dmu.generic                            import utilities as gut
+
+# --------------------------------------------------
+def _get_config():
+    '''
+    Config with sections of rd_samples.yaml plus a copy of the first one, with the same paths
+    '''
+    cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    d_copy = OmegaConf.to_container(cfg.sections.one)
+    d_copy['suffix'] = '_copy'
+
+    return OmegaConf.merge(cfg, {'sections' : {'copy' : d_copy}})
+# --------------------------------------------------
+def _read(tmp_path, name : str, kind : str) -> str:
+    with open(tmp_path / f'ana_dir/bkk_checker/{name}/{kind}.yaml', encoding='utf-8') as ifile:
+        return ifile.read()
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_save(fake_dirac : str, tmp_path, engine : str) -> None:
+    '''
+    Each path is queried once and outputs match the ones of BkkChecker
+    '''
+    _   = fake_dirac
+    cfg = _get_config()
+
+    backend = FakeBackend(missing=['/11102202/'])
+    obj     = BkkScheduler(cfg, backend=backend)
+    assert len(obj.paths) == 6
+
+    obj.save(nthreads=4, engine=engine)
+    assert sorted(backend.calls) == sorted(obj.paths)
+
+    d_info = { name : _read(tmp_path, name, 'info') for name in cfg.sections }
+    d_vali = { name : _read(tmp_path, name, 'validation') for name in cfg.sections }
+
+    assert d_info['copy'].replace(' ', '') == d_info['one'].replace(' ', '').replace('_first', '_copy')
+    for name, section in cfg.sections.items():
+        BkkChecker(name, section, backend=FakeBackend(missing=['/11102202/'])).save()
+
+        assert _read(tmp_path, name, 'info'      ) == d_info[name]
+        assert _read(tmp_path, name, 'validation') == d_vali[name]
+
+    assert '11102202' not in d_info['one']
+    assert '11102211'     in d_info['one']
+# --------------------------------------------------
+def test_dry(fake_dirac : str, tmp_path) -> None:
+    '''
+    Dry run does not query anything
+    '''
+    _       = fake_dirac
+    backend = FakeBackend()
+    BkkScheduler(_get_config(), backend=backend).save(dry=True)
+
+    assert backend.calls == []
+    assert '11102202' in _read(tmp_path, 'copy', 'info')
+# --------------------------------------------------
+def test_budget(fake_dirac : str, tmp_path) -> None:
+    '''
+    With little time, urgent samples are checked and the rest listed as unchecked
+    '''
+    _   = fake_dirac
+    cfg = _get_config()
+    for section in cfg.sections.values():
+        section['priority'] = [1, 0]
+
+    # One thread per urgent path
+    backend = FakeBackend(latency=0.5)
+    BkkScheduler(cfg, backend=backend).save(nthreads=3, budget=0.2)
+
+    assert len(backend.calls) == 3
+    for name, section in cfg.sections.items():
+        urgent, other = section.evt_type[1], section.evt_type[0]
+        d_unchecked   = yaml.safe_load(_read(tmp_path, name, 'unchecked'))
+
+        assert list(d_unchecked) == [other]
+        assert d_unchecked[other]['priority'] == 1
+        assert urgent     in _read(tmp_path, name, 'info')
+        assert other  not in _read(tmp_path, name, 'info')
+
+    # Complete run removes list
+    BkkScheduler(cfg, backend=FakeBackend()).save()
+    assert not (tmp_path / 'ana_dir/bkk_checker/one/unchecked.yaml').exists()
+# --------------------------------------------------
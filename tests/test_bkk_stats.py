@@ -0,0 +1,135 @@
+'''
+Module with tests for BkkStats and StatsStore classes
+'''
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ap_utilities.bookkeeping.bkk_stats     import BkkStats, StatsStore
+from ap_utilities.bookkeeping.bkk_backend   import FakeBackend, get_stats_output
+from ap_utilities.bookkeeping.bkk_scheduler import BkkScheduler
+from dmu.generic                            import utilities as gut
+
+# --------------------------------------------------
+def test_from_stdout() -> None:
+    '''
+    Statistics are read with their units
+    '''
+    stdout = get_stats_output('/MC/found', nfile=3, nevent=1234567, size=2.5e9, lumi=0.567)
+    stats  = BkkStats.from_stdout('one', '/MC/found', stdout)
+
+    assert stats.found
+    assert stats.nfile  == 3
+    assert stats.nevent == 1234567
+    assert stats.size   == pytest.approx(2.5e9)
+    assert stats.lumi   == pytest.approx(0.567)
+    assert stats.stdout == stdout
+
+    stdout = get_stats_output('/MC/missing', nfile=None, nevent=None, size=None, lumi=None)
+    stats  = BkkStats.from_stdout('one', '/MC/missing', stdout)
+
+    assert not stats.found
+    assert (stats.nfile, stats.nevent, stats.size, stats.lumi) == (0, None, None, None)
+
+    stats  = BkkStats.from_stdout('one', '/MC/other', 'Nb of Files      :  2\nTotal size       :  1.5 TB\nLuminosity       :  2 /fb\n')
+    assert stats.size == pytest.approx(1.5e12)
+    assert stats.lumi == pytest.approx(2e3)
+# --------------------------------------------------
+def test_store(tmp_path) -> None:
+    '''
+    Statistics put from many threads are all written, in batches, and can be queried
+    '''
+    path = str(tmp_path / 'stats.sqlite')
+
+    def _put(index : int) -> None:
+        nfile  = index % 3
+        stdout = get_stats_output(f'/MC/{index:03}', nfile=nfile or None, nevent=10 * nfile, size=1e6, lumi=1.)
+        store.put(BkkStats.from_stdout(f'section_{index % 2}', f'/MC/{index:03}', stdout))
+
+    with StatsStore(path=path, nbatch=7) as store:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(_put, range(300)))
+
+        assert len(store.select())                                == 300
+        assert len(store.select(section='section_0'))             == 150
+        assert len(store.select(found=False))                     == 100
+        assert len(store.select(section='section_1', found=True)) == 100
+
+        stats = store.get('section_1', '/MC/005')
+        assert (stats.nfile, stats.nevent) == (2, 20)
+        assert store.get('section_0', '/MC/005') is None
+
+    # Replaced, not duplicated, by a later run
+    with StatsStore(path=path) as store:
+        store.put(BkkStats.from_stdout('section_1', '/MC/005', 'Nb of Files      :  None'))
+        assert len(store.select()) == 300
+        assert not store.get('section_1', '/MC/005').found
+# --------------------------------------------------
+def test_flush_while_putting(tmp_path) -> None:
+    '''
+    Statistics put while flushing go to a new writer, nothing is lost and flushing does not hang
+    '''
+    with StatsStore(path=str(tmp_path / 'stats.sqlite'), nbatch=3) as store:
+        def _put(index : int) -> None:
+            store.put(BkkStats.from_stdout('one', f'/MC/{index:03}', 'Nb of Files      :  None'))
+            if index % 5 == 0:
+                store.flush()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [ executor.submit(_put, index) for index in range(200) ]:
+                future.result(timeout=10)
+
+        assert len(store.select()) == 200
+# --------------------------------------------------
+def test_put_no_wait(tmp_path) -> None:
+    '''
+    Putting statistics does not wait for the writer while it uses the file
+    '''
+    with StatsStore(path=str(tmp_path / 'stats.sqlite')) as store:
+        store.put(BkkStats.from_stdout('one', '/MC/first', 'Nb of Files      :  None'))
+        # Holds the file, as the writer does while committing
+        with store._db_lock: # pylint: disable=protected-access
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(store.put, BkkStats.from_stdout('one', '/MC/second', 'Nb of Files      :  None'))
+                future.result(timeout=5)
+
+        assert [ stats.path for stats in store.select() ] == ['/MC/first', '/MC/second']
+# --------------------------------------------------
+def test_scheduler(fake_dirac : str, tmp_path) -> None:
+    '''
+    Statistics of every section go to one file, not one file per path
+    '''
+    _   = fake_dirac
+    cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+
+    with BkkScheduler(cfg, backend=FakeBackend(missing=['/11102202/'])) as obj:
+        obj.save()
+
+    out_dir = tmp_path / 'ana_dir/bkk_checker'
+    for name in cfg.sections:
+        assert sorted(os.listdir(out_dir / name)) == ['info.yaml', 'validation.yaml']
+
+    store   = StatsStore(path=str(out_dir / 'stats.sqlite'))
+    l_stats = store.select(section='one')
+    assert len(l_stats) == 2
+    for stats in l_stats:
+        assert stats.found == ('/11102202/' not in stats.path)
+        if stats.found:
+            assert stats.nevent == 1000 * stats.nfile
+
+    assert len(store.select()) == sum(len(section.evt_type) for section in cfg.sections.values())
+# --------------------------------------------------
+def test_close_passed_store(fake_dirac : str, tmp_path) -> None:
+    '''
+    A store passed to the scheduler is left open when the scheduler is closed
+    '''
+    _   = fake_dirac
+    cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+
+    with StatsStore(path=str(tmp_path / 'stats.sqlite')) as store:
+        with BkkScheduler(cfg, backend=FakeBackend(), store=store) as obj:
+            obj.save()
+
+        assert len(store.select()) == sum(len(section.evt_type) for section in cfg.sections.values())
+# --------------------------------------------------
@@ -0,0 +1,76 @@
+'''
+Module with tests for functions in counter_parser.py
+'''
+import pytest
+
+from ap_utilities.logfiles import counter_parser as cpr
+
+# ----------------------------
+class Data:
+    '''
+    Class storing shared data
+    '''
+    l_line = [
+    'ApplicationMgr       INFO Application Manager Configured successfully',
+    'EventLoopMgr         INFO Processing event 0',
+    'Bu_Kee_eq_btosllball05_DPC     INFO Number of counters : 3',
+    ' |    Counter                                      |     #     |    sum     | mean/eff^* | rms/err^*  |     min     |     max     |',
+    ' | "# non-empty events for field MCDecayTree"      |     13584 |      13584 |     1.0000 |     0.0000 |      1.0000 |      1.0000 |',
+    ' | "# candidates"                                  |     13584 |      27168 |     2.0000 |     0.5000 |      1.0000 |      4.0000 |',
+    ' |*"# passed"                                      |       100 |         50 |( 50.00000 +- 5.000000)% |',
+    'Bd_Kstee_eq_btosllball05_DPC   INFO Number of counters : 1',
+    ' |    Counter                                      |     #     |    sum     | mean/eff^* | rms/err^*  |     min     |     max     |',
+    ' | "# non-empty events for field MCDecayTree"      |      2000 |       2000 |     1.0000 |     0.0000 |      1.0000 |      1.0000 |',
+    'Bu_Kee_eq_btosllball05_DPC     INFO Number of counters : 1',
+    ' | "# non-empty events for field MCDecayTree"      |         1 |          1 |     1.0000 |     0.0000 |      1.0000 |      1.0000 |',
+    'ApplicationMgr       INFO Application Manager Finalized successfully',
+    'Later_alg                      INFO Number of counters : 1',
+    ]
+# ----------------------------
+def test_row() -> None:
+    '''
+    Rows with plain and efficiency counters, header is skipped
+    '''
+    counter = cpr.parse_row(Data.l_line[5])
+    assert counter == cpr.Counter('# candidates', 13584, 27168., 2., 0.5, 1., 4.)
+
+    counter = cpr.parse_row(Data.l_line[6])
+    assert counter.efficiency
+    assert (counter.name, counter.count, counter.sum) == ('# passed', 100, 50.)
+    assert counter.mean == pytest.approx(0.5)
+    assert counter.rms  == pytest.approx(0.05)
+    assert counter.max  is None
+
+    assert cpr.parse_row(Data.l_line[3]) is None
+# ----------------------------
+def test_counters() -> None:
+    '''
+    All tables are indexed in one pass, first table kept for repeated names, nothing read after finalization
+    '''
+    def _lines():
+        yield from Data.l_line
+        raise AssertionError('Read past finalization')
+
+    d_table = cpr.parse_counters(_lines())
+
+    assert list(d_table) == ['Bu_Kee_eq_btosllball05_DPC', 'Bd_Kstee_eq_btosllball05_DPC']
+    assert list(d_table['Bu_Kee_eq_btosllball05_DPC']) == ['# non-empty events for field MCDecayTree', '# candidates', '# passed']
+    assert d_table['Bu_Kee_eq_btosllball05_DPC']['# non-empty events for field MCDecayTree'].count == 13584
+    assert d_table['Bd_Kstee_eq_btosllball05_DPC']['# non-empty events for field MCDecayTree'].count == 2000
+# ----------------------------
+def test_counters_around_stop() -> None:
+    '''
+    Other ApplicationMgr lines between the tables do not stop the parsing
+    '''
+    l_line = Data.l_line[:7] + ['ApplicationMgr       INFO Application Manager Stopped successfully'] + Data.l_line[7:]
+    d_table = cpr.parse_counters(l_line)
+
+    assert list(d_table) == ['Bu_Kee_eq_btosllball05_DPC', 'Bd_Kstee_eq_btosllball05_DPC']
+# ----------------------------
+def test_clip() -> None:
+    '''
+    Names are clipped as in the logs
+    '''
+    assert cpr.clip_name('Bu_Kee_eq_btosllball05_DPC_extra_long_name') == 'Bu_Kee_eq_btosllball05_DPC_ext'
+    assert cpr.clip_name('Bu_Kee') == 'Bu_Kee'
+# ----------------------------
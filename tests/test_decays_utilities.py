@@ -1,9 +1,15 @@
 '''
 Module with functions used to test functions in decays/utilities.py
 '''
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
 import pytest
 
 import ap_utilities.decays.utilities as aput
+from ap_utilities.decays              import naming_index as nix
+from ap_utilities.decays.naming_table import NamingTable
 
 # --------------------------------------------------
 class Data:
@@ -129,3 +135,106 @@ def test_name_from_lower_case(lower_case : str) -> None:
     '''
     name = aput.name_from_lower_case(lower_case)
     print(f'{lower_case:<40}{"->":<20}{name:<30}')
+# --------------------------------------------------
+@pytest.mark.parametrize('formatted', [True, False])
+def test_read_decay_names(formatted : bool) -> None:
+    '''
+    Tests batched reading of decay names, from list and array of integers
+    '''
+    l_name  = [ aput.read_decay_name(event_type=evt, formatted=formatted) for evt in Data.l_event_type ]
+    arr_evt = numpy.array(Data.l_event_type, dtype=int)
+
+    assert aput.read_decay_names(Data.l_event_type, formatted=formatted).tolist() == l_name
+    assert aput.read_decay_names(arr_evt          , formatted=formatted).tolist() == l_name
+# --------------------------------------------------
+def test_read_event_types() -> None:
+    '''
+    Tests batched reading of event types from nicknames
+    '''
+    l_nick = Data.l_new_nick + ['Bd_Kstee_eq_DPC_SS']
+    l_evt  = [ aput.read_event_type(nickname=nick) for nick in l_nick ]
+
+    assert aput.read_event_types(l_nick).tolist() == l_evt
+# --------------------------------------------------
+def test_batched_missing() -> None:
+    '''
+    Tests policies for missing entries
+    '''
+    l_evt = ['11114000', '00000000', '10000000']
+
+    with pytest.raises(ValueError):
+        aput.read_decay_names(l_evt)
+
+    arr_name = aput.read_decay_names(l_evt, missing='sentinel', sentinel='none')
+    assert arr_name[1] == 'none'
+
+    arr_name, arr_found, l_error = aput.read_decay_names(l_evt, missing='mask')
+    assert arr_found.tolist() == [True, False, True]
+    assert arr_name[0] == aput.read_decay_name('11114000')
+    assert len(l_error) == 1
+
+    _, arr_found, _ = aput.read_event_types(['Bd_Kstee_eq_DPC', 'not_a_nickname'], missing='mask')
+    assert arr_found.tolist() == [True, False]
+
+    with pytest.raises(ValueError):
+        aput.read_decay_names(l_evt, missing='ignore')
+# --------------------------------------------------
+def test_format_nickname() -> None:
+    '''
+    Formatting every nickname in evt_name.yaml should give what is in evt_form.yaml
+    '''
+    d_evt_name = nix.read_table('evt_name')
+    d_evt_form = nix.read_table('evt_form')
+
+    l_bad = [ evt for evt, name in d_evt_name.items() if aput.format_nickname(name) != d_evt_form[evt] ]
+
+    assert l_bad == []
+    assert aput.format_nickname('Bu_Kee=DecProdCut,1.5GeV') == 'Bu_Kee_eq_DPC_1p5G'
+# --------------------------------------------------
+def test_suggestions() -> None:
+    '''
+    Misses suggest the closest nicknames
+    '''
+    with pytest.raises(ValueError, match='did you mean: Bu_Kee_eq_btosllball05_DPC'):
+        aput.read_event_type('Bu_Kee_eq_btosllbal05_DPC')
+
+    with pytest.raises(ValueError, match='did you mean: bu_kee_eq_btosllball05_dpc'):
+        aput.name_from_lower_case('bu_kee_eq_btosllball05_dcp')
+
+    l_nick = aput.suggest_nicknames('Bu_Kee_eq_btosllball5_DPC', k=2)
+    assert l_nick[0] == 'Bu_Kee_eq_btosllball05_DPC'
+    assert len(l_nick) == 2
+# --------------------------------------------------
+def test_concurrent_load(monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Naming table is loaded once when many threads need it at the same time
+    '''
+    l_call   = []
+    load_org = NamingTable.load.__func__
+
+    def _load(cls) -> NamingTable:
+        l_call.append(threading.get_ident())
+        return load_org(cls)
+
+    monkeypatch.setattr(NamingTable, 'load', classmethod(_load))
+    monkeypatch.setattr(aput.Data  , 'table', None)
+
+    l_evt = list(nix.read_table('evt_form'))[:64]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        l_name = list(executor.map(aput.read_decay_name, l_evt))
+
+    assert len(l_call) == 1
+    assert l_name == aput.read_decay_names(l_evt).tolist()
+# --------------------------------------------------
+def test_preload(monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Loading in background thread
+    '''
+    monkeypatch.setattr(aput.Data, 'table', None)
+
+    thread = aput.preload(background=True)
+    thread.join()
+
+    assert aput.Data.table is not None
+    assert aput.preload() is None
+# --------------------------------------------------
@@ -0,0 +1,92 @@
+'''
+Module with tests for EventTypeIndex class
+'''
+import numpy
+import pytest
+
+from ap_utilities.decays.event_type_index import EventTypeIndex
+from ap_utilities.decays                  import event_type_index as eti
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    l_event_type = [
+            '11124002',
+            '11114002',
+            '12123003',
+            '12153001',
+            '12113002',
+            '12143001',
+            '13144011',
+            '15114001',
+            ]
+
+    l_pattern = [
+            ('12'      , [12113002, 12123003, 12143001, 12153001]),
+            ('12xxxxxx', [12113002, 12123003, 12143001, 12153001]),
+            ('1xx4xxxx', [12143001, 13144011]),
+            ('xx1x4x0x', [11114002, 11124002, 15114001]),
+            ('12153001', [12153001]),
+            ('16'      , []),
+            (''        , [11114002, 11124002, 12113002, 12123003, 12143001, 12153001, 13144011, 15114001]),
+            ]
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def small_index() -> EventTypeIndex:
+    '''
+    Index made from a few event types
+    '''
+    return EventTypeIndex(Data.l_event_type)
+# --------------------------------------------------
+@pytest.mark.parametrize('pattern, expected', Data.l_pattern)
+def test_match(small_index : EventTypeIndex, pattern : str, expected : list[int]) -> None:
+    '''
+    Wildcard and prefix queries
+    '''
+    arr_code = small_index.match(pattern)
+
+    assert arr_code.tolist() == expected
+# --------------------------------------------------
+@pytest.mark.parametrize('pattern', ['1a', '123456789', '12-'])
+def test_bad_pattern(small_index : EventTypeIndex, pattern : str) -> None:
+    '''
+    Invalid patterns raise
+    '''
+    with pytest.raises(ValueError):
+        small_index.match(pattern)
+# --------------------------------------------------
+def test_select(small_index : EventTypeIndex) -> None:
+    '''
+    Joins with other lists of event types
+    '''
+    arr_code = small_index.select('12', within=['12153001', 12123003, '11124002'], outside=[12123003])
+
+    assert eti.to_event_types(arr_code) == ['12153001']
+# --------------------------------------------------
+def test_naming() -> None:
+    '''
+    Every event type in the naming tables is matched by its own code
+    '''
+    index    = EventTypeIndex.from_naming()
+    arr_code = index.codes
+
+    assert numpy.all(arr_code[1:] > arr_code[:-1])
+    for event_type in eti.to_event_types(arr_code[::500]):
+        assert eti.to_event_types(index.match(event_type)) == [event_type]
+# --------------------------------------------------
+def test_analyses() -> None:
+    '''
+    Event types from analyses and priority lists
+    '''
+    arr_rx = eti.get_analysis_codes('rx')
+    d_prio = eti.get_priority_codes(categories=['high_priority', 'low_priority'])
+
+    assert len(arr_rx) > 0
+    assert list(d_prio) == ['high_priority', 'low_priority']
+    assert 12153001 in d_prio['high_priority']
+
+    with pytest.raises(ValueError):
+        eti.get_analysis_codes('not_an_analysis')
+# --------------------------------------------------
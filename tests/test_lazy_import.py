@@ -0,0 +1,44 @@
+'''
+Module with tests for lazy imports
+'''
+import sys
+import subprocess
+
+import pytest
+
+from ap_utilities.generic.lazy import lazy_import
+
+# --------------------------------------------------
+def test_deferred() -> None:
+    '''
+    Module is imported at first attribute access
+    '''
+    module = lazy_import('json')
+
+    assert module.dumps([1]) == '[1]'
+    assert module.loads      is sys.modules['json'].loads
+# --------------------------------------------------
+def test_missing() -> None:
+    '''
+    Missing modules raise when used, not when declared
+    '''
+    module = lazy_import('not_a_module_xyz')
+
+    with pytest.raises(ModuleNotFoundError):
+        _ = module.attribute
+# --------------------------------------------------
+@pytest.mark.parametrize('module', [
+    'ap_utilities.decays.utilities',
+    'ap_utilities.bookkeeping.bkk_checker',
+    'ap_utilities_scripts.query_decays',
+    'ap_utilities_scripts.validate_ap_tuples'])
+def test_no_heavy_imports(module : str) -> None:
+    '''
+    Heavy third party modules are not imported with the modules of the project
+    '''
+    l_heavy = ['numpy', 'yaml', 'pandas', 'omegaconf', 'ROOT', 'dmu']
+    code    = f'import sys, {module}; print(" ".join(name for name in {l_heavy} if name in sys.modules))'
+    out     = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    assert out.stdout.strip() == ''
+# --------------------------------------------------
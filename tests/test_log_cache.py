@@ -0,0 +1,76 @@
+'''
+Module with tests for LogCache class
+'''
+import os
+
+import pytest
+from conftest import make_zip
+
+from ap_utilities.logfiles                import counter_parser as cpr
+from ap_utilities.logfiles.log_cache      import LogCache
+from ap_utilities.logfiles.log_info       import LogInfo
+
+# ----------------------------
+def _no_parsing(lines) -> None:
+    raise AssertionError('Log was parsed again')
+# ----------------------------
+def test_shared(tmp_path, monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Log is parsed once for all the instances, and again when the zip file changes
+    '''
+    cache    = LogCache()
+    zip_path = make_zip(str(tmp_path / 'job.zip'), {'Bu_Kee_eq_btosllball05_DPC' : 13584})
+    assert LogInfo(zip_path=zip_path, cache=cache).get_mcdt_entries('Bu_Kee_eq_btosllball05_DPC') == 13584
+
+    with monkeypatch.context() as mpt:
+        mpt.setattr(cpr, 'parse_counters', _no_parsing)
+        assert LogInfo(zip_path=zip_path, cache=cache).get_mcdt_entries('Bu_Kee_eq_btosllball05_DPC') == 13584
+
+    obj = LogInfo(zip_path=zip_path, cache=cache)
+    assert obj.get_mcdt_entries('Bu_Kee_eq_btosllball05_DPC') == 13584
+
+    make_zip(zip_path, {'Bu_Kee_eq_btosllball05_DPC' : 200}, nfill=10)
+    assert obj.get_mcdt_entries('Bu_Kee_eq_btosllball05_DPC') == 200
+    assert len(cache) == 2
+# ----------------------------
+def test_bounded(tmp_path) -> None:
+    '''
+    Only the last used logs are kept in memory
+    '''
+    cache = LogCache(maxsize=2)
+    l_zip = [ make_zip(str(tmp_path / f'job_{index}.zip'), {'Bu_Kee' : index}) for index in range(3) ]
+
+    for zip_path in l_zip + l_zip[:1]:
+        LogInfo(zip_path=zip_path, cache=cache).get_mcdt_entries('Bu_Kee')
+
+    assert len(cache) == 2
+    assert cache.get(LogCache.get_key(l_zip[0])) is not None
+    assert cache.get(LogCache.get_key(l_zip[1])) is None
+    assert cache.get(LogCache.get_key(l_zip[2])) is not None
+
+    with pytest.raises(ValueError):
+        LogCache(maxsize=0)
+# ----------------------------
+@pytest.mark.parametrize('workers', [1, 2])
+def test_persistent(tmp_path, monkeypatch : pytest.MonkeyPatch, workers : int) -> None:
+    '''
+    Counters saved in a file are used by later runs, without parsing the logs
+    '''
+    cache_path = str(tmp_path / 'cache' / 'logs.sqlite')
+    d_path     = { f'Bu_Kee_{index}' : make_zip(str(tmp_path / f'job_{index}.zip'), {f'Bu_Kee_{index}' : index}) for index in range(4) }
+    df_1       = LogInfo.batch(d_path, workers=workers, chunksize=2, cache_path=cache_path)
+
+    monkeypatch.setattr(cpr, 'parse_counters', _no_parsing)
+    df_2       = LogInfo.batch(d_path, chunksize=2, cache_path=cache_path)
+
+    assert df_1.equals(df_2)
+    assert df_2.error.isna().all()
+
+    with LogCache(path=cache_path) as cache:
+        obj       = LogInfo(zip_path=d_path['Bu_Kee_3'], cache=cache)
+        d_counter = obj.get_counters('Bu_Kee_3')
+
+    assert d_counter['# processed events'] == cpr.Counter('# processed events', 3)
+    assert obj.get_mcdt_entries('Bu_Kee_3') == 3
+    assert os.path.isfile(cache_path)
+# ----------------------------
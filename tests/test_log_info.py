@@ -1,9 +1,15 @@
 '''
 Script with tests for LogInfo class
 '''
+import os
+import zipfile
+import tracemalloc
+
 import pytest
+from conftest import make_zip
 
-from ap_utilities.logfiles.log_info import LogInfo
+from ap_utilities.logfiles.log_info  import LogInfo
+from ap_utilities.logfiles.log_cache import LogCache
 
 # ----------------------------
 class Data:
@@ -17,6 +23,136 @@ class Data:
     ('/home/acampove/cernbox/dev/tests/ap_utilities/log_info/fall_back_omega.zip', 'Omegab_JpsiOmega_mm_LambdaK_eq_phsp_TightCut', 13998),
     ]
 # ----------------------------
+def test_stream(tmp_path) -> None:
+    '''
+    Entries are read from the log in the zip file, without extracting it
+    '''
+    zip_path = make_zip(str(tmp_path / 'job.zip'), {'Bu_Kee_eq_btosllball05_DPC_extra_long_name' : 13584, 'Bd_Kstee_eq_btosllball05_DPC' : 2000})
+    obj      = LogInfo(zip_path=zip_path)
+
+    assert obj.get_mcdt_entries('Bu_Kee_eq_btosllball05_DPC_extra_long_name') == 13584
+    assert obj.get_mcdt_entries('Bd_Kstee_eq_btosllball05_DPC')               == 2000
+    assert obj.get_mcdt_entries('Bs_phiee_eq_DPC')                            == -1
+    assert os.listdir(tmp_path) == ['job.zip']
+# ----------------------------
+def test_counters(tmp_path) -> None:
+    '''
+    Counters of every algorithm are available after reading the log once, until the zip file is removed
+    '''
+    zip_path = make_zip(str(tmp_path / 'job.zip'), {'Bu_Kee_eq_btosllball05_DPC_extra_long_name' : 13584, 'Bd_Kstee_eq_btosllball05_DPC' : 2000})
+    obj      = LogInfo(zip_path=zip_path)
+
+    assert obj.algorithms == ['Bu_Kee_eq_btosllball05_DPC_ext', 'Bd_Kstee_eq_btosllball05_DPC']
+
+    d_counter = obj.get_counters('Bu_Kee_eq_btosllball05_DPC_extra_long_name')
+    assert sorted(d_counter) == ['# non-empty events for field MCDecayTree', '# processed events']
+    assert d_counter['# processed events'].count == 13584
+
+    assert obj.get_mcdt_entries('Bd_Kstee_eq_btosllball05_DPC') == 2000
+    assert obj.get_counters('Bs_phiee_eq_DPC') is None
+
+    os.remove(zip_path)
+    assert obj.get_mcdt_entries('Bd_Kstee_eq_btosllball05_DPC') == -1
+# ----------------------------
+def test_stop_early(tmp_path) -> None:
+    '''
+    When reading the whole log, it is not read after the table, the damaged end of the zip file is never reached
+    '''
+    zip_path = make_zip(str(tmp_path / 'job.zip'), {'Bu_Kee_eq_btosllball05_DPC' : 13584}, nfill=10_000, method=zipfile.ZIP_STORED)
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        info = zip_ref.getinfo('00012345_00000001/DaVinci_00012345_00000001_1.log')
+
+    with open(zip_path, 'r+b') as ofile:
+        # Data of stored member ends where the central directory starts
+        ofile.seek(info.header_offset + len(info.FileHeader()) + info.file_size - 5)
+        ofile.write(b'#####')
+
+    with zipfile.ZipFile(zip_path) as zip_ref, pytest.raises(zipfile.BadZipFile):
+        zip_ref.read(info)
+
+    assert LogInfo(zip_path=zip_path, tail_size=None).get_mcdt_entries('Bu_Kee_eq_btosllball05_DPC') == 13584
+# ----------------------------
+@pytest.mark.parametrize('stopped', [True, False])
+def test_tail(tmp_path, stopped : bool) -> None:
+    '''
+    Counters at the end of a large log are found keeping only its end in memory,
+    without the start of the finalization, the whole log is read
+    '''
+    d_entries = {'Bu_Kee_eq_btosllball05_DPC' : 13584, 'Bd_Kstee_eq_btosllball05_DPC' : None, 'Bs_phiee_eq_DPC' : 300}
+    zip_path  = make_zip(str(tmp_path / 'job.zip'), d_entries, nfill=300_000, stopped=stopped)
+
+    d_entries = {}
+    for tail_size in [2 ** 20, None]:
+        obj = LogInfo(zip_path=zip_path, tail_size=tail_size, cache=LogCache())
+        tracemalloc.start()
+        d_entries[tail_size] = [ obj.get_mcdt_entries(alg_name) for alg_name in ['Bu_Kee_eq_btosllball05_DPC', 'Bd_Kstee_eq_btosllball05_DPC'] ]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Log has about 15 MB
+        assert peak < (4 if stopped else 16) * 2 ** 20
+
+    assert d_entries[2 ** 20] == d_entries[None] == [13584, 300]
+# ----------------------------
+def test_fall_back(tmp_path) -> None:
+    '''
+    Without the line in the table of the algorithm, it is taken from the next table,
+    without any, or without the zip file, the fall back value is returned
+    '''
+    zip_path = make_zip(str(tmp_path / 'job.zip'), {'Xib_psi2SXi_ee_Lambdapi_eq_TightCut' : None, 'Xib_other' : 13603})
+    assert LogInfo(zip_path=zip_path).get_mcdt_entries('Xib_psi2SXi_ee_Lambdapi_eq_TightCut') == 13603
+
+    zip_path = make_zip(str(tmp_path / 'noline.zip'), {'Xib_psi2SXi_ee_Lambdapi_eq_TightCut' : None})
+    assert LogInfo(zip_path=zip_path).get_mcdt_entries('Xib_psi2SXi_ee_Lambdapi_eq_TightCut', fall_back=-2) == -2
+
+    assert LogInfo(zip_path=str(tmp_path / 'missing.zip')).get_mcdt_entries('Xib_other') == -1
+# ----------------------------
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch(tmp_path, workers : int) -> None:
+    '''
+    Counters of many jobs, in input order, with a row with the error for each job that cannot be read
+    '''
+    d_path = {}
+    for index in range(5):
+        sample = f'Bu_Kee_eq_btosllball05_DPC_{index}'
+        d_path[sample] = make_zip(str(tmp_path / f'job_{index}.zip'), {sample : 100 + index})
+
+    d_path['Bd_Kstee_fall_back'] = make_zip(str(tmp_path / 'fall_back.zip'), {'Bd_Kstee_fall_back' : None, 'Bd_Kstee_other' : 200})
+    d_path['Bs_phiee_missing'  ] = str(tmp_path / 'missing.zip')
+    d_path['Bs_phiee_corrupted'] = str(tmp_path / 'corrupted.zip')
+    with open(d_path['Bs_phiee_corrupted'], 'w', encoding='utf-8') as ofile:
+        ofile.write('not a zip file')
+
+    df = LogInfo.batch(d_path, workers=workers, chunksize=2)
+
+    assert list(df.columns) == ['sample', 'algorithm', 'counter', 'value', 'mcdt', 'error']
+    assert list(df['sample'].unique()) == list(d_path)
+
+    df_mcdt = df[df.counter == '# non-empty events for field MCDecayTree']
+    assert df_mcdt.value.tolist() == [100, 101, 102, 103, 104, 200]
+    assert df[df.mcdt].equals(df_mcdt)
+
+    df_proc = df[df.counter == '# processed events']
+    assert df_proc.value.tolist() == [100, 101, 102, 103, 104, 100]
+
+    df_fail = df[df.error.notna()]
+    assert df_fail['sample'].tolist() == ['Bs_phiee_missing', 'Bs_phiee_corrupted']
+    assert df_fail.algorithm.isna().all()
+    assert 'BadZipFile' in df_fail.error.iloc[1]
+# ----------------------------
+def test_batch_algorithms(tmp_path) -> None:
+    '''
+    Counters of given algorithms, the ones not in the log have a row with the error
+    '''
+    zip_path = make_zip(str(tmp_path / 'job.zip'), {'Bu_Kee_eq_btosllball05_DPC' : 13584, 'Bd_Kstee_eq_btosllball05_DPC' : 2000})
+    df       = LogInfo.batch({'sample' : zip_path}, alg_names=['Bd_Kstee_eq_btosllball05_DPC', 'Bs_phiee_eq_DPC'])
+
+    assert df.algorithm.tolist() == ['Bd_Kstee_eq_btosllball05_DPC', 'Bd_Kstee_eq_btosllball05_DPC', 'Bs_phiee_eq_DPC']
+    assert df.value.tolist()[:2] == [2000, 2000]
+    assert df.mcdt.tolist() == [True, False, False]
+    assert df.error.isna().tolist() == [True, True, False]
+    assert 'Bs_phiee_eq_DPC' in df.error.iloc[2]
+# ----------------------------
 @pytest.mark.skip
 def test_mcdt():
     '''
@@ -0,0 +1,69 @@
+'''
+Module with tests for the binary index of naming tables
+'''
+import sqlite3
+from importlib.resources import files
+
+import yaml
+import pytest
+
+from ap_utilities.decays import naming_index as nix
+
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def index_path(tmp_path_factory) -> str:
+    '''
+    Builds index in temporary directory
+    '''
+    path = tmp_path_factory.mktemp('naming') / 'naming_index.sqlite'
+
+    return nix.build_index(path=str(path))
+# --------------------------------------------------
+def test_shipped_index_valid() -> None:
+    '''
+    Index shipped with project has to be in sync with the YAML files
+    '''
+    assert nix.is_valid()
+# --------------------------------------------------
+@pytest.mark.parametrize('table', ['evt_old_name', 'old_name_evt', 'evt_form'])
+def test_load_table(index_path : str, table : str) -> None:
+    '''
+    Tables read from index have to agree with YAML files
+    '''
+    yaml_path = files('ap_utilities_data').joinpath(f'naming/{table}.yaml')
+    with open(str(yaml_path), encoding='utf-8') as ifile:
+        d_yaml = yaml.safe_load(ifile)
+
+    d_index = nix.load_table(table, path=index_path)
+
+    assert d_index == d_yaml
+# --------------------------------------------------
+def test_stale_index(index_path : str, tmp_path) -> None:
+    '''
+    Index built from different YAML files should not be used
+    '''
+    stale_path = str(tmp_path / 'stale.sqlite')
+    with open(index_path, 'rb') as ifile, open(stale_path, 'wb') as ofile:
+        ofile.write(ifile.read())
+
+    with sqlite3.connect(stale_path) as conn:
+        conn.execute('UPDATE meta SET value = ? WHERE key = ?', ('not_a_hash', 'sources'))
+    conn.close()
+
+    assert not nix.is_valid(stale_path)
+    assert nix.load_table('evt_form', path=stale_path) is None
+# --------------------------------------------------
+def test_missing_index(tmp_path) -> None:
+    '''
+    Missing index should not be used
+    '''
+    path = str(tmp_path / 'missing.sqlite')
+
+    assert nix.load_table('evt_form', path=path) is None
+# --------------------------------------------------
+def test_invalid_table() -> None:
+    '''
+    Only naming tables can be read
+    '''
+    with pytest.raises(ValueError):
+        nix.load_table('ntuple_scheme')
@@ -0,0 +1,87 @@
+'''
+Module with tests for NamingStore class
+'''
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import ap_utilities.decays.utilities as aput
+from ap_utilities.decays              import naming_store as nst
+from ap_utilities.decays.naming_store import NamingStore
+from ap_utilities.decays.naming_table import NamingTable
+
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def store_path(tmp_path_factory : pytest.TempPathFactory) -> str:
+    '''
+    Path to store made from the naming tables of the project
+    '''
+    path = tmp_path_factory.mktemp('naming_store') / 'naming.bin'
+
+    return NamingStore.write(str(path))
+# --------------------------------------------------
+def _read_names(l_event_type : list[str]) -> tuple[list[str],int]:
+    return aput.read_decay_names(l_event_type).tolist(), os.getpid()
+# --------------------------------------------------
+def test_same_as_table(store_path : str) -> None:
+    '''
+    Store returns the same as the naming table
+    '''
+    table = NamingTable.load()
+    with NamingStore.open(store_path) as store:
+        assert len(store) == len(table)
+
+        for kind in ['formatted', 'raw', 'old', 'lower']:
+            assert sorted(store.get_nicknames(kind)) == sorted(table.get_nicknames(kind))
+
+        for event_type in ['12153001', '11114000', '00000000']:
+            assert store.get_decay_name(event_type)                  == table.get_decay_name(event_type)
+            assert store.get_decay_name(event_type, formatted=False) == table.get_decay_name(event_type, formatted=False)
+            assert (event_type in store) == (event_type in table)
+
+        for nickname in table.get_nicknames('formatted')[::100] + ['not_a_nickname']:
+            assert store.get_event_type(nickname) == table.get_event_type(nickname)
+            assert store.get_old_nick(nickname)   == table.get_old_nick(nickname)
+
+        for nickname in table.get_nicknames('old')[::100]:
+            assert store.get_new_nick(nickname)            == table.get_new_nick(nickname)
+            assert store.get_event_type_from_old(nickname) == table.get_event_type_from_old(nickname)
+
+        for lower_case in table.get_nicknames('lower')[::100]:
+            assert store.get_original(lower_case) == table.get_original(lower_case)
+# --------------------------------------------------
+def test_byte_order(store_path : str, monkeypatch : pytest.MonkeyPatch) -> None:
+    '''
+    Machines that cannot read the arrays in place decode them as little endian
+    '''
+    with NamingStore.open(store_path) as store:
+        l_name = [ store.get_decay_name(event_type) for event_type in ['12153001', '11114000'] ]
+
+    monkeypatch.setattr(nst.Data, 'native', False)
+    with NamingStore.open(store_path) as store:
+        assert [ store.get_decay_name(event_type) for event_type in ['12153001', '11114000'] ] == l_name
+        assert store.get_event_type(l_name[0]) == '12153001'
+# --------------------------------------------------
+def test_bad_file(tmp_path) -> None:
+    '''
+    Files that are not stores are rejected
+    '''
+    path = tmp_path / 'bad.bin'
+    path.write_bytes(b'x' * 64)
+
+    with pytest.raises(ValueError):
+        NamingStore.open(str(path))
+# --------------------------------------------------
+def test_process_pool(store_path : str) -> None:
+    '''
+    Workers attached to store do lookups without loading the naming tables
+    '''
+    l_evt = ['12153001', '11114000', '11124002']
+    with ProcessPoolExecutor(max_workers=2, initializer=aput.attach_store, initargs=(store_path,)) as executor:
+        l_result = list(executor.map(_read_names, [l_evt] * 4))
+
+    for l_name, pid in l_result:
+        assert pid != os.getpid()
+        assert l_name == aput.read_decay_names(l_evt).tolist()
+# --------------------------------------------------
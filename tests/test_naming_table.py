@@ -0,0 +1,79 @@
+'''
+Module with tests for NamingTable class
+'''
+import pytest
+
+from ap_utilities.decays              import naming_index as nix
+from ap_utilities.decays.naming_table import NamingTable
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    d_table : dict[str,dict[str,str]] = {}
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def table() -> NamingTable:
+    '''
+    Loads all the tables once
+    '''
+    for name in nix.Data.l_table:
+        Data.d_table[name] = nix.read_table(name)
+
+    return NamingTable.load()
+# --------------------------------------------------
+def test_decay_name(table : NamingTable) -> None:
+    '''
+    Event type -> nickname, formatted and not formatted
+    '''
+    for evt, form in Data.d_table['evt_form'].items():
+        assert table.get_decay_name(evt, formatted=True) == form
+
+    for evt, name in Data.d_table['evt_name'].items():
+        assert table.get_decay_name(evt, formatted=False) == name
+
+    assert table.get_decay_name('00000000') is None
+# --------------------------------------------------
+def test_event_type(table : NamingTable) -> None:
+    '''
+    Nickname -> event type, formatted and not formatted
+    '''
+    for form, evt in Data.d_table['form_evt'].items():
+        assert table.get_event_type(form, formatted=True) == evt
+
+    for name, evt in Data.d_table['name_evt'].items():
+        assert table.get_event_type(name, formatted=False) == evt
+
+    assert table.get_event_type('not_a_nickname') is None
+# --------------------------------------------------
+def test_old_new(table : NamingTable) -> None:
+    '''
+    Two hop lookups between Run1/2 and Run3 nicknames
+    '''
+    d_evt_form = Data.d_table['evt_form']
+    for old_nick, evt in Data.d_table['old_name_evt'].items():
+        assert table.get_new_nick(old_nick)          == d_evt_form.get(evt)
+        assert table.get_event_type_from_old(old_nick) == evt
+
+    d_evt_old = Data.d_table['evt_old_name']
+    for form, evt in Data.d_table['form_evt'].items():
+        assert table.get_old_nick(form) == d_evt_old.get(evt)
+# --------------------------------------------------
+def test_lower(table : NamingTable) -> None:
+    '''
+    Lower case nickname -> original nickname
+    '''
+    for lower, original in Data.d_table['lower_original'].items():
+        assert table.get_original(lower) == original
+
+    assert table.get_original('not_a_nickname') is None
+# --------------------------------------------------
+def test_size(table : NamingTable) -> None:
+    '''
+    Every event type should have one and only one row
+    '''
+    s_evt = set(Data.d_table['evt_name']) | set(Data.d_table['old_name_evt'].values())
+
+    assert len(table) == len(s_evt)
+    assert all(evt in table for evt in s_evt)
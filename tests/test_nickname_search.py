@@ -0,0 +1,70 @@
+'''
+Module with tests for NicknameSearch class
+'''
+import pytest
+
+from ap_utilities.decays.nickname_search import NicknameSearch
+from ap_utilities.decays                 import nickname_search as nsr
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    l_name = [
+            'Bu_Kee_eq_btosllball05_DPC',
+            'Bu_Kee_eq_btosllball_DPC',
+            'Bu_Kmumu_eq_btosllball05_DPC',
+            'Bd_Kstee_eq_btosllball05_DPC',
+            'Bs_phiee_eq_Ball_DPC',
+            ]
+
+    l_distance = [
+            (''      , ''      , 0),
+            ('abc'   , ''      , 3),
+            ('kitten', 'sitting', 3),
+            ('flaw'  , 'lawn'  , 2),
+            ('Bu_Kee', 'Bu_Kee', 0),
+            ('a' * 70, 'b' * 70, 70),
+            ]
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def search() -> NicknameSearch:
+    '''
+    Search index over a few nicknames
+    '''
+    return NicknameSearch(Data.l_name)
+# --------------------------------------------------
+@pytest.mark.parametrize('first, second, expected', Data.l_distance)
+def test_edit_distance(first : str, second : str, expected : int) -> None:
+    '''
+    Levenshtein distance, in both directions
+    '''
+    assert nsr.edit_distance(first, second) == expected
+    assert nsr.edit_distance(second, first) == expected
+# --------------------------------------------------
+def test_prefix(search : NicknameSearch) -> None:
+    '''
+    Names starting with a given string
+    '''
+    assert search.prefix('Bu_K')          == ['Bu_Kee_eq_btosllball05_DPC', 'Bu_Kee_eq_btosllball_DPC', 'Bu_Kmumu_eq_btosllball05_DPC']
+    assert search.prefix('Bu_K', limit=1) == ['Bu_Kee_eq_btosllball05_DPC']
+    assert search.prefix('Lb')            == []
+# --------------------------------------------------
+def test_suggest(search : NicknameSearch) -> None:
+    '''
+    Closest names come first, case is ignored
+    '''
+    assert search.suggest('Bu_Kee_eq_btosllbal05_DPC', k=2) == ['Bu_Kee_eq_btosllball05_DPC', 'Bu_Kee_eq_btosllball_DPC']
+    assert search.suggest('bs_phiee_eq_ball_dpc'     , k=1) == ['Bs_phiee_eq_Ball_DPC']
+    assert search.suggest('Bu_Kee', k=0)                    == []
+    assert search.suggest('xxxxxxxxxxxxxxxxxxxxxxxxx')      == []
+# --------------------------------------------------
+def test_contains(search : NicknameSearch) -> None:
+    '''
+    Membership
+    '''
+    assert 'Bs_phiee_eq_Ball_DPC' in search
+    assert 'Bs_phiee'         not in search
+    assert len(search) == len(Data.l_name)
+# --------------------------------------------------
@@ -0,0 +1,80 @@
+'''
+Module with tests for ParticleIndex class
+'''
+import pytest
+
+from ap_utilities.decays.particle_index import ParticleIndex
+from ap_utilities.decays                import particle_index as pix
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    d_decay = {
+            '11124002' : '[B0 -> (K*(892)0 -> K+ pi-) e+ e-]cc',
+            '11114002' : '[B0 -> (K*0 -> K+ pi-) mu+ mu-]cc',
+            '12123003' : '[B+ -> K+ e+ e-]cc',
+            '12153001' : '[B+ -> K+ (J/psi(1S) -> e+ e- {,gamma}{,gamma})]cc',
+            '11102202' : '[B0 -> (K*(892)0 -> K+ pi-) gamma]cc',
+            '11166107' : '[B0 -> (rho(770)+ -> pi+ pi0) (anti-D0 -> K+ pi-) e- anti-nu_e]cc',
+            }
+
+    l_normalized = [
+            ('K*0'      , 'K*(892)0' ),
+            ('e+'       , 'e+'       ),
+            ('anti-D0'  , 'D~0'      ),
+            ('nu_e~'    , 'nu_e'     ),
+            ('rho(770)+', 'rho(770)+'),
+            ('J/psi(1S)', 'J/psi(1S)'),
+            ]
+# --------------------------------------------------
+@pytest.fixture(scope='module')
+def small_index() -> ParticleIndex:
+    '''
+    Index made from a few decays
+    '''
+    return ParticleIndex.build(d_decay=Data.d_decay)
+# --------------------------------------------------
+@pytest.mark.parametrize('particle, expected', Data.l_normalized)
+def test_normalize(particle : str, expected : str) -> None:
+    '''
+    Names used in queries are normalized like the ones in decays
+    '''
+    assert pix.normalize_particle(particle) == expected
+# --------------------------------------------------
+def test_particles(small_index : ParticleIndex) -> None:
+    '''
+    Particles found in decays
+    '''
+    s_particle = set(small_index.particles)
+
+    assert {'B0', 'B+', 'K*(892)0', 'J/psi(1S)', 'gamma', 'rho(770)+', 'D~0', 'nu_e'} <= s_particle
+    assert all(part[0].isalpha() for part in s_particle)
+# --------------------------------------------------
+def test_query(small_index : ParticleIndex) -> None:
+    '''
+    AND/OR/NOT queries
+    '''
+    assert small_index.query(all_of=['e+', 'e-', 'K*0'])                    == ['11124002']
+    assert small_index.query(all_of=['e+', 'e-'], none_of=['J/psi(1S)'])    == ['11124002', '12123003']
+    assert small_index.query(all_of=['K+'], any_of=['mu+', 'rho(770)+'])    == ['11114002', '11166107']
+    assert small_index.query(all_of=['K+'], none_of=['e+', 'mu+', 'gamma']) == ['11166107']
+    assert small_index.query(all_of=['not_a_particle'])                     == []
+    assert small_index.count(any_of=['B0'])                                 == 4
+    assert len(small_index.query())                                         == len(Data.d_decay)
+# --------------------------------------------------
+def test_persist(tmp_path) -> None:
+    '''
+    Index built from evt_dec.yaml is the same after saving and loading it
+    '''
+    path  = str(tmp_path / 'particles.json')
+    index = ParticleIndex.build()
+    index.save(path)
+
+    loaded = ParticleIndex.load(path)
+
+    assert loaded is not None
+    assert loaded.particles == index.particles
+    assert loaded.query(all_of=['e+', 'e-', 'K*0']) == index.query(all_of=['e+', 'e-', 'K*0'])
+    assert '11124002' in loaded.query(all_of=['e+', 'e-', 'K*0'])
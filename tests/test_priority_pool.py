@@ -0,0 +1,73 @@
+'''
+Module with tests for functions in priority_pool.py
+'''
+import time
+import asyncio
+
+import pytest
+
+from ap_utilities.bookkeeping import priority_pool as ppl
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    l_item = [(2, 'c1'), (0, 'a1'), (1, 'b1'), (0, 'a2'), (2, 'c2'), (1, 'b2')]
+# --------------------------------------------------
+def test_order() -> None:
+    '''
+    With one thread checks run by priority, then in input order
+    '''
+    l_key   = []
+    def _check(key : str) -> bool:
+        l_key.append(key)
+        return key.endswith('1')
+
+    d_found = ppl.run_threads(Data.l_item, _check)
+
+    assert l_key   == ['a1', 'a2', 'b1', 'b2', 'c1', 'c2']
+    assert d_found == {'a1' : True, 'a2' : False, 'b1' : True, 'b2' : False, 'c1' : True, 'c2' : False}
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_budget(engine : str) -> None:
+    '''
+    Once budget is spent, nothing new starts and urgent keys were checked first
+    '''
+    def _check(_ : str) -> bool:
+        time.sleep(0.3)
+        return True
+
+    async def _check_async(_ : str) -> bool:
+        await asyncio.sleep(0.3)
+        return True
+
+    start = time.monotonic()
+    if engine == 'threads':
+        d_found = ppl.run_threads(Data.l_item, _check, nthreads=2, budget=0.1)
+    else:
+        d_found = asyncio.run(ppl.run_asyncio(Data.l_item, _check_async, nconcurrent=2, budget=0.1))
+
+    assert time.monotonic() - start < 0.5
+    assert d_found == {'a1' : True, 'a2' : True}
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_error(engine : str) -> None:
+    '''
+    Errors in checks are raised
+    '''
+    def _check(key : str) -> bool:
+        if key == 'b1':
+            raise ValueError('Failed check')
+
+        return True
+
+    async def _check_async(key : str) -> bool:
+        return _check(key)
+
+    with pytest.raises(ValueError, match='Failed check'):
+        if engine == 'threads':
+            ppl.run_threads(Data.l_item, _check, nthreads=3)
+        else:
+            asyncio.run(ppl.run_asyncio(Data.l_item, _check_async, nconcurrent=3))
+# --------------------------------------------------
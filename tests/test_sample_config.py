@@ -28,3 +28,15 @@ def test_simple():
     print(yaml_str)
 
     assert isinstance(cfg, DictConfig)
+# ----------------------
+def test_priority():
+    '''
+    Event types keep the index of their category
+    '''
+    obj = scf.SampleConfig(settings='2024', samples='by_priority')
+    cfg = obj.get_config(categories=['high_priority', 'low_priority'])
+
+    for section in cfg.sections.values():
+        assert len(section.priority) == len(section.evt_type)
+        assert set(section.priority) == {0, 1}
+        assert list(section.priority) == sorted(section.priority)
@@ -0,0 +1,142 @@
+'''
+Module with tests for classes in throttle.py
+'''
+import time
+import asyncio
+
+import yaml
+import pytest
+from conftest import read_calls
+
+from ap_utilities.bookkeeping.throttle    import Throttle, CircuitBreaker, TokenBucket
+from ap_utilities.bookkeeping.bkk_checker import BkkChecker
+from ap_utilities.bookkeeping.bkk_cache   import BkkCache
+from dmu.generic                          import utilities as gut
+
+# --------------------------------------------------
+class Data:
+    '''
+    Class used to store data needed by tests
+    '''
+    # Fast retries, such that tests do not wait
+    d_fast = {'backoff' : 0.01, 'breaker' : CircuitBreaker(cooldown=0.1)}
+# --------------------------------------------------
+def _get_flaky(nfail : int):
+    l_call = []
+    def _function() -> str:
+        l_call.append(time.monotonic())
+        if len(l_call) <= nfail:
+            raise RuntimeError('Server is overloaded')
+
+        return 'answer'
+
+    return _function, l_call
+# --------------------------------------------------
+def test_token_bucket() -> None:
+    '''
+    Calls are spread according to rate
+    '''
+    bucket = TokenBucket(rate=20)
+    start  = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+
+    assert 0.45 < time.monotonic() - start < 0.8
+# --------------------------------------------------
+def test_breaker() -> None:
+    '''
+    Circuit opens when too many calls fail and stays open during cooldown
+    '''
+    breaker = CircuitBreaker(error_rate=0.5, window=10, min_calls=4, cooldown=0.3)
+    for failed in [False, True, True]:
+        breaker.record(failed)
+
+    assert not breaker.is_open
+
+    breaker.record(True)
+    assert breaker.is_open
+
+    start = time.monotonic()
+    breaker.wait()
+    assert time.monotonic() - start > 0.25
+    assert not breaker.is_open
+# --------------------------------------------------
+def test_retry() -> None:
+    '''
+    Failures are retried with growing waits
+    '''
+    function, l_call = _get_flaky(nfail=3)
+    throttle         = Throttle(ntry=4, **Data.d_fast)
+
+    assert throttle.call(function, name='test') == 'answer'
+    assert len(l_call) == 4
+# --------------------------------------------------
+def test_give_up() -> None:
+    '''
+    Last failure is raised once tries run out
+    '''
+    function, l_call = _get_flaky(nfail=10)
+    throttle         = Throttle(ntry=3, **Data.d_fast)
+
+    with pytest.raises(RuntimeError, match='overloaded'):
+        throttle.call(function)
+
+    assert len(l_call) == 3
+# --------------------------------------------------
+def test_retry_async() -> None:
+    '''
+    Same as test_retry, for coroutines
+    '''
+    function, l_call = _get_flaky(nfail=2)
+    throttle         = Throttle(ntry=3, **Data.d_fast)
+
+    async def _function() -> str:
+        return function()
+
+    assert asyncio.run(throttle.call_async(_function)) == 'answer'
+    assert len(l_call) == 3
+# --------------------------------------------------
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_flaky_dirac(fake_dirac : str, monkeypatch : pytest.MonkeyPatch, tmp_path, engine : str) -> None:
+    '''
+    When Dirac fails half of the time, results are the same as when it does not fail
+    '''
+    d_cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    cfg   = d_cfg['sections']['one']
+
+    BkkChecker('reliable', cfg).save()
+    assert len(read_calls(fake_dirac)) == 2
+
+    monkeypatch.setenv('FAKE_DIRAC_FAIL', '0.5')
+    throttle = Throttle(ntry=20, **Data.d_fast)
+    BkkChecker('flaky', cfg, throttle=throttle).save(nthreads=2, engine=engine)
+    assert len(read_calls(fake_dirac)) > 2
+
+    out_dir = tmp_path / 'ana_dir/bkk_checker'
+    for name in ['info.yaml', 'validation.yaml']:
+        assert (out_dir / 'flaky' / name).read_text() == (out_dir / 'reliable' / name).read_text()
+
+    assert not (out_dir / 'flaky/unchecked.yaml').exists()
+# --------------------------------------------------
+def test_overloaded_dirac(fake_dirac : str, monkeypatch : pytest.MonkeyPatch, tmp_path) -> None:
+    '''
+    Samples are not reported as missing, nor cached, when Dirac keeps failing
+    '''
+    monkeypatch.setenv('FAKE_DIRAC_FAIL', '1')
+
+    d_cfg = gut.load_conf(package='ap_utilities_data', fpath='tests/rd_samples.yaml')
+    cfg   = d_cfg['sections']['one']
+    cache = BkkCache(path=str(tmp_path / 'cache.sqlite'))
+    obj   = BkkChecker('overloaded', cfg, cache=cache, throttle=Throttle(ntry=2, **Data.d_fast))
+    obj.save()
+
+    assert len(read_calls(fake_dirac)) == 4
+
+    out_dir = tmp_path / 'ana_dir/bkk_checker/overloaded'
+    d_unchecked = yaml.safe_load((out_dir / 'unchecked.yaml').read_text())
+    assert sorted(d_unchecked) == ['11102202', '11102211']
+    assert all(d_data['reason'] == 'failed' for d_data in d_unchecked.values())
+
+    for event_type in cfg.evt_type:
+        assert cache.get(obj.get_bkk_path(event_type)) is None
+# --------------------------------------------------